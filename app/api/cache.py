@@ -1,17 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Any, Optional
 from app.services.cache_service import CacheService
+from app.dependencies import get_cache_service
 
 router = APIRouter(prefix="/cache", tags=["cache"])
 
-# Initialize cache service
-cache_service = CacheService()
-
 
 @router.get("/stats")
-def get_cache_stats() -> Dict[str, Any]:
-    """Get Redis cache statistics"""
-    stats = cache_service.get_cache_stats()
+async def get_cache_stats(cache_service: CacheService = Depends(get_cache_service)) -> Dict[str, Any]:
+    """Get cache statistics, with hit rates for the in-process (l1) and Redis (l2) tiers"""
+    stats = await cache_service.get_cache_stats()
     return {
         "cache_stats": stats,
         "message": "Cache statistics retrieved successfully"
@@ -19,10 +17,20 @@ def get_cache_stats() -> Dict[str, Any]:
 
 
 @router.delete("/clear")
-def clear_cache() -> Dict[str, str]:
-    """Clear all cached data"""
-    success = cache_service.clear_cache()
-    if success:
-        return {"message": "Cache cleared successfully"}
-    else:
+async def clear_cache(
+    scope: str = Query("all", pattern="^(all|search)$", description="all: every key; search: cached queries only"),
+    prefix: Optional[str] = Query(None, description="With scope=search, only queries starting with this prefix"),
+    sweep: bool = Query(True, description="With scope=all, unlink the retired keys in the background"),
+    cache_service: CacheService = Depends(get_cache_service)
+) -> Dict[str, Any]:
+    """Invalidate cached data, in Redis and in every process's local cache
+
+    Returns immediately; deleting the invalidated keys from Redis continues in
+    the background.
+    """
+    if prefix is not None and scope != "search":
+        raise HTTPException(status_code=400, detail="prefix requires scope=search")
+    result = await cache_service.clear_cache(scope=scope, prefix=prefix, sweep=sweep)
+    if result is None:
         raise HTTPException(status_code=500, detail="Failed to clear cache")
+    return {"message": "Cache cleared successfully", **result}
@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any
+from fastapi import Request, Response
+
+
+def make_etag(version: str, *params: Any) -> str:
+    """Strong ETag for a response built from data at ``version`` with ``params``"""
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag hashing an encoded response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists ``etag``
+
+    Uses weak comparison, as If-None-Match requires, so ``W/`` tags added
+    by proxies that recompress responses still match.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def cache_control(max_age: int) -> str:
+    """Cache-Control value for a public read; ``max_age`` 0 makes caches revalidate every time"""
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+def set_validators(response: Response, etag: str, max_age: int) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control(max_age)
+
+
+def not_modified(etag: str, max_age: int) -> Response:
+    """Empty 304 response carrying the validators a 200 would have"""
+    response = Response(status_code=304)
+    set_validators(response, etag, max_age)
+    return response
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+def get_metrics() -> Response:
+    """Metrics of this worker process in the Prometheus text format"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,50 +1,259 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+import zlib
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, AsyncIterator, Optional
+from app.api.http_cache import body_etag, etag_matches, make_etag, not_modified, set_validators
+from app.core import serialization
+from app.core.config import get_settings
 from app.models.recipe import RecipeCreate, RecipeUpdate
 from app.services.recipe_service import RecipeService
 from app.dependencies import get_recipe_service
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+# Response validation for routes encoding their body with validated_response
+_RECIPE = TypeAdapter(Dict[str, Any])
+_RECIPE_LIST = TypeAdapter(List[Dict[str, Any]])
+
 
 @router.get("")
-def list_recipes(recipe_service: RecipeService = Depends(get_recipe_service)) -> List[Dict[str, Any]]:
-    """Get all recipes"""
-    return recipe_service.get_all_recipes()
+async def list_recipes(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title"),
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> List[Dict[str, Any]]:
+    """Get recipes in ID order, one page at a time
+
+    When more recipes follow, the X-Next-Cursor header carries the cursor for
+    the next page and the Link header its URL. Responses carry an ETag; a
+    request whose If-None-Match still matches gets 304 without reading recipes.
+    """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    # Read the version before the page: a write in between can only make the
+    # body newer than its ETag, never older
+    etag = make_etag(await recipe_service.get_version(), limit, cursor, field_list)
+    max_age = get_settings().http_cache_max_age
+    if etag_matches(request, etag):
+        return not_modified(etag, max_age)
+    try:
+        page = await recipe_service.list_recipes(limit, cursor=cursor, fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = serialization.validated_response(_RECIPE_LIST, page.recipes)
+    if page.next_cursor:
+        next_url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["X-Next-Cursor"] = page.next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    set_validators(response, etag, max_age)
+    return response
 
 
 @router.get("/search")
-def search_recipes(q: str = "", recipe_service: RecipeService = Depends(get_recipe_service)) -> List[Dict[str, Any]]:
-    """Search recipes by title (case-insensitive)"""
-    return recipe_service.search_recipes(q)
+async def search_recipes(
+    request: Request,
+    q: str = "",
+    limit: int = Query(50, ge=1, le=200),
+    highlight: bool = False,
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> List[Dict[str, Any]]:
+    """Search recipes by title, ingredients and cuisine (case-insensitive, prefix matching)
+
+    Internal and MealDB results are fetched concurrently. The X-Sources-Status
+    header reports each source as ok, timeout or error; results from a slow or
+    failing source are left out rather than holding up the response.
+
+    MealDB results have no version counter, so the ETag hashes the body: a
+    matching If-None-Match saves the transfer, not the search. Partial
+    results are marked ``no-store`` so caches do not keep them.
+    """
+    results = await recipe_service.search_recipes(q, limit=limit, highlight=highlight)
+    response = serialization.validated_response(_RECIPE_LIST, results.recipes)
+    response.headers["X-Sources-Status"] = ", ".join(
+        f"{source}={status}" for source, status in results.sources_status.items()
+    )
+    if results.partial:
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    etag = body_etag(response.body)
+    max_age = get_settings().http_search_cache_max_age
+    if etag_matches(request, etag):
+        response = not_modified(etag, max_age)
+    set_validators(response, etag, max_age)
+    return response
+
+
+@router.get("/by-ingredients")
+async def find_recipes_by_ingredients(
+    have: str = Query(..., description="Comma-separated ingredients on hand, e.g. garlic,rice,eggs"),
+    limit: int = Query(50, ge=1, le=200),
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> List[Dict[str, Any]]:
+    """Find recipes by the ingredients on hand
+
+    Results are ranked by the share of each recipe's ingredients covered; each
+    carries a ``match`` object with ``matched``, ``total`` and ``coverage``.
+    """
+    ingredients = [item.strip() for item in have.split(",") if item.strip()]
+    if not ingredients:
+        raise HTTPException(status_code=400, detail="At least one ingredient is required")
+    recipes = await recipe_service.find_by_ingredients(ingredients, limit=limit)
+    return serialization.validated_response(_RECIPE_LIST, recipes)
+
+
+async def _ndjson_chunks(recipes: AsyncIterator[Dict[str, Any]], batch_size: int, compress: bool) -> AsyncIterator[bytes]:
+    """Encode recipes as NDJSON, one chunk per batch, optionally gzip-compressed"""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip framing
+    lines: List[bytes] = []
+
+    async def flush() -> bytes:
+        chunk = b"".join(lines)
+        lines.clear()
+        # zlib releases the GIL; compressing a batch off the event loop keeps it responsive
+        return await run_in_threadpool(compressor.compress, chunk) if compressor else chunk
+
+    async for recipe in recipes:
+        lines.append(serialization.dumps(recipe) + b"\n")
+        if len(lines) >= batch_size:
+            chunk = await flush()
+            if chunk:
+                yield chunk
+    chunk = await flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+@router.get("/export")
+async def export_recipes(
+    after_id: Optional[int] = Query(None, ge=0, description="Resume after this recipe ID"),
+    gzip: bool = False,
+    batch_size: int = Query(500, ge=1, le=10000),
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> StreamingResponse:
+    """Stream the full recipe catalog as NDJSON (one recipe per line, in ID order)
+
+    Rows are read and sent in batches, so memory use stays flat regardless of
+    catalog size, and no database connection is held between batches. An
+    interrupted export can be resumed by passing the ID of the last recipe
+    received as ``after_id``. With ``gzip=true`` the stream is gzip-compressed
+    (Content-Encoding: gzip).
+    """
+    recipes = recipe_service.export_recipes(after_id=after_id, batch_size=batch_size)
+    headers = {"Content-Encoding": "gzip"} if gzip else {}
+    return StreamingResponse(
+        _ndjson_chunks(recipes, batch_size, compress=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
 
 
 @router.get("/{recipe_id}")
-def get_recipe(recipe_id: int, recipe_service: RecipeService = Depends(get_recipe_service)) -> Dict[str, Any]:
-    """Get a recipe by ID"""
-    recipe = recipe_service.get_recipe_by_id(recipe_id)
+async def get_recipe(
+    recipe_id: int,
+    request: Request,
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> Dict[str, Any]:
+    """Get a recipe by ID
+
+    Like the listing, answers a matching If-None-Match with 304 from the
+    recipe's version alone.
+    """
+    etag = make_etag(await recipe_service.get_version(recipe_id))
+    max_age = get_settings().http_cache_max_age
+    if etag_matches(request, etag):
+        return not_modified(etag, max_age)
+    recipe = await recipe_service.get_recipe_by_id(recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return recipe
+    response = serialization.validated_response(_RECIPE, recipe)
+    set_validators(response, etag, max_age)
+    return response
 
 
 @router.post("", status_code=201)
-def create_recipe(recipe: RecipeCreate, recipe_service: RecipeService = Depends(get_recipe_service)) -> Dict[str, Any]:
+async def create_recipe(recipe: RecipeCreate, recipe_service: RecipeService = Depends(get_recipe_service)) -> Dict[str, Any]:
     """Create a new recipe"""
-    return recipe_service.create_recipe(recipe)
+    return await recipe_service.create_recipe(recipe)
+
+
+async def _ndjson_items(request: Request) -> AsyncIterator[Any]:
+    """Parse an NDJSON request body line by line as it arrives
+
+    Lines that are not valid JSON are yielded as ValueError instances so they
+    can be reported without aborting the stream.
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+
+def _parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return serialization.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+async def _iterate(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+@router.post("/bulk")
+async def bulk_create_recipes(
+    request: Request,
+    recipe_service: RecipeService = Depends(get_recipe_service)
+) -> Dict[str, Any]:
+    """Create many recipes from a JSON array or an NDJSON stream
+
+    Send ``Content-Type: application/x-ndjson`` (one recipe per line) to
+    stream large imports; any other content type is read as a JSON array.
+    Each item is validated like ``POST /recipes``. Invalid items are reported
+    in ``errors`` by their zero-based position and do not stop the import.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = _ndjson_items(request)
+    else:
+        try:
+            body = serialization.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array")
+        items = _iterate(body)
+
+    result = await recipe_service.import_recipes(items)
+    return {
+        "created": result.created,
+        "failed": result.failed,
+        "ids": result.ids,
+        "errors": result.errors,
+    }
 
 
 @router.put("/{recipe_id}")
-def update_recipe(recipe_id: int, updated_recipe: RecipeUpdate, recipe_service: RecipeService = Depends(get_recipe_service)) -> Dict[str, Any]:
+async def update_recipe(recipe_id: int, updated_recipe: RecipeUpdate, recipe_service: RecipeService = Depends(get_recipe_service)) -> Dict[str, Any]:
     """Update an existing recipe"""
-    recipe = recipe_service.update_recipe(recipe_id, updated_recipe)
+    recipe = await recipe_service.update_recipe(recipe_id, updated_recipe)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
 
 @router.delete("/{recipe_id}", status_code=204)
-def delete_recipe(recipe_id: int, recipe_service: RecipeService = Depends(get_recipe_service)) -> None:
+async def delete_recipe(recipe_id: int, recipe_service: RecipeService = Depends(get_recipe_service)) -> None:
     """Delete a recipe by ID"""
-    if not recipe_service.delete_recipe(recipe_id):
+    if not await recipe_service.delete_recipe(recipe_id):
         raise HTTPException(status_code=404, detail="Recipe not found")
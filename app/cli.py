@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+from app.core.config import get_settings
+from app.repositories.sqlite_recipe_repository import SQLiteRecipeRepository
+
+
+def _open_repository() -> SQLiteRecipeRepository:
+    settings = get_settings()
+    return SQLiteRecipeRepository(db_path=settings.database_path, pool_size=2)
+
+
+def rebuild_search_index(args: argparse.Namespace) -> int:
+    """Rebuild the recipe full-text search index online"""
+    repository = _open_repository()
+    try:
+        total = repository.rebuild_search_index(
+            batch_size=args.batch_size,
+            progress=lambda done: print(f"indexed {done} recipes", file=sys.stderr),
+        )
+    finally:
+        repository.close()
+    print(f"Search index rebuilt: {total} recipes indexed")
+    return 0
+
+
+def rebuild_ingredient_index(args: argparse.Namespace) -> int:
+    """Rebuild the normalized ingredient index online"""
+    repository = _open_repository()
+    try:
+        total = repository.rebuild_ingredient_index(
+            batch_size=args.batch_size,
+            progress=lambda done: print(f"indexed {done} recipes", file=sys.stderr),
+        )
+    finally:
+        repository.close()
+    print(f"Ingredient index rebuilt: {total} recipes indexed")
+    return 0
+
+
+def migrate_list_encoding(args: argparse.Namespace) -> int:
+    """Re-encode ingredient and step columns in the packed format online"""
+    repository = _open_repository()
+    try:
+        before = repository.storage_stats()
+        total = repository.migrate_list_encoding(
+            batch_size=args.batch_size,
+            progress=lambda done: print(f"migrated {done} recipes", file=sys.stderr),
+        )
+        after = repository.storage_stats()
+    finally:
+        repository.close()
+    print(f"List encoding migrated: {total} recipes re-encoded")
+    for encoding in ("packed", "json"):
+        print(f"  {encoding}: {after[encoding]['rows']} rows, {after[encoding]['bytes']} bytes")
+    saved = sum(stats["bytes"] for stats in before.values()) - sum(stats["bytes"] for stats in after.values())
+    print(f"  column bytes saved: {saved}")
+    return 0
+
+
+def warm_cache(args: argparse.Namespace) -> int:
+    """Crawl TheMealDB into the local mirror and preload the search cache"""
+    # Imported here so the SQLite-only commands don't need Redis or httpx
+    from app import dependencies
+
+    def progress(stage: str, done: int, total: int) -> None:
+        print(f"{stage}: {done}/{total}", file=sys.stderr)
+
+    async def run():
+        try:
+            warmup = dependencies.get_warmup_service()
+            if args.concurrency:
+                warmup.concurrency = args.concurrency
+            return await warmup.run(full=args.full, progress=progress)
+        finally:
+            await dependencies.close_resources()
+
+    result = asyncio.run(run())
+    print(
+        f"Warm-up done: {result.tasks_run} tasks run, {result.tasks_skipped} already done, "
+        f"{result.meals} meals mirrored, {result.queries_cached} queries cached"
+    )
+    if result.failed_tasks:
+        print(f"Failed tasks (rerun to retry): {', '.join(result.failed_tasks)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Recipe Discovery API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-search-index", help=rebuild_search_index.__doc__)
+    rebuild.add_argument("--batch-size", type=int, default=1000, help="rows indexed per transaction")
+    rebuild.set_defaults(handler=rebuild_search_index)
+
+    rebuild = subparsers.add_parser("rebuild-ingredient-index", help=rebuild_ingredient_index.__doc__)
+    rebuild.add_argument("--batch-size", type=int, default=1000, help="recipes indexed per transaction")
+    rebuild.set_defaults(handler=rebuild_ingredient_index)
+
+    migrate = subparsers.add_parser("migrate-list-encoding", help=migrate_list_encoding.__doc__)
+    migrate.add_argument("--batch-size", type=int, default=1000, help="recipes re-encoded per transaction")
+    migrate.set_defaults(handler=migrate_list_encoding)
+
+    warm = subparsers.add_parser("warm-cache", help=warm_cache.__doc__)
+    warm.add_argument("--full", action="store_true", help="crawl everything again instead of resuming")
+    warm.add_argument("--concurrency", type=int, help="concurrent TheMealDB requests")
+    warm.set_defaults(handler=warm_cache)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
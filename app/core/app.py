@@ -1,5 +1,20 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from fastapi import FastAPI
-from app.api import health, recipes, cache
+from app.api import health, recipes, cache, metrics
+from app.core.metrics import MetricsMiddleware
+from app.core.serialization import FastJSONResponse
+from app.dependencies import init_resources, close_resources
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open app-lifetime resources at startup and release them at shutdown"""
+    await init_resources()
+    try:
+        yield
+    finally:
+        await close_resources()
 
 
 def create_app() -> FastAPI:
@@ -7,13 +22,18 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="Recipe Discovery API",
         description="A simple recipe management API with Redis caching",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
     )
     
+    app.add_middleware(MetricsMiddleware)
+    
     # Include routers
     app.include_router(health.router)
     app.include_router(recipes.router)
     app.include_router(cache.router)
+    app.include_router(metrics.router)
     
     return app
 
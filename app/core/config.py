@@ -0,0 +1,70 @@
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, read from environment variables"""
+    redis_url: str = field(default_factory=lambda: os.getenv("REDIS_URL", "redis://localhost:6379"))
+    database_path: str = field(default_factory=lambda: os.getenv("DATABASE_PATH", "recipes.db"))
+    sqlite_pool_size: int = field(default_factory=lambda: _env_int("SQLITE_POOL_SIZE", 8))
+    sqlite_pool_timeout: float = field(default_factory=lambda: _env_float("SQLITE_POOL_TIMEOUT", 10.0))
+    sqlite_cached_statements: int = field(default_factory=lambda: _env_int("SQLITE_CACHED_STATEMENTS", 256))
+    sqlite_write_batch_size: int = field(default_factory=lambda: _env_int("SQLITE_WRITE_BATCH_SIZE", 64))
+    sqlite_write_linger: float = field(default_factory=lambda: _env_float("SQLITE_WRITE_LINGER", 0.0))
+    mealdb_base_url: str = field(default_factory=lambda: os.getenv("MEALDB_BASE_URL", "https://www.themealdb.com/api/json/v1/1"))
+    mealdb_connect_timeout: float = field(default_factory=lambda: _env_float("MEALDB_CONNECT_TIMEOUT", 3.0))
+    mealdb_read_timeout: float = field(default_factory=lambda: _env_float("MEALDB_READ_TIMEOUT", 5.0))
+    mealdb_max_connections: int = field(default_factory=lambda: _env_int("MEALDB_MAX_CONNECTIONS", 20))
+    mealdb_max_concurrency: int = field(default_factory=lambda: _env_int("MEALDB_MAX_CONCURRENCY", 10))
+    mealdb_http2: bool = field(default_factory=lambda: _env_bool("MEALDB_HTTP2", False))
+    mealdb_transform_cache_size: int = field(default_factory=lambda: _env_int("MEALDB_TRANSFORM_CACHE_SIZE", 4096))
+    mealdb_mirror_mode: bool = field(default_factory=lambda: _env_bool("MEALDB_MIRROR_MODE", False))
+    mealdb_warmup_on_startup: bool = field(default_factory=lambda: _env_bool("MEALDB_WARMUP_ON_STARTUP", False))
+    mealdb_warmup_concurrency: int = field(default_factory=lambda: _env_int("MEALDB_WARMUP_CONCURRENCY", 4))
+    redis_max_connections: int = field(default_factory=lambda: _env_int("REDIS_MAX_CONNECTIONS", 50))
+    redis_pool_timeout: float = field(default_factory=lambda: _env_float("REDIS_POOL_TIMEOUT", 5.0))
+    redis_socket_timeout: float = field(default_factory=lambda: _env_float("REDIS_SOCKET_TIMEOUT", 2.0))
+    redis_health_check_interval: float = field(default_factory=lambda: _env_float("REDIS_HEALTH_CHECK_INTERVAL", 30.0))
+    redis_retries: int = field(default_factory=lambda: _env_int("REDIS_RETRIES", 3))
+    cache_l1_max_entries: int = field(default_factory=lambda: _env_int("CACHE_L1_MAX_ENTRIES", 1024))
+    cache_l1_max_bytes: int = field(default_factory=lambda: _env_int("CACHE_L1_MAX_BYTES", 32 * 1024 * 1024))
+    cache_l1_ttl: float = field(default_factory=lambda: _env_float("CACHE_L1_TTL", 60.0))
+    cache_soft_ttl: float = field(default_factory=lambda: _env_float("CACHE_SOFT_TTL", 60 * 60.0))
+    cache_hard_ttl: int = field(default_factory=lambda: _env_int("CACHE_HARD_TTL", 24 * 60 * 60))
+    cache_xfetch_beta: float = field(default_factory=lambda: _env_float("CACHE_XFETCH_BETA", 1.0))
+    cache_refresh_lock_timeout: float = field(default_factory=lambda: _env_float("CACHE_REFRESH_LOCK_TIMEOUT", 30.0))
+    search_internal_timeout: float = field(default_factory=lambda: _env_float("SEARCH_INTERNAL_TIMEOUT", 2.0))
+    search_mealdb_timeout: float = field(default_factory=lambda: _env_float("SEARCH_MEALDB_TIMEOUT", 3.0))
+    json_backend: str = field(default_factory=lambda: os.getenv("JSON_BACKEND", "auto"))
+    http_cache_max_age: int = field(default_factory=lambda: _env_int("HTTP_CACHE_MAX_AGE", 30))
+    http_search_cache_max_age: int = field(default_factory=lambda: _env_int("HTTP_SEARCH_CACHE_MAX_AGE", 60))
+    host: str = field(default_factory=lambda: os.getenv("HOST", "0.0.0.0"))
+    port: int = field(default_factory=lambda: _env_int("PORT", 8000))
+    web_concurrency: int = field(default_factory=lambda: _env_int("WEB_CONCURRENCY", 0))
+    graceful_timeout: float = field(default_factory=lambda: _env_float("GRACEFUL_TIMEOUT", 30.0))
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Get the process-wide settings instance"""
+    return Settings()
@@ -0,0 +1,35 @@
+import os
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` (created if missing) for the duration of the block
+
+    Serializes one-time work across processes, such as schema creation when
+    several workers start at once. The lock is advisory (``flock``) and is
+    released by the OS if the holder dies. Does nothing where ``fcntl`` is
+    unavailable.
+    """
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
+
+
+def sqlite_init_lock(db_path: str) -> ContextManager[None]:
+    """``file_lock`` beside a SQLite database file, guarding its schema setup; none for ``file:`` URIs"""
+    if db_path.startswith("file:"):
+        return nullcontext()
+    return file_lock(f"{db_path}.init-lock")
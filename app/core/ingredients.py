@@ -0,0 +1,109 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+
+# TheMealDB spreads ingredients over numbered strIngredientN/strMeasureN fields
+MEALDB_INGREDIENT_SLOTS = 20
+_MEALDB_INGREDIENT_KEYS = tuple(
+    (f"strIngredient{i}", f"strMeasure{i}") for i in range(1, MEALDB_INGREDIENT_SLOTS + 1)
+)
+
+_QUANTITY = r"(?:\d+\s+\d+/\d+|\d+(?:[.,/]\d+)?|\d*\s*[½⅓⅔¼¾⅛])"
+_UNITS = (
+    r"(?:kg|g|mg|ml|l|oz|lbs?|pounds?|grams?|kilograms?|ounces?|cups?|tbsp|tbs|tsp"
+    r"|tablespoons?|teaspoons?|pinch(?:es)?|dash(?:es)?|handfuls?|cloves?|cans?|tins?"
+    r"|slices?|pieces?|bunch(?:es)?|sprigs?|sticks?|pints?|quarts?|lit(?:re|er)s?"
+    r"|packets?|packs?|jars?|large|medium|small|whole)\.?"
+)
+# A leading measure: a quantity (or range) with an optional unit, or a bare
+# unit that needs no quantity ("pinch salt"), optionally followed by "of"
+_MEASURE_RE = re.compile(
+    rf"^\s*(?:{_QUANTITY}(?:\s*(?:-|–|to)\s*{_QUANTITY})?\s*(?:{_UNITS}(?=\s|$))?"
+    rf"|(?:pinch|dash|handful|splash)(?=\s))\s*(?:of\s+)?",
+    re.IGNORECASE,
+)
+_TRAILING_NOTES_RE = re.compile(r"\s*(?:\(.*?\)|\bto taste\b|\boptional\b)", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def mealdb_ingredient_pairs(meal: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Extract (measure, ingredient) pairs from a TheMealDB meal, skipping empty slots"""
+    pairs = []
+    for ingredient_key, measure_key in _MEALDB_INGREDIENT_KEYS:
+        ingredient = meal.get(ingredient_key)
+
+        # Handle None values and empty strings
+        if ingredient and ingredient != "null" and ingredient.strip():
+            measure = meal.get(measure_key)
+            pairs.append((measure.strip() if measure else "", ingredient.strip()))
+    return pairs
+
+
+def format_ingredient(measure: str, ingredient: str) -> str:
+    """Join a measure and an ingredient the way recipes store them"""
+    return f"{measure} {ingredient}" if measure else ingredient
+
+
+def split_measure(text: str) -> Tuple[str, str]:
+    """Split a leading measure off an ingredient line: "1/4 cup olive oil" -> ("1/4 cup", "olive oil")"""
+    match = _MEASURE_RE.match(text)
+    if not match or not match.group(0).strip():
+        return "", text.strip()
+    return match.group(0).strip(), text[match.end():].strip()
+
+
+def canonical_ingredient(text: str) -> str:
+    """Reduce an ingredient line to a lower-cased name without measure or notes
+
+    "2 cloves Garlic, minced" -> "garlic". Returns "" when nothing is left.
+    """
+    _, name = split_measure(text)
+    name = name.split(",", 1)[0]
+    name = _TRAILING_NOTES_RE.sub(" ", name)
+    name = _NON_WORD_RE.sub(" ", name.lower())
+    return _WHITESPACE_RE.sub(" ", name).strip()
+
+
+def canonical_ingredients(ingredients: List[str]) -> List[str]:
+    """Canonicalize a recipe's ingredient lines, dropping blanks and duplicates"""
+    names = []
+    for text in ingredients:
+        name = canonical_ingredient(text)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def ingredient_keys(name: str) -> List[str]:
+    """Lookup keys for a canonical name: the name from each word on
+
+    "chopped tomatoes" -> ["chopped tomatoes", "tomatoes"], so a prefix
+    lookup for "tomato" finds it.
+    """
+    words = name.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def ingredient_query_term(text: str) -> str:
+    """Canonicalize a user-supplied ingredient for prefix lookups
+
+    A plural ending is dropped so "tomatoes" also finds "tomato" and "eggs"
+    finds "egg".
+    """
+    term = canonical_ingredient(text)
+    if len(term) > 3 and term.endswith("es"):
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def ingredient_query_terms(ingredients: List[str]) -> List[str]:
+    """Canonicalize user-supplied ingredients, dropping blanks and duplicates"""
+    terms = []
+    for text in ingredients:
+        term = ingredient_query_term(text)
+        if term and term not in terms:
+            terms.append(term)
+    return terms
@@ -0,0 +1,357 @@
+"""Prometheus-style metrics, rendered in the text exposition format
+
+A small in-process registry: counters, gauges and histograms with labels,
+plus a ``timed`` decorator and an ASGI middleware timing HTTP requests.
+Recording is a dict lookup and a locked add; the work of formatting happens
+only when ``/metrics`` is scraped. Each worker process keeps its own values.
+"""
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a cached lookup (sub-millisecond) to a slow upstream call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Registry:
+    """Collects metrics and renders them for scraping
+
+    Callbacks added with ``add_callback`` run before each render, to update
+    gauges read from live objects (such as connection pools).
+    """
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._callbacks: List[Callable[[], None]] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def render(self) -> str:
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Metrics callback error: {e}")
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, **labels: Any) -> Any:
+        """Get the child for one set of label values, creating it on first use"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabeled(self) -> Any:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return self.labels()
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """A fresh child holding the values of one set of labels"""
+        pass
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(child.samples(self.name, _format_labels(self.labelnames, key)))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+
+class _GaugeValue(_Value):
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; by convention its name ends in ``_total``"""
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabeled().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabeled().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabeled().set(value)
+
+
+class _Timer:
+    def __init__(self, child: "_HistogramValue"):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramValue:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * len(bounds)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the duration of its block"""
+        return _Timer(self)
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        label_prefix = labels[:-1] + "," if labels else "{"
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{label_prefix}le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (usually seconds) in cumulative buckets"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self._bounds = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self._bounds)
+
+    def observe(self, value: float) -> None:
+        self._unlabeled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabeled().time()
+
+
+def timed(histogram: Histogram, **labels: Any) -> Callable[[Callable], Callable]:
+    """Decorator observing the duration of every call, sync or async, in ``histogram``
+
+    If the histogram has a ``method`` label and none is given, the decorated
+    function's name is used. The labelled child is looked up once, when
+    decorating.
+    """
+    def decorator(func: Callable) -> Callable:
+        func_labels = dict(labels)
+        if "method" in histogram.labelnames:
+            func_labels.setdefault("method", func.__name__)
+        child = histogram.labels(**func_labels)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+# Application metrics
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route template and status",
+    ("method", "route", "status"),
+)
+SQLITE_QUERY_SECONDS = Histogram(
+    "sqlite_query_duration_seconds", "Time spent in SQLite repository methods", ("repository", "method"),
+)
+REDIS_OPERATION_SECONDS = Histogram(
+    "redis_operation_duration_seconds", "Latency of cache reads and writes against Redis", ("operation",),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "MealDB search cache lookups by tier (l1, l2) and result (hit, miss)", ("tier", "result"),
+)
+MEALDB_REQUEST_SECONDS = Histogram(
+    "mealdb_request_duration_seconds", "Latency of TheMealDB API requests", ("endpoint",),
+)
+MEALDB_REQUEST_ERRORS = Counter(
+    "mealdb_request_errors_total", "Failed TheMealDB API requests by endpoint and error type", ("endpoint", "error"),
+)
+MEALDB_REQUESTS_IN_FLIGHT = Gauge(
+    "mealdb_requests_in_flight", "TheMealDB API requests currently in progress",
+)
+SERVICE_CALL_SECONDS = Histogram(
+    "service_call_duration_seconds", "Time spent in service methods", ("service", "method"),
+)
+POOL_CONNECTIONS = Gauge(
+    "pool_connections", "Connection pool occupancy by pool and state (in_use, idle, max)", ("pool", "state"),
+)
+SQLITE_WRITE_BATCH_SIZE = Histogram(
+    "sqlite_write_batch_size", "Writes applied per SQLite writer transaction", ("database",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+SQLITE_WRITE_QUEUE_SECONDS = Histogram(
+    "sqlite_write_queue_seconds", "Time writes wait in the SQLite writer queue before their transaction starts",
+    ("database",),
+)
+SQLITE_WRITE_TRANSACTION_SECONDS = Histogram(
+    "sqlite_write_transaction_duration_seconds", "Duration of SQLite writer transactions, BEGIN to COMMIT",
+    ("database",),
+)
+SQLITE_WRITE_QUEUE_DEPTH = Gauge(
+    "sqlite_write_queue_depth", "Writes waiting in the SQLite writer queue", ("database",),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_SECONDS for every request
+
+    Requests are labelled by route template (``/recipes/{recipe_id}``), not
+    by raw path, to keep the number of series bounded; requests matching no
+    route are grouped under ``unmatched``.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._routes: Optional[Dict[Any, str]] = None
+
+    def _route(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # unless a response starts, the request failed
+        start = time.perf_counter()
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched endpoint in the shared scope
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"], route=self._route(scope), status=status
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Any, Dict, Optional
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+
+
+class RedisConnectionManager:
+    """Owns the app-scoped asyncio Redis connection pool
+
+    All cache users share one bounded pool: callers wait up to
+    ``pool_timeout`` for a free connection instead of opening new ones, idle
+    connections are health-checked before reuse, and connection errors and
+    timeouts are retried with exponential backoff.
+
+    Pooled connections belong to the event loop that opened them, so the
+    pool is created on first use and recreated if used from another loop.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379",
+        max_connections: int = 50,
+        pool_timeout: float = 5.0,
+        socket_timeout: float = 2.0,
+        health_check_interval: float = 30.0,
+        retries: int = 3,
+        backoff_base: float = 0.01,
+        backoff_cap: float = 0.5,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.socket_timeout = socket_timeout
+        self.health_check_interval = health_check_interval
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._client: Optional[Redis] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> Redis:
+        """Get the shared client, creating its pool on first use"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            pool = BlockingConnectionPool.from_url(
+                self.url,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+                health_check_interval=self.health_check_interval,
+                retry=Retry(
+                    ExponentialBackoff(cap=self.backoff_cap, base=self.backoff_base),
+                    self.retries,
+                ),
+                retry_on_error=[ConnectionError, TimeoutError],
+                decode_responses=True,
+            )
+            self._client = Redis(connection_pool=pool)
+            self._client_loop = loop
+        return self._client
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool occupancy figures"""
+        if self._client is None:
+            return {"max_connections": self.max_connections, "in_use": 0, "available": 0}
+        pool = self._client.connection_pool
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(pool._in_use_connections),
+            "available": len(pool._available_connections),
+        }
+
+    async def aclose(self) -> None:
+        """Disconnect all pooled connections"""
+        if self._client is not None:
+            await self._client.aclose(close_connection_pool=True)
+            self._client = None
+            self._client_loop = None
@@ -0,0 +1,100 @@
+"""JSON serialization for stored recipes, cache payloads and HTTP responses
+
+The backend is picked once, from ``JSON_BACKEND``: ``orjson`` (the default
+when the package is installed) or ``json`` from the standard library. Both
+write compact UTF-8 JSON, so data written with one is read by the other.
+Callers go through this module (``serialization.dumps(...)``) rather than
+importing the functions, so ``set_backend`` takes effect everywhere.
+"""
+import importlib.util
+import json
+from typing import Any, Dict, Optional, Union
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+from app.core.config import get_settings
+
+
+class StdlibBackend:
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return self.dumps_str(value).encode()
+
+    def dumps_str(self, value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    """orjson: encodes to bytes natively; errors subclass TypeError/ValueError like the stdlib's"""
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+    def dumps_str(self, value: Any) -> str:
+        return self.dumps(value).decode()
+
+
+BACKENDS = ("orjson", "json")
+
+
+def create_backend(name: str = "auto") -> Union[OrjsonBackend, StdlibBackend]:
+    """Backend by name; ``auto`` prefers orjson when it is installed"""
+    if name == "auto":
+        name = "orjson" if importlib.util.find_spec("orjson") is not None else "json"
+    if name == "orjson":
+        return OrjsonBackend()
+    if name == "json":
+        return StdlibBackend()
+    raise ValueError(f"Unknown JSON backend {name!r}; expected one of {BACKENDS} or 'auto'")
+
+
+_backend = create_backend(get_settings().json_backend)
+
+
+def backend_name() -> str:
+    return _backend.name
+
+
+def set_backend(name: str) -> None:
+    """Switch the process-wide backend (benchmarks and tests)"""
+    global _backend
+    _backend = create_backend(name)
+
+
+def dumps(value: Any) -> bytes:
+    return _backend.dumps(value)
+
+
+def dumps_str(value: Any) -> str:
+    """Encode for TEXT columns, which must not receive bytes"""
+    return _backend.dumps_str(value)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _backend.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with the active backend; the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def validated_response(
+    adapter: TypeAdapter, content: Any, headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """Validate ``content`` against ``adapter``, then encode it once
+
+    FastAPI's own handling of a returned value validates it, converts the
+    result to JSON-compatible Python objects (a full copy of the body) and
+    only then encodes it. The dicts and lists the repositories return are
+    JSON-compatible already, so routes on hot paths skip that copy.
+    """
+    return FastJSONResponse(adapter.validate_python(content), headers=headers)
@@ -0,0 +1,70 @@
+"""Production entry point: uvicorn with one worker process per available CPU
+
+    python -m app.core.server
+
+Workers are separate processes, each importing the app and opening its own
+connection pools at startup; schema setup and seeding run in one worker at
+a time under a file lock. On SIGTERM or SIGINT, workers stop accepting
+connections, give in-flight requests up to ``GRACEFUL_TIMEOUT`` seconds,
+then run the shutdown hook that drains and closes the pools.
+"""
+import math
+import os
+from pathlib import Path
+from typing import Optional
+import uvicorn
+from app.core.config import Settings, get_settings
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPU limit of the container (cgroup v2 or v1) in CPUs, or None if unlimited"""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on: its affinity mask, capped by any container CPU limit"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS or Windows
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def worker_count(settings: Settings) -> int:
+    """``WEB_CONCURRENCY`` if set, else one worker per available CPU
+
+    Workers are async and do not block on I/O, so more than one per core
+    only adds memory and SQLite connections.
+    """
+    return settings.web_concurrency if settings.web_concurrency > 0 else available_cpus()
+
+
+def main() -> None:
+    settings = get_settings()
+    workers = worker_count(settings)
+    print(f"Starting {workers} worker(s) on {settings.host}:{settings.port}")
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        timeout_graceful_shutdown=math.ceil(settings.graceful_timeout),
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
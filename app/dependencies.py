@@ -1,25 +1,284 @@
+import asyncio
 import os
-from fastapi import Depends
-from app.repositories.recipe_repository import RecipeRepository, InMemoryRecipeRepository
+import threading
+from typing import Optional
+from app.core.config import get_settings
+from app.core.metrics import POOL_CONNECTIONS, REGISTRY, SQLITE_WRITE_QUEUE_DEPTH
+from app.core.redis import RedisConnectionManager
+from app.repositories.async_mealdb_mirror_repository import ExecutorMealDBMirrorRepository
+from app.repositories.async_recipe_repository import ExecutorRecipeRepository
+from app.repositories.mealdb_mirror_repository import MealDBMirrorRepository
+from app.repositories.recipe_repository import RecipeRepository
 from app.repositories.sqlite_recipe_repository import SQLiteRecipeRepository
 from app.services.recipe_service import RecipeService
 from app.services.mealdb_service import MealDBService
+from app.services.cache_service import CacheService
+from app.services.local_cache import LocalCache
+from app.services.warmup_service import CacheWarmupService
+
+
+# App-lifetime resources, created at startup by the lifespan hook (or lazily on
+# first use) and released at shutdown.
+_resource_lock = threading.Lock()
+_recipe_repository: Optional[SQLiteRecipeRepository] = None
+_async_recipe_repository: Optional[ExecutorRecipeRepository] = None
+_redis_manager: Optional[RedisConnectionManager] = None
+_cache_service: Optional[CacheService] = None
+_mealdb_service: Optional[MealDBService] = None
+_mealdb_mirror: Optional[MealDBMirrorRepository] = None
+_warmup_task: Optional["asyncio.Task[None]"] = None
+
+
+async def init_resources() -> None:
+    """Create app-lifetime resources; runs schema and seed work once"""
+    global _warmup_task
+    get_async_recipe_repository()
+    get_mealdb_service()
+    get_cache_service().start_invalidation_listener()
+    if get_settings().mealdb_warmup_on_startup:
+        _warmup_task = asyncio.get_running_loop().create_task(_warm_up(), name="cache-warmup")
+
+
+async def _warm_up() -> None:
+    """Startup warm-up; one worker runs it while the others skip"""
+    try:
+        result = await get_warmup_service().run(use_lock=True)
+    except Exception as e:
+        print(f"Cache warm-up failed: {e}")
+        return
+    if result.locked:
+        print("Cache warm-up already running in another process")
+    else:
+        print(f"Cache warm-up done: {result}")
+
+
+def _discard_inherited_resources() -> None:
+    """In a forked child, forget the parent's resources instead of sharing them
+
+    SQLite connections, sockets and event-loop-bound clients must not be
+    used from two processes. Servers that fork workers from a preloaded app
+    (``gunicorn --preload``) would otherwise hand every worker the parent's
+    objects; this way each worker opens its own on first use.
+    """
+    global _resource_lock, _recipe_repository, _async_recipe_repository, _redis_manager, _cache_service
+    global _mealdb_service, _mealdb_mirror, _warmup_task
+    _resource_lock = threading.Lock()  # may have been held by another thread at fork time
+    _recipe_repository = _async_recipe_repository = _redis_manager = _cache_service = None
+    _mealdb_service = _mealdb_mirror = _warmup_task = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_inherited_resources)
+
+
+async def close_resources() -> None:
+    """Release app-lifetime resources
+
+    Database pools are drained: queries in progress get up to
+    ``GRACEFUL_TIMEOUT`` seconds to finish before connections are closed.
+    """
+    global _recipe_repository, _async_recipe_repository, _redis_manager, _cache_service, _mealdb_service
+    global _mealdb_mirror, _warmup_task
+    with _resource_lock:
+        repository, _recipe_repository = _recipe_repository, None
+        async_repository, _async_recipe_repository = _async_recipe_repository, None
+        redis_manager, _redis_manager = _redis_manager, None
+        cache_service, _cache_service = _cache_service, None
+        mealdb_service, _mealdb_service = _mealdb_service, None
+        mirror, _mealdb_mirror = _mealdb_mirror, None
+        warmup_task, _warmup_task = _warmup_task, None
+    if warmup_task is not None:
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    drain_timeout = get_settings().graceful_timeout
+
+    def drain_sqlite() -> None:
+        if async_repository is not None:
+            async_repository.close()  # lets running queries finish before the pool closes
+        # The mirror first: the recipe repository owns the writer they share
+        if mirror is not None and not mirror.close(drain_timeout):
+            print("SQLite mirror pool closed with connections still in use")
+        if repository is not None and not repository.close(drain_timeout):
+            print("SQLite recipe pool closed with connections still in use")
+
+    # The drains block for up to GRACEFUL_TIMEOUT: run them off the event loop,
+    # alongside the async clients' shutdown
+    drained = asyncio.ensure_future(asyncio.to_thread(drain_sqlite))
+    try:
+        if cache_service is not None:
+            await cache_service.stop_background_tasks()
+        if mealdb_service is not None:
+            await mealdb_service.aclose()
+        if redis_manager is not None:
+            await redis_manager.aclose()
+    finally:
+        await drained
+
+
+def _collect_pool_metrics() -> None:
+    """Update the pool and writer queue gauges from the live resources; runs on every scrape"""
+    pools = {}
+    if _recipe_repository is not None:
+        stats = _recipe_repository.pool.stats()
+        pools["sqlite_recipes"] = (stats["in_use"], stats["idle"], stats["max_size"])
+        writer = _recipe_repository.writer
+        SQLITE_WRITE_QUEUE_DEPTH.labels(database=writer.name).set(writer.queue_depth())
+    if _mealdb_mirror is not None:
+        stats = _mealdb_mirror.pool.stats()
+        pools["sqlite_mealdb_mirror"] = (stats["in_use"], stats["idle"], stats["max_size"])
+    if _redis_manager is not None:
+        stats = _redis_manager.pool_stats()
+        pools["redis"] = (stats["in_use"], stats["available"], stats["max_connections"])
+    for pool, values in pools.items():
+        for state, value in zip(("in_use", "idle", "max"), values):
+            POOL_CONNECTIONS.labels(pool=pool, state=state).set(value)
+
+
+REGISTRY.add_callback(_collect_pool_metrics)
 
 
 def get_recipe_repository() -> RecipeRepository:
-    """Dependency to get recipe repository instance"""
-    return SQLiteRecipeRepository()
+    """Dependency to get the shared recipe repository instance"""
+    global _recipe_repository
+    if _recipe_repository is None:
+        with _resource_lock:
+            if _recipe_repository is None:
+                settings = get_settings()
+                _recipe_repository = SQLiteRecipeRepository(
+                    db_path=settings.database_path,
+                    pool_size=settings.sqlite_pool_size,
+                    pool_timeout=settings.sqlite_pool_timeout,
+                    cached_statements=settings.sqlite_cached_statements,
+                    write_batch=settings.sqlite_write_batch_size,
+                    write_linger=settings.sqlite_write_linger,
+                )
+    return _recipe_repository
+
+
+def get_async_recipe_repository() -> ExecutorRecipeRepository:
+    """Get the shared recipe repository for async callers, running queries on its own threads"""
+    global _async_recipe_repository
+    if _async_recipe_repository is None:
+        repository = get_recipe_repository()
+        with _resource_lock:
+            if _async_recipe_repository is None:
+                _async_recipe_repository = ExecutorRecipeRepository(
+                    repository, max_workers=get_settings().sqlite_pool_size
+                )
+    return _async_recipe_repository
+
+
+def get_redis_manager() -> RedisConnectionManager:
+    """Get the shared Redis connection pool manager"""
+    global _redis_manager
+    if _redis_manager is None:
+        with _resource_lock:
+            if _redis_manager is None:
+                settings = get_settings()
+                _redis_manager = RedisConnectionManager(
+                    settings.redis_url,
+                    max_connections=settings.redis_max_connections,
+                    pool_timeout=settings.redis_pool_timeout,
+                    socket_timeout=settings.redis_socket_timeout,
+                    health_check_interval=settings.redis_health_check_interval,
+                    retries=settings.redis_retries,
+                )
+    return _redis_manager
+
+
+def get_cache_service() -> CacheService:
+    """Dependency to get the shared cache service instance"""
+    global _cache_service
+    if _cache_service is None:
+        redis_manager = get_redis_manager()
+        with _resource_lock:
+            if _cache_service is None:
+                settings = get_settings()
+                _cache_service = CacheService(
+                    local_cache=LocalCache(
+                        max_entries=settings.cache_l1_max_entries,
+                        max_bytes=settings.cache_l1_max_bytes,
+                        default_ttl=settings.cache_l1_ttl,
+                    ),
+                    redis_manager=redis_manager,
+                    soft_ttl=settings.cache_soft_ttl,
+                    hard_ttl=settings.cache_hard_ttl,
+                    xfetch_beta=settings.cache_xfetch_beta,
+                    refresh_lock_timeout=settings.cache_refresh_lock_timeout,
+                )
+    return _cache_service
 
 
 def get_mealdb_service() -> MealDBService:
-    """Dependency to get MealDB service instance with Redis caching"""
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    return MealDBService(redis_url=redis_url)
+    """Dependency to get the shared MealDB service instance with Redis caching"""
+    global _mealdb_service
+    if _mealdb_service is None:
+        settings = get_settings()
+        cache_service = get_cache_service()
+        mirror = get_async_mealdb_mirror() if settings.mealdb_mirror_mode else None
+        with _resource_lock:
+            if _mealdb_service is None:
+                _mealdb_service = MealDBService(
+                    base_url=settings.mealdb_base_url,
+                    cache_service=cache_service,
+                    connect_timeout=settings.mealdb_connect_timeout,
+                    read_timeout=settings.mealdb_read_timeout,
+                    max_connections=settings.mealdb_max_connections,
+                    max_concurrency=settings.mealdb_max_concurrency,
+                    http2=settings.mealdb_http2,
+                    transform_cache_size=settings.mealdb_transform_cache_size,
+                    mirror=mirror,
+                )
+    return _mealdb_service
+
+
+def get_mealdb_mirror() -> MealDBMirrorRepository:
+    """Get the shared local mirror of TheMealDB catalog"""
+    global _mealdb_mirror
+    if _mealdb_mirror is None:
+        # Same database file: share the recipe repository's single writer
+        writer = get_recipe_repository().writer
+        with _resource_lock:
+            if _mealdb_mirror is None:
+                settings = get_settings()
+                _mealdb_mirror = MealDBMirrorRepository(
+                    db_path=settings.database_path,
+                    pool_timeout=settings.sqlite_pool_timeout,
+                    cached_statements=settings.sqlite_cached_statements,
+                    writer=writer,
+                )
+    return _mealdb_mirror
+
+
+def get_async_mealdb_mirror() -> ExecutorMealDBMirrorRepository:
+    """Get the shared mirror for async callers, running on the recipe repository's threads"""
+    return ExecutorMealDBMirrorRepository(get_mealdb_mirror(), get_async_recipe_repository().executor)
+
+
+def get_warmup_service() -> CacheWarmupService:
+    """Get a cache warm-up job wired to the shared resources"""
+    settings = get_settings()
+    return CacheWarmupService(
+        get_mealdb_service(),
+        get_cache_service(),
+        get_async_mealdb_mirror(),
+        concurrency=settings.mealdb_warmup_concurrency,
+        state_max_age=settings.cache_hard_ttl,
+    )
+
 
+async def get_recipe_service() -> RecipeService:
+    """Dependency to get recipe service instance
 
-def get_recipe_service(
-    repository: RecipeRepository = Depends(get_recipe_repository),
-    mealdb_service: MealDBService = Depends(get_mealdb_service)
-) -> RecipeService:
-    """Dependency to get recipe service instance"""
-    return RecipeService(repository, mealdb_service)
+    Async so FastAPI resolves it on the event loop; a sync dependency costs
+    every request a trip through the threadpool. The shared resources exist
+    from startup, so nothing here blocks.
+    """
+    settings = get_settings()
+    return RecipeService(
+        get_async_recipe_repository(),
+        get_mealdb_service(),
+        internal_timeout=settings.search_internal_timeout,
+        mealdb_timeout=settings.search_mealdb_timeout,
+        mirror=get_async_mealdb_mirror() if settings.mealdb_mirror_mode else None,
+    )
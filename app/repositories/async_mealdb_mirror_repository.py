@@ -0,0 +1,52 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Sequence, Set, TypeVar
+from app.repositories.mealdb_mirror_repository import MealDBMirrorRepository
+
+
+T = TypeVar("T")
+
+
+class ExecutorMealDBMirrorRepository:
+    """Runs a blocking ``MealDBMirrorRepository`` on a given executor, for async callers
+
+    Meant to share the recipe repository's executor (``ExecutorRecipeRepository.executor``):
+    both query the same database, and mirror searches sit on the ``/recipes/search``
+    path, so they should not queue behind Starlette's shared threadpool either.
+    Writes are queued to the mirror's ``SQLiteWriter`` and awaited on their
+    futures, holding no executor thread.
+    """
+
+    def __init__(self, mirror: MealDBMirrorRepository, executor: Executor):
+        self.mirror = mirror
+        self.executor = executor
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def upsert_recipes(self, recipes: Sequence[Dict[str, Any]]) -> int:
+        return await asyncio.wrap_future(self.mirror.submit_upsert_recipes(recipes))
+
+    async def synced_ids(self, since: float = 0.0) -> Set[str]:
+        return await self._run(self.mirror.synced_ids, since)
+
+    async def all_recipes(self) -> List[Dict[str, Any]]:
+        """Every mirrored recipe, read in one executor call"""
+        return await self._run(lambda: list(self.mirror.iter_recipes()))
+
+    async def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        return await self._run(self.mirror.search_recipes, query, limit=limit, highlight=highlight)
+
+    async def count(self) -> int:
+        return await self._run(self.mirror.count)
+
+    async def completed_tasks(self, since: float = 0.0) -> Dict[str, int]:
+        return await self._run(self.mirror.completed_tasks, since)
+
+    async def mark_task_completed(self, task: str, items: int) -> None:
+        await asyncio.wrap_future(self.mirror.submit_mark_task_completed(task, items))
+
+    async def reset_tasks(self) -> None:
+        await asyncio.wrap_future(self.mirror.submit_reset_tasks())
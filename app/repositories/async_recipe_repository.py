@@ -0,0 +1,147 @@
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, TypeVar
+from app.models.recipe import RecipeCreate, RecipeUpdate
+from app.repositories.recipe_repository import RecipeRepository
+
+
+T = TypeVar("T")
+
+
+class AsyncRecipeRepository(ABC):
+    """Recipe data operations for async callers; mirrors ``RecipeRepository``"""
+
+    @abstractmethod
+    async def get_all_recipes(self) -> List[Dict[str, Any]]:
+        """Get all recipes"""
+        pass
+
+    @abstractmethod
+    async def list_recipes(
+        self, limit: int, after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get up to ``limit`` recipes in ID order, starting after ``after_id``"""
+        pass
+
+    @abstractmethod
+    def iter_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every recipe in ID order, starting after ``after_id``, reading ``batch_size`` at a time"""
+        pass
+
+    @abstractmethod
+    async def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
+        """Get a recipe by ID"""
+        pass
+
+    @abstractmethod
+    async def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        """Search recipes by title, ingredients and cuisine (case-insensitive)"""
+        pass
+
+    @abstractmethod
+    async def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Find recipes that use any of the given ingredients, best coverage first"""
+        pass
+
+    @abstractmethod
+    async def get_version(self, recipe_id: Optional[int] = None) -> str:
+        """Opaque token that changes whenever the recipes (or one recipe) change"""
+        pass
+
+    @abstractmethod
+    async def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
+        """Create a new recipe"""
+        pass
+
+    @abstractmethod
+    async def bulk_create(self, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        """Create many recipes at once; one ``{"id": ...}`` or ``{"error": ...}`` per input"""
+        pass
+
+    @abstractmethod
+    async def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
+        """Update an existing recipe"""
+        pass
+
+    @abstractmethod
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        """Delete a recipe by ID"""
+        pass
+
+
+class ExecutorRecipeRepository(AsyncRecipeRepository):
+    """Runs a blocking ``RecipeRepository`` on its own thread pool
+
+    Each call holds a thread only while it runs a query, and the threads are
+    not shared with Starlette's default threadpool, so slow upstream calls or
+    long responses elsewhere cannot starve recipe queries (or the reverse).
+    Size the pool like the SQLite connection pool: threads beyond it would
+    only wait for a connection.
+
+    Writes to a repository with ``submit_*`` methods (one that queues writes
+    for its own writer thread) are awaited on the returned future instead,
+    so they hold no thread of this pool while queued.
+    """
+
+    def __init__(self, repository: RecipeRepository, max_workers: int = 8):
+        self.repository = repository
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recipe-repository")
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _write(self, method: str, *args: Any) -> Any:
+        submit = getattr(self.repository, f"submit_{method}", None)
+        if submit is None:
+            return await self._run(getattr(self.repository, method), *args)
+        return await asyncio.wrap_future(submit(*args))
+
+    async def get_all_recipes(self) -> List[Dict[str, Any]]:
+        return await self._run(self.repository.get_all_recipes)
+
+    async def list_recipes(
+        self, limit: int, after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self.repository.list_recipes, limit, after_id=after_id, fields=fields)
+
+    async def iter_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Keyset-paged: each batch is its own query, so no connection is held between batches"""
+        while True:
+            batch = await self.list_recipes(batch_size, after_id=after_id)
+            for recipe in batch:
+                yield recipe
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1]["id"]
+
+    async def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self.repository.get_recipe_by_id, recipe_id)
+
+    async def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        return await self._run(self.repository.search_recipes, query, limit=limit, highlight=highlight)
+
+    async def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._run(self.repository.find_by_ingredients, ingredients, limit=limit)
+
+    async def get_version(self, recipe_id: Optional[int] = None) -> str:
+        return await self._run(self.repository.get_version, recipe_id)
+
+    async def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
+        return await self._write("create_recipe", recipe_data)
+
+    async def bulk_create(self, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        return await self._write("bulk_create", recipes)
+
+    async def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
+        return await self._write("update_recipe", recipe_id, recipe_data)
+
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        return await self._write("delete_recipe", recipe_id)
+
+    def close(self) -> None:
+        """Wait for running queries, then stop the threads; the wrapped repository stays open"""
+        self.executor.shutdown(wait=True)
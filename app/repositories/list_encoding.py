@@ -0,0 +1,38 @@
+"""Compact storage encoding for the ingredients and steps columns
+
+Lists of strings are stored as one BLOB: the UTF-8 items joined by the
+ASCII unit separator (0x1F). That is a byte per item instead of JSON's
+quotes and commas, and decoding is a single ``split`` in C. Lists the
+format cannot hold (an item containing the separator, or ``[""]``, which
+would read back as ``[]``) are stored as JSON TEXT instead, as every list
+was before; the column's type tells the two apart, so rows in either
+encoding can be read at any time.
+"""
+from typing import List, Sequence, Union
+from app.core import serialization
+
+
+LIST_SEPARATOR = "\x1f"
+
+
+def encode_list(items: Sequence[str]) -> Union[bytes, str]:
+    """Column value for a list of strings: packed BLOB, or JSON TEXT if it cannot be packed"""
+    if (len(items) == 1 and items[0] == "") or any(LIST_SEPARATOR in item for item in items):
+        return serialization.dumps_str(list(items))
+    return LIST_SEPARATOR.join(items).encode()
+
+
+def decode_list(value: Union[bytes, str]) -> List[str]:
+    """List of strings from a column value in either encoding"""
+    if isinstance(value, bytes):
+        return value.decode().split(LIST_SEPARATOR) if value else []
+    return serialization.loads(value)
+
+
+def list_text_sql(column: str) -> str:
+    """SQL expression rendering a list column, in either encoding, as comma-separated text"""
+    return (
+        f"CASE WHEN typeof({column}) = 'blob' "
+        f"THEN replace(CAST({column} AS TEXT), char({ord(LIST_SEPARATOR)}), ', ') "
+        f"ELSE (SELECT group_concat(value, ', ') FROM json_each({column})) END"
+    )
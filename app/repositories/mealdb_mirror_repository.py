@@ -0,0 +1,263 @@
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+from app.core.file_lock import sqlite_init_lock
+from app.core.metrics import SQLITE_QUERY_SECONDS, timed
+from app.repositories.list_encoding import decode_list, encode_list
+from app.repositories.sqlite_fts import (
+    FTS_RANK,
+    HIGHLIGHT_CLOSE,
+    HIGHLIGHT_OPEN,
+    fts_ingredients_sql,
+    fts_match_expression,
+    fts_schema,
+    fts_triggers,
+    install_triggers,
+)
+from app.repositories.sqlite_pool import READ_ONLY_PRAGMAS, SQLiteConnectionPool, read_only_uri, require_file_database
+from app.repositories.sqlite_writer import SQLiteWriter
+
+
+_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS mealdb_recipes (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        ingredients TEXT NOT NULL,
+        steps TEXT NOT NULL,
+        prepTime TEXT NOT NULL,
+        cookTime TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        cuisine TEXT NOT NULL,
+        category TEXT,
+        synced_at REAL NOT NULL
+    )
+    ''',
+    # Completed warm-up tasks, so an interrupted crawl can resume
+    '''
+    CREATE TABLE IF NOT EXISTS mealdb_warmup_state (
+        task TEXT PRIMARY KEY,
+        items INTEGER NOT NULL,
+        completed_at REAL NOT NULL
+    )
+    ''',
+]
+
+_UPSERT_SQL = '''
+    INSERT INTO mealdb_recipes (id, title, ingredients, steps, prepTime, cookTime, difficulty, cuisine, category, synced_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        title = excluded.title,
+        ingredients = excluded.ingredients,
+        steps = excluded.steps,
+        prepTime = excluded.prepTime,
+        cookTime = excluded.cookTime,
+        difficulty = excluded.difficulty,
+        cuisine = excluded.cuisine,
+        category = COALESCE(excluded.category, mealdb_recipes.category),
+        synced_at = excluded.synced_at
+'''
+
+
+# Same full-text index as internal recipes, keyed by the mirror's rowid
+_FTS_TRIGGERS = fts_triggers("mealdb_recipes", "mealdb_recipes_fts", "rowid")
+
+_timed = timed(SQLITE_QUERY_SECONDS, repository="mealdb_mirror")
+
+_COLUMNS = "m.id, m.title, m.ingredients, m.steps, m.prepTime, m.cookTime, m.difficulty, m.cuisine"
+
+
+class MealDBMirrorRepository:
+    """Local SQLite copy of TheMealDB catalog
+
+    Filled by the cache warm-up job and kept up to date with every upstream
+    search result, so MealDB searches can be served locally. Lives in the
+    application database next to the recipes table, but holds transformed
+    MealDB recipes keyed by their MealDB id.
+
+    Split like ``SQLiteRecipeRepository``: reads use a read-only pool and
+    writes are jobs on a ``SQLiteWriter``. Pass the recipe repository's
+    ``writer`` so the database keeps a single writer per process; without
+    one, the mirror starts (and closes) its own.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "recipes.db",
+        pool_size: int = 4,
+        pool_timeout: float = 10.0,
+        cached_statements: int = 256,
+        writer: Optional[SQLiteWriter] = None,
+    ):
+        require_file_database(db_path)
+        self.db_path = db_path
+        self._owns_writer = writer is None
+        self.writer = writer or SQLiteWriter(db_path, cached_statements=cached_statements, name="mealdb_mirror")
+        with sqlite_init_lock(db_path):
+            self.writer.execute(self._create_schema, exclusive=True)
+        self.pool = SQLiteConnectionPool(
+            read_only_uri(db_path),
+            max_size=pool_size,
+            timeout=pool_timeout,
+            cached_statements=cached_statements,
+            pragmas=READ_ONLY_PRAGMAS,
+        )
+
+    def _create_schema(self, conn) -> None:
+        """Writer job creating the mirror tables and their full-text index"""
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mealdb_recipes_fts'"
+        ).fetchone()
+        if not exists:
+            conn.execute(fts_schema("mealdb_recipes_fts"))
+            conn.execute(
+                "INSERT INTO mealdb_recipes_fts (mealdb_recipes_fts, rank) VALUES ('rank', ?)", (FTS_RANK,)
+            )
+            # Index rows mirrored before the index existed
+            conn.execute(f'''
+                INSERT INTO mealdb_recipes_fts (rowid, title, ingredients, cuisine)
+                SELECT rowid, title, {fts_ingredients_sql("ingredients")}, cuisine FROM mealdb_recipes
+            ''')
+        install_triggers(conn, _FTS_TRIGGERS)
+
+    def close(self, timeout: float = 0.0) -> bool:
+        """Close pooled connections, waiting up to ``timeout`` seconds for those in use
+
+        A writer of its own applies its queued writes first; a shared one is
+        left to its owner.
+        """
+        written = self.writer.close(timeout if timeout > 0 else None) if self._owns_writer else True
+        return self.pool.close(timeout) and written
+
+    def _dict_from_row(self, row) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "title": row[1],
+            "ingredients": decode_list(row[2]),
+            "steps": decode_list(row[3]),
+            "prepTime": row[4],
+            "cookTime": row[5],
+            "difficulty": row[6],
+            "cuisine": row[7],
+            "source": "mealdb",
+        }
+
+    def upsert_recipes(self, recipes: Sequence[Dict[str, Any]]) -> int:
+        """Insert or refresh transformed MealDB recipes in one transaction
+
+        Recipes may carry a ``category``; an unknown (None) category keeps
+        the one already stored.
+        """
+        return self.submit_upsert_recipes(recipes).result()
+
+    def submit_upsert_recipes(self, recipes: Sequence[Dict[str, Any]]) -> Future:
+        """Queue an upsert; the future resolves to the number of recipes written"""
+        synced_at = time.time()
+        rows = [
+            (
+                str(recipe["id"]),
+                recipe["title"],
+                encode_list(recipe["ingredients"]),
+                encode_list(recipe["steps"]),
+                recipe["prepTime"],
+                recipe["cookTime"],
+                recipe["difficulty"],
+                recipe["cuisine"],
+                recipe.get("category"),
+                synced_at,
+            )
+            for recipe in recipes
+        ]
+        return self.writer.submit(self._upsert, rows)
+
+    @timed(SQLITE_QUERY_SECONDS, repository="mealdb_mirror", method="upsert_recipes")
+    def _upsert(self, conn, rows: Sequence[tuple]) -> int:
+        conn.executemany(_UPSERT_SQL, rows)
+        return len(rows)
+
+    @_timed
+    def synced_ids(self, since: float = 0.0) -> Set[str]:
+        """IDs of the recipes synced at or after ``since`` (Unix time)"""
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT id FROM mealdb_recipes WHERE synced_at >= ?", (since,)).fetchall()
+        return {row[0] for row in rows}
+
+    def iter_recipes(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Iterate over every mirrored recipe"""
+        with self.pool.connection() as conn:
+            cursor = conn.execute(f"SELECT {_COLUMNS} FROM mealdb_recipes m ORDER BY m.id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._dict_from_row(row)
+
+    @_timed
+    def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        """Full-text search over mirrored recipes, best matches first
+
+        Same matching, ranking and highlighting as internal recipe search.
+        """
+        match = fts_match_expression(query)
+        if match is None:
+            return []
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT {_COLUMNS},
+                       highlight(mealdb_recipes_fts, 0, ?, ?),
+                       snippet(mealdb_recipes_fts, 1, ?, ?, '…', 12)
+                FROM mealdb_recipes_fts
+                JOIN mealdb_recipes m ON m.rowid = mealdb_recipes_fts.rowid
+                WHERE mealdb_recipes_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ''', (HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, match, limit)).fetchall()
+
+        results = []
+        for row in rows:
+            recipe = self._dict_from_row(row)
+            if highlight:
+                recipe["highlight"] = {"title": row[8], "ingredients": row[9]}
+            results.append(recipe)
+        return results
+
+    @_timed
+    def count(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM mealdb_recipes").fetchone()[0]
+
+    @_timed
+    def completed_tasks(self, since: float = 0.0) -> Dict[str, int]:
+        """Warm-up tasks completed at or after ``since``, with their item counts"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT task, items FROM mealdb_warmup_state WHERE completed_at >= ?", (since,)
+            ).fetchall()
+        return dict(rows)
+
+    def mark_task_completed(self, task: str, items: int) -> None:
+        self.submit_mark_task_completed(task, items).result()
+
+    def submit_mark_task_completed(self, task: str, items: int) -> Future:
+        return self.writer.submit(self._mark_task_completed, task, items, time.time())
+
+    @timed(SQLITE_QUERY_SECONDS, repository="mealdb_mirror", method="mark_task_completed")
+    def _mark_task_completed(self, conn, task: str, items: int, completed_at: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO mealdb_warmup_state (task, items, completed_at) VALUES (?, ?, ?)",
+            (task, items, completed_at),
+        )
+
+    def reset_tasks(self) -> None:
+        """Forget completed warm-up tasks, so the next run crawls everything"""
+        self.submit_reset_tasks().result()
+
+    def submit_reset_tasks(self) -> Future:
+        return self.writer.submit(self._reset_tasks)
+
+    def _reset_tasks(self, conn) -> None:
+        conn.execute("DELETE FROM mealdb_warmup_state")
@@ -1,8 +1,23 @@
+import re
+import secrets
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Sequence
+from app.core.ingredients import canonical_ingredients, ingredient_keys, ingredient_query_terms
 from app.models.recipe import RecipeCreate, RecipeUpdate
 
 
+# Fields a recipe listing can be projected to; "id" is always included
+RECIPE_FIELDS = ("id", "title", "ingredients", "steps", "prepTime", "cookTime", "difficulty", "cuisine")
+
+
+_SEARCH_TERM_RE = re.compile(r"\w+")
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a search query into lower-cased word terms"""
+    return _SEARCH_TERM_RE.findall(query.lower())
+
+
 class RecipeRepository(ABC):
     """Abstract base class for recipe data operations"""
     
@@ -11,21 +26,77 @@ class RecipeRepository(ABC):
         """Get all recipes"""
         pass
     
+    @abstractmethod
+    def list_recipes(
+        self, limit: int, after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get up to ``limit`` recipes in ID order, starting after ``after_id``
+
+        With ``fields``, each recipe only carries those fields (plus ``id``),
+        and unrequested fields are not loaded or decoded.
+        """
+        pass
+    
+    @abstractmethod
+    def iter_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield every recipe in ID order, starting after ``after_id``
+
+        Recipes are read ``batch_size`` at a time, so memory use does not
+        grow with the size of the catalog.
+        """
+        pass
+    
     @abstractmethod
     def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
         """Get a recipe by ID"""
         pass
     
     @abstractmethod
-    def search_recipes(self, query: str) -> List[Dict[str, Any]]:
-        """Search recipes by title (case-insensitive)"""
+    def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        """Search recipes by title, ingredients and cuisine (case-insensitive)
+
+        Every query term must match the start of a word in one of those
+        fields. With ``highlight``, each result gets a ``highlight`` dict of
+        the title and ingredients with matches wrapped in ``<mark>`` tags.
+        """
+        pass
+    
+    @abstractmethod
+    def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Find recipes that use any of the given ingredients
+
+        Ingredients are compared by canonical name (no measures, case or
+        notes), matching the start of any word ("tomato" finds "chopped
+        tomatoes"). Results are ranked by the share of the recipe's
+        ingredients covered, and each gets a ``match`` dict with ``matched``,
+        ``total`` and ``coverage``.
+        """
         pass
     
+    @abstractmethod
+    def get_version(self, recipe_id: Optional[int] = None) -> str:
+        """Opaque token that changes whenever the recipes change
+
+        With ``recipe_id``, the token covers that one recipe only (missing
+        recipes have one too). Meant for HTTP validators, so it is cheap and
+        never reads recipe rows.
+        """
+        pass
+
     @abstractmethod
     def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
         """Create a new recipe"""
         pass
     
+    @abstractmethod
+    def bulk_create(self, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        """Create many recipes at once
+
+        Returns one result per input recipe, in order: ``{"id": ...}`` for a
+        created recipe or ``{"error": ...}`` for one that could not be stored.
+        """
+        pass
+    
     @abstractmethod
     def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
         """Update an existing recipe"""
@@ -75,11 +146,37 @@ class InMemoryRecipeRepository(RecipeRepository):
             },
         ]
         self.next_id = 4  # Tracks the next available recipe ID
+        # Change counters for get_version; the epoch tells instances apart
+        self._epoch = secrets.randbits(48)
+        self._version = 0
+        self._recipe_versions: Dict[int, int] = {}
 
     def get_all_recipes(self) -> List[Dict[str, Any]]:
         """Get all recipes"""
         return self.recipes
 
+    def list_recipes(
+        self, limit: int, after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get up to ``limit`` recipes in ID order, starting after ``after_id``"""
+        recipes = sorted(
+            (recipe for recipe in self.recipes if after_id is None or recipe["id"] > after_id),
+            key=lambda recipe: recipe["id"]
+        )[:limit]
+        if fields is None:
+            return recipes
+        unknown = set(fields) - set(RECIPE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown recipe fields: {', '.join(sorted(unknown))}")
+        selected = ["id", *(field for field in RECIPE_FIELDS if field in fields and field != "id")]
+        return [{field: recipe[field] for field in selected} for recipe in recipes]
+
+    def iter_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield every recipe in ID order, starting after ``after_id``"""
+        for recipe in sorted(self.recipes, key=lambda recipe: recipe["id"]):
+            if after_id is None or recipe["id"] > after_id:
+                yield recipe
+
     def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
         """Get a recipe by ID"""
         for recipe in self.recipes:
@@ -87,13 +184,65 @@ class InMemoryRecipeRepository(RecipeRepository):
                 return recipe
         return None
 
-    def search_recipes(self, query: str) -> List[Dict[str, Any]]:
-        """Search recipes by title (case-insensitive)"""
-        if not query.strip():
+    def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        """Search recipes by title, ingredients and cuisine (case-insensitive)"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        
+        results = []
+        for recipe in self.recipes:
+            words = search_terms(" ".join([recipe["title"], *recipe["ingredients"], recipe["cuisine"]]))
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                if highlight:
+                    recipe = dict(recipe)
+                    recipe["highlight"] = {
+                        "title": self._highlight(recipe["title"], terms),
+                        "ingredients": self._highlight(", ".join(recipe["ingredients"]), terms),
+                    }
+                results.append(recipe)
+                if len(results) >= limit:
+                    break
+        return results
+    
+    def _highlight(self, text: str, terms: List[str]) -> str:
+        """Wrap words starting with any of the terms in <mark> tags"""
+        def mark(match: re.Match) -> str:
+            word = match.group(0)
+            if any(word.lower().startswith(term) for term in terms):
+                return f"<mark>{word}</mark>"
+            return word
+        return _SEARCH_TERM_RE.sub(mark, text)
+
+    def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Find recipes that use any of the given ingredients, best coverage first"""
+        terms = ingredient_query_terms(ingredients)
+        if not terms:
             return []
         
-        query_lower = query.lower()
-        return [recipe for recipe in self.recipes if query_lower in recipe["title"].lower()]
+        scored = []
+        for recipe in self.recipes:
+            names = canonical_ingredients(recipe["ingredients"])
+            matched = sum(
+                1 for name in names
+                if any(key.startswith(term) for key in ingredient_keys(name) for term in terms)
+            )
+            if matched:
+                scored.append((matched, len(names), recipe))
+        scored.sort(key=lambda item: (-item[0] / item[1], -item[0], item[2]["id"]))
+        
+        return [
+            {**recipe, "match": {"matched": matched, "total": total, "coverage": round(matched / total, 4)}}
+            for matched, total, recipe in scored[:limit]
+        ]
+    
+    def get_version(self, recipe_id: Optional[int] = None) -> str:
+        version = self._version if recipe_id is None else self._recipe_versions.get(recipe_id, 0)
+        return f"{self._epoch:x}-{version}"
+
+    def _bump_version(self, recipe_id: int) -> None:
+        self._version += 1
+        self._recipe_versions[recipe_id] = self._recipe_versions.get(recipe_id, 0) + 1
 
     def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
         """Create a new recipe"""
@@ -101,8 +250,13 @@ class InMemoryRecipeRepository(RecipeRepository):
         recipe_dict["id"] = self.next_id
         self.next_id += 1
         self.recipes.append(recipe_dict)
+        self._bump_version(recipe_dict["id"])
         return recipe_dict
 
+    def bulk_create(self, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        """Create many recipes at once"""
+        return [{"id": self.create_recipe(recipe)["id"]} for recipe in recipes]
+
     def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
         """Update an existing recipe"""
         for idx, recipe in enumerate(self.recipes):
@@ -110,6 +264,7 @@ class InMemoryRecipeRepository(RecipeRepository):
                 updated_recipe = recipe_data.model_dump()
                 updated_recipe["id"] = recipe_id  # keep same ID
                 self.recipes[idx] = updated_recipe
+                self._bump_version(recipe_id)
                 return updated_recipe
         return None
 
@@ -118,5 +273,6 @@ class InMemoryRecipeRepository(RecipeRepository):
         for idx, recipe in enumerate(self.recipes):
             if recipe["id"] == recipe_id:
                 self.recipes.pop(idx)
+                self._bump_version(recipe_id)
                 return True
         return False
@@ -0,0 +1,88 @@
+import re
+from typing import List, Optional
+from app.repositories.list_encoding import list_text_sql
+from app.repositories.recipe_repository import search_terms
+
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+# Title matches weigh most, then ingredients, then cuisine
+FTS_RANK = "bm25(10.0, 3.0, 1.0)"
+
+
+def fts_schema(fts_table: str) -> str:
+    """FTS5 index over title, ingredients and cuisine
+
+    The index keeps its own copy of the indexed text so snippets can be built
+    from the ingredient list rendered as plain text rather than as a JSON
+    array.
+    """
+    return f'''
+        CREATE VIRTUAL TABLE {fts_table} USING fts5(
+            title, ingredients, cuisine,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    '''
+
+
+def fts_ingredients_sql(column: str) -> str:
+    """SQL expression rendering a stored ingredient list as comma-separated text"""
+    return f"({list_text_sql(column)})"
+
+
+def fts_triggers(table: str, fts_table: str, key: str) -> List[str]:
+    """Triggers keeping ``fts_table`` in sync with ``table``, keyed by its ``key`` column"""
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, title, ingredients, cuisine)
+            VALUES (new.{key}, new.title, {fts_ingredients_sql("new.ingredients")}, new.cuisine);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF title, ingredients, cuisine ON {table} BEGIN
+            DELETE FROM {fts_table} WHERE rowid = old.{key};
+            INSERT INTO {fts_table} (rowid, title, ingredients, cuisine)
+            VALUES (new.{key}, new.title, {fts_ingredients_sql("new.ingredients")}, new.cuisine);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {fts_table} WHERE rowid = old.{key};
+        END
+        ''',
+    ]
+
+
+_TRIGGER_NAME_RE = re.compile(r"CREATE TRIGGER IF NOT EXISTS (\w+)")
+
+
+def _normalize_sql(sql: str) -> str:
+    return " ".join(sql.replace("IF NOT EXISTS ", "").split())
+
+
+def install_triggers(conn, triggers: List[str]) -> None:
+    """Create triggers, replacing any stored with a different definition
+
+    Lets a changed trigger (say, for a new column encoding) reach existing
+    databases. Runs in one transaction, so writers never see a table
+    without its triggers.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    for sql in triggers:
+        name = _TRIGGER_NAME_RE.search(sql).group(1)
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)).fetchone()
+        if row is not None and _normalize_sql(row[0]) != _normalize_sql(sql):
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute(sql)
+    conn.commit()
+
+
+def fts_match_expression(query: str) -> Optional[str]:
+    """Build an FTS5 MATCH expression requiring every term, each as a prefix"""
+    terms = search_terms(query)
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
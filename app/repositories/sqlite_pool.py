@@ -0,0 +1,183 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+# Pragmas applied to every pooled connection. WAL lets readers proceed while a
+# writer is active; synchronous=NORMAL is durable under WAL without an fsync
+# per commit.
+DEFAULT_PRAGMAS: Dict[str, str] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",      # ~16MB page cache per connection
+    "mmap_size": "134217728",    # 128MB memory-mapped I/O
+    "busy_timeout": "5000",      # milliseconds
+}
+
+# Pragmas for connections that only read: the journal mode is the writer's
+# to set, and query_only makes an accidental write fail instead of taking the
+# write lock.
+READ_ONLY_PRAGMAS: Dict[str, str] = {
+    "query_only": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",
+    "mmap_size": "134217728",
+    "busy_timeout": "5000",
+}
+
+
+def require_file_database(db_path: str) -> None:
+    """Raise ValueError for an in-memory database
+
+    Reads and writes go through separate connections (a read-only pool and
+    a ``SQLiteWriter``), and each connection to ``:memory:`` opens its own
+    empty database, so only database files are supported.
+    """
+    if db_path in ("", ":memory:") or (db_path.startswith("file:") and "mode=memory" in db_path):
+        raise ValueError(f"In-memory SQLite databases are not supported ({db_path!r}); use a database file")
+
+
+def read_only_uri(db_path: str) -> str:
+    """``file:`` URI opening ``db_path`` read-only"""
+    if db_path.startswith("file:"):
+        return f"{db_path}{'&' if '?' in db_path else '?'}mode=ro"
+    return f"{Path(db_path).resolve().as_uri()}?mode=ro"
+
+
+class SQLiteConnectionPool:
+    """Bounded, thread-safe pool of long-lived SQLite connections
+
+    Connections are opened lazily up to ``max_size`` and reused across
+    requests, so each one keeps its prepared statement cache warm.
+    ``db_path`` may be a ``file:`` URI, e.g. with ``mode=ro``.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        timeout: float = 10.0,
+        cached_statements: int = 256,
+        pragmas: Optional[Dict[str, str]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._size = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            uri=self.db_path.startswith("file:"),
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for one to be released"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._size < self.max_size
+            if can_open:
+                self._size += 1
+
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Timed out after {self.timeout}s waiting for a SQLite connection "
+                f"(pool size {self.max_size})"
+            )
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, or close it if the pool is closed"""
+        # Under the lock, so a release racing ``close`` cannot park a
+        # connection in the idle queue after it was drained
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            conn.close()
+            self._size -= 1
+            self._released.notify_all()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a ``with`` block
+
+        Like ``with sqlite3.connect(...)``, a pending transaction is committed
+        when the block succeeds and rolled back when it raises.
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """Get pool occupancy figures"""
+        with self._lock:
+            size = self._size
+        idle = self._idle.qsize()
+        return {
+            "max_size": self.max_size,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+        }
+
+    def close(self, timeout: float = 0.0) -> bool:
+        """Close idle connections; connections in use are closed on release
+
+        With ``timeout``, waits up to that many seconds for connections in
+        use to be released (drained). Returns whether every connection is
+        closed.
+        """
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._size -= 1
+            return self._released.wait_for(lambda: self._size == 0, timeout=timeout)
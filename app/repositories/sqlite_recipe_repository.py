@@ -1,41 +1,359 @@
+import secrets
 import sqlite3
-import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future
+from typing import List, Dict, Any, Iterator, Optional, Sequence
+from app.core.file_lock import sqlite_init_lock
+from app.core.ingredients import canonical_ingredients, ingredient_keys, ingredient_query_terms
+from app.core.metrics import SQLITE_QUERY_SECONDS, timed
 from app.models.recipe import RecipeCreate, RecipeUpdate
-from app.repositories.recipe_repository import RecipeRepository
+from app.repositories.list_encoding import decode_list, encode_list
+from app.repositories.recipe_repository import RecipeRepository, RECIPE_FIELDS
+from app.repositories.sqlite_fts import (
+    FTS_RANK,
+    HIGHLIGHT_CLOSE,
+    HIGHLIGHT_OPEN,
+    fts_ingredients_sql,
+    fts_match_expression,
+    fts_schema,
+    fts_triggers,
+    install_triggers,
+)
+from app.repositories.sqlite_pool import READ_ONLY_PRAGMAS, SQLiteConnectionPool, read_only_uri, require_file_database
+from app.repositories.sqlite_writer import SQLiteWriter
+
+
+_INSERT_SQL = '''
+    INSERT INTO recipes (title, ingredients, steps, prepTime, cookTime, difficulty, cuisine)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_FTS_SCHEMA = fts_schema("recipes_fts")
+_FTS_TRIGGERS = fts_triggers("recipes", "recipes_fts", "id")
+
+_timed = timed(SQLITE_QUERY_SECONDS, repository="recipes")
+
+
+# Canonical ingredient names per recipe (lower-cased, measures stripped), kept
+# in sync by the repository's write methods. Each ingredient (``position``) is
+# stored under every key from ``ingredient_keys``; the primary key doubles as
+# the prefix-lookup index for ingredient searches.
+_INGREDIENTS_SCHEMA = [
+    '''
+    CREATE TABLE recipe_ingredients (
+        name TEXT NOT NULL,
+        recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (name, recipe_id, position)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX idx_recipe_ingredients_recipe ON recipe_ingredients (recipe_id)",
+]
+
+
+# Change counters behind HTTP validators: one row for the whole table
+# ("recipes"), one per recipe ("recipe:<id>"), and a random "epoch" picked when
+# the table is created, so a recreated database never repeats a token. Kept by
+# triggers, so every write path (in every process) bumps them.
+_VERSIONS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID
+'''
+
+_VERSION_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_version_insert AFTER INSERT ON recipes BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'recipes';
+        INSERT INTO data_versions (name, version) VALUES ('recipe:' || new.id, 1)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_version_update AFTER UPDATE ON recipes BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'recipes';
+        INSERT INTO data_versions (name, version) VALUES ('recipe:' || new.id, 1)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS recipes_version_delete AFTER DELETE ON recipes BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'recipes';
+        UPDATE data_versions SET version = version + 1 WHERE name = 'recipe:' || old.id;
+    END
+    ''',
+]
 
 
 class SQLiteRecipeRepository(RecipeRepository):
-    """SQLite implementation of recipe repository"""
+    """SQLite implementation of recipe repository
+
+    Meant to be created once per process: the constructor starts the writer,
+    runs schema creation and seeding, and opens the read pool; ``close``
+    releases both.
+
+    Reads and writes are split. Reads use a pool of read-only connections
+    (``mode=ro``, ``query_only``), which under WAL never wait for a writer.
+    Writes are jobs on a ``SQLiteWriter``: one thread and connection apply
+    them in order, group-committing whatever queued up meanwhile, so a bulk
+    load neither holds reader connections nor lets a burst of small writes
+    contend for the lock. ``write_batch`` and ``write_linger`` set the
+    writer's batch size cap and latency budget (see ``SQLiteWriter``). The
+    ``submit_*`` methods queue a write and return its future without
+    waiting; each future resolves to that write's own result.
+    """
     
-    def __init__(self, db_path: str = "recipes.db"):
+    def __init__(
+        self,
+        db_path: str = "recipes.db",
+        pool_size: int = 8,
+        pool_timeout: float = 10.0,
+        cached_statements: int = 256,
+        write_batch: int = 64,
+        write_linger: float = 0.0,
+    ):
+        require_file_database(db_path)
         self.db_path = db_path
-        self._init_database()
+        self.writer = SQLiteWriter(
+            db_path,
+            max_batch=write_batch,
+            linger=write_linger,
+            cached_statements=cached_statements,
+            name="recipes",
+        )
+        # Workers starting together must not each create the schema or seed
+        with sqlite_init_lock(db_path):
+            self._init_database()
+        self.pool = SQLiteConnectionPool(
+            read_only_uri(db_path),
+            max_size=pool_size,
+            timeout=pool_timeout,
+            cached_statements=cached_statements,
+            pragmas=READ_ONLY_PRAGMAS,
+        )
+    
+    def close(self, timeout: float = 0.0) -> bool:
+        """Apply queued writes and close all connections, waiting up to ``timeout`` seconds for reads in use"""
+        written = self.writer.close(timeout if timeout > 0 else None)
+        return self.pool.close(timeout) and written
     
     def _init_database(self):
         """Initialize the database with the recipes table"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    ingredients TEXT NOT NULL,
-                    steps TEXT NOT NULL,
-                    prepTime TEXT NOT NULL,
-                    cookTime TEXT NOT NULL,
-                    difficulty TEXT NOT NULL,
-                    cuisine TEXT NOT NULL
-                )
-            ''')
-            conn.commit()
+        fts_created, ingredients_created = self.writer.execute(self._create_schema, exclusive=True)
+        
+        # Index rows that predate the indexes
+        if fts_created:
+            self.rebuild_search_index()
+        if ingredients_created:
+            self.rebuild_ingredient_index()
+    
+    def _create_schema(self, conn) -> tuple:
+        """Writer job creating missing tables and seeding; returns which indexes need building"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS recipes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                ingredients TEXT NOT NULL,
+                steps TEXT NOT NULL,
+                prepTime TEXT NOT NULL,
+                cookTime TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                cuisine TEXT NOT NULL
+            )
+        ''')
+        
+        # Full-text index, kept in sync with the recipes table by triggers
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes_fts'")
+        fts_created = cursor.fetchone() is None
+        if fts_created:
+            cursor.execute(_FTS_SCHEMA)
+            cursor.execute(
+                "INSERT INTO recipes_fts (recipes_fts, rank) VALUES ('rank', ?)", (FTS_RANK,)
+            )
+        
+        # Normalized ingredient index
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_ingredients'")
+        ingredients_created = cursor.fetchone() is None
+        if ingredients_created:
+            for statement in _INGREDIENTS_SCHEMA:
+                cursor.execute(statement)
+        
+        cursor.execute(_VERSIONS_SCHEMA)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, ?)",
+            [("epoch", secrets.randbits(48)), ("recipes", 0)],
+        )
+        conn.commit()
+        install_triggers(conn, _FTS_TRIGGERS + _VERSION_TRIGGERS)
+        
+        # Check if we need to seed initial data
+        cursor.execute("SELECT COUNT(*) FROM recipes")
+        if cursor.fetchone()[0] == 0:
+            self._seed_initial_data(conn)
+            fts_created = False  # seeded rows were indexed by the insert trigger
+            ingredients_created = True
+        return fts_created, ingredients_created
+    
+    def rebuild_ingredient_index(self, batch_size: int = 1000, progress=None) -> int:
+        """Rebuild the normalized ingredient index from the recipes table
+
+        Like ``rebuild_search_index``, works in short per-batch transactions
+        in id order so the API keeps serving. Returns the number of recipes
+        indexed.
+        """
+        last_id = 0
+        indexed = 0
+        while True:
+            batch_last_id, batch_count = self.writer.execute(self._reindex_ingredients_batch, last_id, batch_size)
+            if not batch_count:
+                break
+            last_id = batch_last_id
+            indexed += batch_count
+            if progress is not None:
+                progress(indexed)
+        return indexed
+    
+    def _reindex_ingredients_batch(self, conn, last_id: int, batch_size: int) -> tuple:
+        """Writer job re-indexing the ingredients of the next batch after ``last_id``; returns (last id, count)"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, ingredients FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            # Drop entries for rows deleted past the last batch
+            cursor.execute("DELETE FROM recipe_ingredients WHERE recipe_id > ?", (last_id,))
+            return last_id, 0
+        
+        batch_last_id = rows[-1][0]
+        cursor.execute(
+            "DELETE FROM recipe_ingredients WHERE recipe_id > ? AND recipe_id <= ?",
+            (last_id, batch_last_id)
+        )
+        self._insert_ingredient_rows(
+            conn, [(recipe_id, decode_list(ingredients)) for recipe_id, ingredients in rows]
+        )
+        return batch_last_id, len(rows)
+    
+    def migrate_list_encoding(self, batch_size: int = 1000, progress=None) -> int:
+        """Re-encode ingredient and step columns still stored as JSON text in the packed format
+
+        Online, like the index rebuilds: one short transaction per batch in
+        id order, while reads accept both encodings. A row rewritten since
+        its batch was read is skipped; its writer stored the packed format
+        already. ``progress`` gets the number of rows migrated so far.
+        Returns the total.
+        """
+        last_id = 0
+        migrated = 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, ingredients, steps FROM recipes "
+                    "WHERE id > ? AND (typeof(ingredients) = 'text' OR typeof(steps) = 'text') "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for recipe_id, ingredients, steps in rows:
+                packed = (encode_list(decode_list(ingredients)), encode_list(decode_list(steps)))
+                if packed != (ingredients, steps):  # lists that cannot be packed stay as they are
+                    updates.append((*packed, recipe_id, ingredients, steps))
+            migrated += self.writer.execute(self._rewrite_lists, updates)
             
-            # Check if we need to seed initial data
-            cursor.execute("SELECT COUNT(*) FROM recipes")
-            if cursor.fetchone()[0] == 0:
-                self._seed_initial_data()
+            last_id = rows[-1][0]
+            if progress is not None:
+                progress(migrated)
+        return migrated
+    
+    def _rewrite_lists(self, conn, updates: Sequence[tuple]) -> int:
+        """Writer job storing re-encoded lists, each only if the row still holds what was read"""
+        cursor = conn.executemany(
+            "UPDATE recipes SET ingredients = ?, steps = ? WHERE id = ? AND ingredients = ? AND steps = ?",
+            updates
+        )
+        return max(cursor.rowcount, 0)
+    
+    def storage_stats(self) -> Dict[str, Any]:
+        """Rows and bytes of the ingredient and step columns, by encoding (packed or json)"""
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT CASE WHEN typeof(ingredients) = 'blob' AND typeof(steps) = 'blob' THEN 'packed' ELSE 'json' END,
+                       COUNT(*),
+                       SUM(length(CAST(ingredients AS BLOB)) + length(CAST(steps AS BLOB)))
+                FROM recipes GROUP BY 1
+            ''').fetchall()
+        stats = {encoding: {"rows": 0, "bytes": 0} for encoding in ("packed", "json")}
+        for encoding, count, size in rows:
+            stats[encoding] = {"rows": count, "bytes": size or 0}
+        return stats
+    
+    def _insert_ingredient_rows(self, conn, recipes: Sequence[tuple]) -> None:
+        """Index the ingredients of (recipe_id, ingredient list) pairs"""
+        conn.executemany(
+            "INSERT OR IGNORE INTO recipe_ingredients (name, recipe_id, position) VALUES (?, ?, ?)",
+            [
+                (key, recipe_id, position)
+                for recipe_id, ingredients in recipes
+                for position, name in enumerate(canonical_ingredients(ingredients))
+                for key in ingredient_keys(name)
+            ]
+        )
     
-    def _seed_initial_data(self):
+    def rebuild_search_index(self, batch_size: int = 1000, progress=None) -> int:
+        """Rebuild the full-text index from the recipes table
+
+        Works through the table in id order, one short transaction per batch,
+        so searches and writes keep running while it does. Each batch is
+        replaced atomically, which means a concurrent search sees either the
+        old or the new index entries for a row, never neither. ``progress``
+        is called with the number of rows indexed so far after every batch.
+        Returns the total number of rows indexed.
+        """
+        last_id = 0
+        indexed = 0
+        while True:
+            batch_last_id, batch_count = self.writer.execute(self._reindex_search_batch, last_id, batch_size)
+            if not batch_count:
+                break
+            last_id = batch_last_id
+            indexed += batch_count
+            if progress is not None:
+                progress(indexed)
+        
+        self.writer.execute(lambda conn: conn.execute("INSERT INTO recipes_fts (recipes_fts) VALUES ('optimize')"))
+        return indexed
+    
+    def _reindex_search_batch(self, conn, last_id: int, batch_size: int) -> tuple:
+        """Writer job re-indexing the next batch of rows after ``last_id``; returns (last id, count)"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT MAX(id), COUNT(*) FROM "
+            "(SELECT id FROM recipes WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size)
+        )
+        batch_last_id, batch_count = cursor.fetchone()
+        if not batch_count:
+            # Drop index entries for rows deleted past the last batch
+            cursor.execute("DELETE FROM recipes_fts WHERE rowid > ?", (last_id,))
+            return last_id, 0
+        
+        cursor.execute(
+            "DELETE FROM recipes_fts WHERE rowid > ? AND rowid <= ?",
+            (last_id, batch_last_id)
+        )
+        cursor.execute(f'''
+            INSERT INTO recipes_fts (rowid, title, ingredients, cuisine)
+            SELECT id, title, {fts_ingredients_sql("ingredients")}, cuisine
+            FROM recipes WHERE id > ? AND id <= ?
+        ''', (last_id, batch_last_id))
+        return batch_last_id, batch_count
+    
+    def _seed_initial_data(self, conn):
         """Seed the database with initial recipe data"""
         initial_recipes = [
             {
@@ -67,125 +385,290 @@ class SQLiteRecipeRepository(RecipeRepository):
             },
         ]
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            for recipe in initial_recipes:
-                cursor.execute('''
-                    INSERT INTO recipes (title, ingredients, steps, prepTime, cookTime, difficulty, cuisine)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    recipe["title"],
-                    json.dumps(recipe["ingredients"]),
-                    json.dumps(recipe["steps"]),
-                    recipe["prepTime"],
-                    recipe["cookTime"],
-                    recipe["difficulty"],
-                    recipe["cuisine"]
-                ))
-            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(_INSERT_SQL, [self._recipe_values(recipe) for recipe in initial_recipes])
+        conn.commit()
+    
+    def _recipe_values(self, recipe_dict: Dict[str, Any]) -> tuple:
+        """Convert a recipe dict to column values in table order (without the ID)"""
+        return (
+            recipe_dict["title"],
+            encode_list(recipe_dict["ingredients"]),
+            encode_list(recipe_dict["steps"]),
+            recipe_dict["prepTime"],
+            recipe_dict["cookTime"],
+            recipe_dict["difficulty"],
+            recipe_dict["cuisine"]
+        )
     
     def _dict_from_row(self, row: tuple) -> Dict[str, Any]:
         """Convert a database row to a dictionary"""
         return {
             "id": row[0],
             "title": row[1],
-            "ingredients": json.loads(row[2]),
-            "steps": json.loads(row[3]),
+            "ingredients": decode_list(row[2]),
+            "steps": decode_list(row[3]),
             "prepTime": row[4],
             "cookTime": row[5],
             "difficulty": row[6],
             "cuisine": row[7]
         }
     
+    @_timed
     def get_all_recipes(self) -> List[Dict[str, Any]]:
         """Get all recipes"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM recipes ORDER BY id")
             rows = cursor.fetchall()
             return [self._dict_from_row(row) for row in rows]
     
+    @_timed
+    def list_recipes(
+        self, limit: int, after_id: Optional[int] = None, fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get up to ``limit`` recipes in ID order, starting after ``after_id``
+
+        Uses the primary key for keyset pagination, so every page costs the
+        same regardless of how deep into the table it is.
+        """
+        if fields is None:
+            columns = list(RECIPE_FIELDS)
+        else:
+            unknown = set(fields) - set(RECIPE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown recipe fields: {', '.join(sorted(unknown))}")
+            columns = ["id", *(field for field in RECIPE_FIELDS if field in fields and field != "id")]
+        
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id or 0, limit)
+            )
+            rows = cursor.fetchall()
+        
+        if fields is None:
+            return [self._dict_from_row(row) for row in rows]
+        
+        recipes = []
+        for row in rows:
+            recipe = dict(zip(columns, row))
+            for field in ("ingredients", "steps"):
+                if field in recipe:
+                    recipe[field] = decode_list(recipe[field])
+            recipes.append(recipe)
+        return recipes
+    
+    def iter_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield every recipe in ID order, starting after ``after_id``
+
+        Pages through ``list_recipes`` by ID, one query per batch, so only one
+        batch of rows is in memory at a time and no pooled connection is held
+        between batches.
+        """
+        while True:
+            batch = self.list_recipes(batch_size, after_id=after_id)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1]["id"]
+    
+    @_timed
     def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
         """Get a recipe by ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM recipes WHERE id = ?", (recipe_id,))
             row = cursor.fetchone()
             return self._dict_from_row(row) if row else None
     
-    def search_recipes(self, query: str) -> List[Dict[str, Any]]:
-        """Search recipes by title (case-insensitive)"""
-        if not query.strip():
+    @_timed
+    def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> List[Dict[str, Any]]:
+        """Full-text search over title, ingredients and cuisine, best matches first"""
+        match = fts_match_expression(query)
+        if match is None:
             return []
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM recipes WHERE LOWER(title) LIKE LOWER(?) ORDER BY id",
-                (f"%{query}%",)
-            )
+            cursor.execute('''
+                SELECT r.*,
+                       highlight(recipes_fts, 0, ?, ?),
+                       snippet(recipes_fts, 1, ?, ?, '…', 12)
+                FROM recipes_fts
+                JOIN recipes r ON r.id = recipes_fts.rowid
+                WHERE recipes_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ''', (HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, match, limit))
             rows = cursor.fetchall()
-            return [self._dict_from_row(row) for row in rows]
+        
+        results = []
+        for row in rows:
+            recipe = self._dict_from_row(row)
+            if highlight:
+                recipe["highlight"] = {"title": row[8], "ingredients": row[9]}
+            results.append(recipe)
+        return results
     
+    @_timed
+    def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Recipes using any of the given ingredients, ranked by ingredient coverage"""
+        terms = ingredient_query_terms(ingredients)
+        if not terms:
+            return []
+        
+        # Each term is a prefix range scan on the (name, ...) primary key
+        values = ", ".join("(?, ?)" for _ in terms)
+        params = [value for term in terms for value in (term, term + "\U0010ffff")]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH terms(term, term_end) AS (VALUES {values}),
+                matches AS (
+                    SELECT ri.recipe_id, COUNT(DISTINCT ri.position) AS matched
+                    FROM terms
+                    JOIN recipe_ingredients ri ON ri.name >= terms.term AND ri.name < terms.term_end
+                    GROUP BY ri.recipe_id
+                ),
+                scored AS (
+                    SELECT m.recipe_id, m.matched,
+                           (SELECT COUNT(DISTINCT position) FROM recipe_ingredients
+                            WHERE recipe_id = m.recipe_id) AS total
+                    FROM matches m
+                )
+                SELECT r.*, s.matched, s.total
+                FROM scored s
+                JOIN recipes r ON r.id = s.recipe_id
+                ORDER BY s.matched * 1.0 / s.total DESC, s.matched DESC, r.id
+                LIMIT ?
+            ''', (*params, limit))
+            rows = cursor.fetchall()
+        
+        results = []
+        for row in rows:
+            recipe = self._dict_from_row(row)
+            recipe["match"] = {"matched": row[8], "total": row[9], "coverage": round(row[8] / row[9], 4)}
+            results.append(recipe)
+        return results
+    
+    @_timed
+    def get_version(self, recipe_id: Optional[int] = None) -> str:
+        """Change token for the table or one recipe; reads only ``data_versions``"""
+        name = "recipes" if recipe_id is None else f"recipe:{recipe_id}"
+        with self.pool.connection() as conn:
+            versions = dict(conn.execute(
+                "SELECT name, version FROM data_versions WHERE name IN ('epoch', ?)", (name,)
+            ).fetchall())
+        return f"{versions['epoch']:x}-{versions.get(name, 0)}"
+
     def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
         """Create a new recipe"""
-        recipe_dict = recipe_data.model_dump()
+        return self.submit_create_recipe(recipe_data).result()
+    
+    def submit_create_recipe(self, recipe_data: RecipeCreate) -> Future:
+        """Queue a recipe creation; the future resolves to the created recipe"""
+        return self.writer.submit(self._create_recipe, recipe_data.model_dump())
+    
+    @timed(SQLITE_QUERY_SECONDS, repository="recipes", method="create_recipe")
+    def _create_recipe(self, conn, recipe_dict: Dict[str, Any]) -> Dict[str, Any]:
+        cursor = conn.cursor()
+        cursor.execute(_INSERT_SQL, self._recipe_values(recipe_dict))
+        recipe_id = cursor.lastrowid
+        self._insert_ingredient_rows(conn, [(recipe_id, recipe_dict["ingredients"])])
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO recipes (title, ingredients, steps, prepTime, cookTime, difficulty, cuisine)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                recipe_dict["title"],
-                json.dumps(recipe_dict["ingredients"]),
-                json.dumps(recipe_dict["steps"]),
-                recipe_dict["prepTime"],
-                recipe_dict["cookTime"],
-                recipe_dict["difficulty"],
-                recipe_dict["cuisine"]
-            ))
-            recipe_id = cursor.lastrowid
-            conn.commit()
-            
-            # Return the created recipe with the generated ID
-            recipe_dict["id"] = recipe_id
-            return recipe_dict
+        # Return the created recipe with the generated ID
+        recipe_dict["id"] = recipe_id
+        return recipe_dict
+    
+    def bulk_create(self, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        """Create many recipes in one transaction
+        
+        Inserts the whole batch with a single ``executemany``. If the batch
+        fails, it is retried row by row so one bad row only fails itself.
+        Returns one result per input recipe, in order: ``{"id": ...}`` or
+        ``{"error": ...}``.
+        """
+        return self.submit_bulk_create(recipes).result()
+    
+    def submit_bulk_create(self, recipes: Sequence[RecipeCreate]) -> Future:
+        """Queue a bulk creation; the future resolves to the per-recipe results"""
+        if not recipes:
+            future: Future = Future()
+            future.set_result([])
+            return future
+        return self.writer.submit(self._bulk_create, recipes)
+    
+    @timed(SQLITE_QUERY_SECONDS, repository="recipes", method="bulk_create")
+    def _bulk_create(self, conn, recipes: Sequence[RecipeCreate]) -> List[Dict[str, Any]]:
+        rows = [self._recipe_values(recipe.model_dump()) for recipe in recipes]
+        conn.execute("SAVEPOINT bulk")
+        try:
+            # The writer holds the write lock, so no other writer can
+            # interleave: the batch gets consecutive IDs ending at last_insert_rowid()
+            conn.executemany(_INSERT_SQL, rows)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            ids = range(last_id - len(rows) + 1, last_id + 1)
+            self._insert_ingredient_rows(
+                conn, [(recipe_id, recipe.ingredients) for recipe_id, recipe in zip(ids, recipes)]
+            )
+            conn.execute("RELEASE bulk")
+            return [{"id": recipe_id} for recipe_id in ids]
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO bulk")
+            conn.execute("RELEASE bulk")
+            print(f"Bulk insert of {len(rows)} recipes failed ({e}); retrying row by row")
+        
+        results: List[Dict[str, Any]] = []
+        for recipe, values in zip(recipes, rows):
+            conn.execute("SAVEPOINT bulk_row")
+            try:
+                cursor = conn.execute(_INSERT_SQL, values)
+                self._insert_ingredient_rows(conn, [(cursor.lastrowid, recipe.ingredients)])
+                results.append({"id": cursor.lastrowid})
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK TO bulk_row")
+                results.append({"error": str(e)})
+            conn.execute("RELEASE bulk_row")
+        return results
     
     def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
         """Update an existing recipe"""
-        recipe_dict = recipe_data.model_dump()
+        return self.submit_update_recipe(recipe_id, recipe_data).result()
+    
+    def submit_update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Future:
+        """Queue a recipe update; the future resolves to the updated recipe, or None if it does not exist"""
+        return self.writer.submit(self._update_recipe, recipe_id, recipe_data.model_dump())
+    
+    @timed(SQLITE_QUERY_SECONDS, repository="recipes", method="update_recipe")
+    def _update_recipe(self, conn, recipe_id: int, recipe_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE recipes 
+            SET title = ?, ingredients = ?, steps = ?, prepTime = ?, cookTime = ?, difficulty = ?, cuisine = ?
+            WHERE id = ?
+        ''', (*self._recipe_values(recipe_dict), recipe_id))
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE recipes 
-                SET title = ?, ingredients = ?, steps = ?, prepTime = ?, cookTime = ?, difficulty = ?, cuisine = ?
-                WHERE id = ?
-            ''', (
-                recipe_dict["title"],
-                json.dumps(recipe_dict["ingredients"]),
-                json.dumps(recipe_dict["steps"]),
-                recipe_dict["prepTime"],
-                recipe_dict["cookTime"],
-                recipe_dict["difficulty"],
-                recipe_dict["cuisine"],
-                recipe_id
-            ))
-            
-            if cursor.rowcount == 0:
-                return None
-            
-            conn.commit()
-            
-            # Return the updated recipe
-            recipe_dict["id"] = recipe_id
-            return recipe_dict
+        if cursor.rowcount == 0:
+            return None
+        
+        cursor.execute("DELETE FROM recipe_ingredients WHERE recipe_id = ?", (recipe_id,))
+        self._insert_ingredient_rows(conn, [(recipe_id, recipe_dict["ingredients"])])
+        
+        # Return the updated recipe
+        recipe_dict["id"] = recipe_id
+        return recipe_dict
     
     def delete_recipe(self, recipe_id: int) -> bool:
         """Delete a recipe by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        return self.submit_delete_recipe(recipe_id).result()
+    
+    def submit_delete_recipe(self, recipe_id: int) -> Future:
+        """Queue a recipe deletion; the future resolves to whether the recipe existed"""
+        return self.writer.submit(self._delete_recipe, recipe_id)
+    
+    @timed(SQLITE_QUERY_SECONDS, repository="recipes", method="delete_recipe")
+    def _delete_recipe(self, conn, recipe_id: int) -> bool:
+        cursor = conn.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
+        return cursor.rowcount > 0
@@ -0,0 +1,176 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.metrics import SQLITE_WRITE_BATCH_SIZE, SQLITE_WRITE_QUEUE_SECONDS, SQLITE_WRITE_TRANSACTION_SECONDS
+from app.repositories.sqlite_pool import DEFAULT_PRAGMAS, require_file_database
+
+
+# (function, arguments, exclusive, future, perf_counter when queued) of one queued write
+_Job = Tuple[Callable[..., Any], Tuple[Any, ...], bool, Future, float]
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """The single writer of a SQLite database: one thread applying queued writes
+
+    SQLite admits one writer at a time anyway; queueing writes here instead
+    of letting them contend for the lock keeps pooled reader connections and
+    threads free during write bursts. Writes queued while a transaction runs
+    are applied together in the next one (group commit), so a burst of small
+    writes costs one commit rather than one each. ``max_batch`` caps the
+    writes per transaction. With ``linger`` (seconds), the writer also waits
+    up to that long after the first write of a batch for more to arrive:
+    each write may be delayed by that budget, in exchange for fewer, larger
+    commits under concurrent load. Without it, only writes already queued
+    are grouped.
+
+    A job is ``func(conn, *args)``. Grouped jobs run inside the writer's
+    transaction, each under its own savepoint: a job that raises is rolled
+    back alone and its future gets the exception, while the others commit.
+    They must not commit or roll back themselves. ``exclusive`` jobs run
+    alone, outside any transaction, and manage their own (schema setup).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_batch: int = 64,
+        linger: float = 0.0,
+        cached_statements: int = 256,
+        pragmas: Optional[Dict[str, str]] = None,
+        name: str = "default",
+    ):
+        require_file_database(db_path)
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.linger = linger
+        self.name = name
+        self._batch_sizes = SQLITE_WRITE_BATCH_SIZE.labels(database=name)
+        self._queue_seconds = SQLITE_WRITE_QUEUE_SECONDS.labels(database=name)
+        self._transaction_seconds = SQLITE_WRITE_TRANSACTION_SECONDS.labels(database=name)
+        # Autocommit mode: transactions are begun and ended explicitly below
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, cached_statements=cached_statements, isolation_level=None
+        )
+        for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+            self._conn.execute(f"PRAGMA {name} = {value}")
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable[..., Any], *args: Any, exclusive: bool = False) -> Future:
+        """Queue ``func(conn, *args)``; the future resolves to its result once committed"""
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("SQLite writer is closed")
+            self._queue.put((func, args, exclusive, future, time.perf_counter()))
+        return future
+
+    def execute(self, func: Callable[..., Any], *args: Any, exclusive: bool = False) -> Any:
+        """Run ``func(conn, *args)`` on the writer and wait for its committed result"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Writer jobs cannot wait for other writer jobs")
+        return self.submit(func, *args, exclusive=exclusive).result()
+
+    def queue_depth(self) -> int:
+        """Writes queued and not yet started"""
+        return self._queue.qsize()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Apply the writes already queued, then stop; returns whether the writer stopped in time"""
+        with self._close_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        self._conn.close()
+        return True
+
+    def _run(self) -> None:
+        pending: Optional[Any] = None
+        while True:
+            job = pending if pending is not None else self._queue.get()
+            pending = None
+            if job is _STOP:
+                return
+            if job[2]:  # exclusive
+                self._apply_exclusive(job)
+                continue
+            batch: List[_Job] = [job]
+            deadline = time.perf_counter() + self.linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP or job[2]:
+                    pending = job  # runs after this batch
+                    break
+                batch.append(job)
+            self._apply_batch(batch)
+
+    def _apply_exclusive(self, job: _Job) -> None:
+        func, args, _, future, queued_at = job
+        if not future.set_running_or_notify_cancel():
+            return
+        self._queue_seconds.observe(time.perf_counter() - queued_at)
+        try:
+            result = func(self._conn, *args)
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _apply_batch(self, batch: List[_Job]) -> None:
+        """Apply grouped jobs in one transaction; futures resolve only once it commits"""
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        started = time.perf_counter()
+        for job in batch:
+            self._queue_seconds.observe(started - job[4])
+        self._batch_sizes.observe(len(batch))
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for func, args, _, future, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._conn.execute("SAVEPOINT job")
+                try:
+                    result = func(self._conn, *args)
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO job")
+                    self._conn.execute("RELEASE job")
+                    outcomes.append((future, False, e))
+                else:
+                    self._conn.execute("RELEASE job")
+                    outcomes.append((future, True, result))
+            self._conn.execute("COMMIT")
+            self._transaction_seconds.observe(time.perf_counter() - started)
+        except Exception as e:
+            # Lock timeout, failed commit, or a transaction SQLite rolled back
+            # itself: nothing in the batch was written
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            for job in batch:
+                future = job[3]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -1,62 +1,490 @@
+import asyncio
 import json
+import math
+import random
+import time
+import uuid
 import redis
+from dataclasses import dataclass
+from redis.asyncio import Redis
+from redis.asyncio.lock import Lock
 from typing import List, Dict, Any, Optional
+from app.core import serialization
+from app.core.metrics import CACHE_LOOKUPS, REDIS_OPERATION_SECONDS
+from app.core.redis import RedisConnectionManager
+from app.services.local_cache import LocalCache
+
+
+# Pub/sub channel on which processes announce keys to drop from their L1 cache
+INVALIDATION_CHANNEL = "cache_invalidation"
+# Redis keyspace notifications for expired keys (only sent when the server has
+# notify-keyspace-events configured to include "Ex")
+EXPIRED_EVENTS_PATTERN = "__keyevent@*__:expired"
+# Cache keys live under "mealdb:v<version>:"; bumping the version stored here
+# retires every key at once
+CACHE_PREFIX = "mealdb"
+NAMESPACE_KEY = f"{CACHE_PREFIX}:namespace"
+# Keys of the unversioned layout, removed by the first full sweep
+LEGACY_PATTERNS = ("mealdb_search:*", "mealdb_meal:*", "mealdb_cache_stats")
+# Redis glob metacharacters, escaped when matching keys by literal prefix
+_GLOB_SPECIAL = str.maketrans({char: f"\\{char}" for char in "*?[]\\"})
+
+CLEAR_SCOPES = ("all", "search")
+
+_L1_HIT = CACHE_LOOKUPS.labels(tier="l1", result="hit")
+_L1_MISS = CACHE_LOOKUPS.labels(tier="l1", result="miss")
+_L2_HIT = CACHE_LOOKUPS.labels(tier="l2", result="hit")
+_L2_MISS = CACHE_LOOKUPS.labels(tier="l2", result="miss")
+_REDIS_GET = REDIS_OPERATION_SECONDS.labels(operation="get")
+_REDIS_SET = REDIS_OPERATION_SECONDS.labels(operation="set")
+
+
+@dataclass
+class CachedSearch:
+    """Cached search results with their freshness"""
+    results: List[Dict[str, Any]]
+    fetched_at: float  # Unix time the results were fetched upstream
+    delta: float  # seconds the upstream fetch took
+    soft_expiry: float  # Unix time after which the results are served stale
+
+    def is_stale(self, now: float) -> bool:
+        return now >= self.soft_expiry
 
 
 class CacheService:
-    """Service for Redis caching operations"""
-    
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
-        self.default_ttl = 24 * 60 * 60  # 24 hours in seconds
-    
-    def get_cached_search_results(self, query: str) -> Optional[List[Dict[str, Any]]]:
-        """Get cached search results for a query"""
-        try:
-            cache_key = f"mealdb_search:{query.lower().strip()}"
-            cached_data = self.redis_client.get(cache_key)
-            
-            if cached_data:
-                return json.loads(cached_data)
-            return None
-            
-        except (redis.RedisError, json.JSONDecodeError) as e:
+    """Service for Redis caching operations
+
+    Reads go through a bounded in-process L1 cache (LRU with TTL) holding
+    decoded values, in front of Redis as L2. L1 entries never outlive the
+    Redis key they were read from. When a key is rewritten or the cache is
+    cleared, an invalidation message on Redis pub/sub makes every process
+    drop its L1 copy; see ``start_invalidation_listener``.
+
+    Search results are stored normalized: each meal once under
+    ``mealdb:v<N>:meal:<id>`` and each query under
+    ``mealdb:v<N>:search:<query>`` as a list of meal ids, so a meal
+    returned by many queries takes Redis memory once. Meal keys are
+    rewritten with every query that returns them, so they always outlive
+    the query keys referring to them.
+
+    Entries have a soft and a hard TTL. Redis drops them after the hard TTL;
+    past the soft TTL they are still served, but callers should refresh
+    them (``should_refresh``), at most one process at a time
+    (``acquire_refresh_lock``). Refreshes start probabilistically ahead of
+    the soft TTL (XFetch), earlier for entries that were slow to fetch, so
+    popular queries don't all expire at once.
+
+    Keys are namespaced by a version number kept in Redis, so clearing the
+    cache is a single ``INCR``; keys of older versions become unreachable
+    and are unlinked by an optional background ``SCAN`` sweep (or expire).
+    Each process caches the version for ``version_check_interval`` seconds
+    and learns of bumps over pub/sub sooner.
+
+    Redis is used through the asyncio client of a shared
+    ``RedisConnectionManager``; pass the app-scoped one so every cache user
+    draws on the same connection pool.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        local_cache: Optional[LocalCache] = None,
+        redis_manager: Optional[RedisConnectionManager] = None,
+        soft_ttl: float = 60 * 60,
+        hard_ttl: int = 24 * 60 * 60,
+        xfetch_beta: float = 1.0,
+        refresh_lock_timeout: float = 30.0,
+        version_check_interval: float = 5.0,
+    ):
+        self.redis = redis_manager or RedisConnectionManager(redis_url)
+        self.default_ttl = hard_ttl  # 24 hours in seconds by default
+        self.soft_ttl = soft_ttl
+        self.xfetch_beta = xfetch_beta
+        self.refresh_lock_timeout = refresh_lock_timeout
+        self.local_cache = local_cache or LocalCache()
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.refresh_stats = {
+            "stale_served": 0,
+            "early_refreshes": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "refresh_lock_busy": 0,
+        }
+        self.version_check_interval = version_check_interval
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self.swept_keys = 0
+        # Identifies this process's own invalidation messages
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._sweeps: "set[asyncio.Task[None]]" = set()
+
+    @property
+    def redis_client(self) -> Redis:
+        return self.redis.client
+
+    def _set_version(self, version: int) -> None:
+        if self._version is not None and version != self._version:
+            self.local_cache.clear()  # entries of the old namespace are unreachable
+        self._version = version
+        self._version_checked_at = time.monotonic()
+
+    async def _namespace(self) -> str:
+        """Key prefix of the current cache version"""
+        if self._version is None or time.monotonic() - self._version_checked_at >= self.version_check_interval:
+            try:
+                self._set_version(int(await self.redis_client.get(NAMESPACE_KEY) or 0))
+            except (redis.RedisError, ValueError) as e:
+                # Keep the last known version; retry after the next interval
+                print(f"Cache namespace error: {e}")
+                self._version_checked_at = time.monotonic()
+        return f"{CACHE_PREFIX}:v{self._version or 0}:"
+
+    def _search_key(self, namespace: str, query: str) -> str:
+        return f"{namespace}search:{query.lower().strip()}"
+
+    def _meal_key(self, namespace: str, meal_id: Any) -> str:
+        return f"{namespace}meal:{meal_id}"
+
+    async def get_cached_search_results(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached search results for a query, fresh or stale"""
+        entry = await self.get_search_entry(query)
+        return entry.results if entry is not None else None
+
+    async def get_search_entry(self, query: str, use_local: bool = True) -> Optional[CachedSearch]:
+        """Get cached search results for a query along with their freshness"""
+        namespace = await self._namespace()
+        cache_key = self._search_key(namespace, query)
+        if use_local:
+            entry = self.local_cache.get(cache_key)
+            if entry is not None:
+                _L1_HIT.inc()
+                return entry
+            _L1_MISS.inc()
+
+        started = time.perf_counter()
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.pttl(cache_key)
+                cached_query, ttl_ms = await pipe.execute()
+
+            if not cached_query:
+                self.l2_misses += 1
+                _L2_MISS.inc()
+                return None
+
+            payload = serialization.loads(cached_query)
+            if isinstance(payload, list):
+                payload = {"ids": payload}  # written before soft TTLs: refresh soon
+            meal_keys = [self._meal_key(namespace, meal_id) for meal_id in payload["ids"]]
+            cached_meals = await self.redis_client.mget(meal_keys) if meal_keys else []
+            if any(meal is None for meal in cached_meals):
+                # A meal was evicted: treat the whole query as a miss
+                self.l2_misses += 1
+                _L2_MISS.inc()
+                return None
+
+            self.l2_hits += 1
+            _L2_HIT.inc()
+            fetched_at = payload.get("fetched_at", 0.0)
+            entry = CachedSearch(
+                results=[serialization.loads(meal) for meal in cached_meals],
+                fetched_at=fetched_at,
+                delta=payload.get("delta", 0.0),
+                soft_expiry=fetched_at + self.soft_ttl,
+            )
+            if ttl_ms > 0:
+                size = len(cached_query) + sum(len(meal) for meal in cached_meals)
+                self.local_cache.set(cache_key, entry, size, ttl_ms / 1000)
+            return entry
+
+        except (redis.RedisError, ValueError, KeyError, TypeError) as e:
             print(f"Cache get error: {e}")
             return None
-    
-    def cache_search_results(self, query: str, results: List[Dict[str, Any]]) -> bool:
-        """Cache search results for a query"""
-        try:
-            cache_key = f"mealdb_search:{query.lower().strip()}"
-            json_data = json.dumps(results)
-            
-            # Set with 24-hour TTL
-            self.redis_client.setex(cache_key, self.default_ttl, json_data)
-            return True
-            
-        except (redis.RedisError, TypeError) as e:
+        finally:
+            _REDIS_GET.observe(time.perf_counter() - started)
+
+    def should_refresh(self, entry: CachedSearch, now: Optional[float] = None) -> bool:
+        """Whether an entry is due for a refresh, possibly ahead of its soft TTL (XFetch)
+
+        The refresh moves ahead of the soft TTL by ``delta * beta * -ln(U)``
+        for uniform U, so slow-to-fetch entries are refreshed earlier and
+        concurrent readers rarely decide at the same moment.
+        """
+        now = time.time() if now is None else now
+        return now - entry.delta * self.xfetch_beta * math.log(1.0 - random.random()) >= entry.soft_expiry
+
+    async def acquire_lock(self, name: str, timeout: float) -> Optional[Lock]:
+        """Try to take a cross-process lock that expires after ``timeout`` seconds
+
+        Returns the held lock, or None if another process holds it or Redis
+        is unavailable.
+        """
+        lock = self.redis_client.lock(name, timeout=timeout, blocking=False, thread_local=False)
+        try:
+            if await lock.acquire():
+                return lock
+        except redis.RedisError as e:
+            print(f"Cache lock error: {e}")
+        return None
+
+    async def release_lock(self, lock: Lock) -> None:
+        try:
+            await lock.release()
+        except redis.RedisError as e:
+            # The lock timed out and may be held by another process by now
+            print(f"Cache lock error: {e}")
+
+    async def acquire_refresh_lock(self, query: str) -> Optional[Lock]:
+        """Try to take the cross-process lock for refreshing a query"""
+        lock = await self.acquire_lock(f"mealdb_refresh_lock:{query.lower().strip()}", self.refresh_lock_timeout)
+        if lock is None:
+            self.refresh_stats["refresh_lock_busy"] += 1
+        return lock
+
+    async def release_refresh_lock(self, lock: Lock) -> None:
+        await self.release_lock(lock)
+
+    async def cache_search_results(
+        self, query: str, results: List[Dict[str, Any]], delta: float = 0.0, local: bool = True
+    ) -> bool:
+        """Cache search results for a query
+
+        ``delta`` is how long fetching the results took, in seconds; it
+        scales how early the entry is refreshed. With ``local`` unset the
+        results are written to Redis only, not to this process's L1.
+        """
+        namespace = await self._namespace()
+        cache_key = self._search_key(namespace, query)
+        stats_key = f"{namespace}stats"
+        fetched_at = time.time()
+        try:
+            meals = {self._meal_key(namespace, recipe["id"]): serialization.dumps(recipe) for recipe in results}
+            query_data = serialization.dumps({
+                "ids": [recipe["id"] for recipe in results],
+                "fetched_at": fetched_at,
+                "delta": delta,
+            })
+        except (TypeError, KeyError) as e:
             print(f"Cache set error: {e}")
             return False
-    
-    def clear_cache(self) -> bool:
-        """Clear all cached data"""
+
+        if local:
+            entry = CachedSearch(results, fetched_at, delta, fetched_at + self.soft_ttl)
+            self.local_cache.set(cache_key, entry, len(query_data) + sum(len(data) for data in meals.values()))
+        started = time.perf_counter()
         try:
-            self.redis_client.flushdb()
+            # Meals and the query's id list share the hard TTL
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for meal_key, data in meals.items():
+                    pipe.exists(meal_key)
+                    pipe.setex(meal_key, self.default_ttl, data)
+                pipe.setex(cache_key, self.default_ttl, query_data)
+                replies = await pipe.execute()
+            await self._publish_invalidation(keys=[cache_key])
+
+            # Bytes this write would have taken as an expanded list, against what it added
+            existed = replies[0:-1:2]
+            new_meal_bytes = sum(len(data) for data, seen in zip(meals.values(), existed) if not seen)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(stats_key, "expanded_bytes", len(serialization.dumps(results)))
+                pipe.hincrby(stats_key, "stored_bytes", len(query_data) + new_meal_bytes)
+                pipe.hincrby(stats_key, "meal_writes", len(meals))
+                pipe.hincrby(stats_key, "meals_shared", sum(1 for seen in existed if seen))
+                await pipe.execute()
             return True
+
         except redis.RedisError as e:
-            print(f"Cache clear error: {e}")
+            print(f"Cache set error: {e}")
             return False
-    
-    def get_cache_stats(self) -> Dict[str, Any]:
+        finally:
+            _REDIS_SET.observe(time.perf_counter() - started)
+
+    async def clear_cache(
+        self, scope: str = "all", prefix: Optional[str] = None, sweep: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Invalidate cached data without blocking Redis
+
+        ``scope="all"`` bumps the namespace version, retiring every key at
+        once; with ``sweep`` the old keys are unlinked in the background.
+        ``scope="search"`` drops cached queries starting with ``prefix`` (all
+        queries if None) and keeps meals. Returns a summary, or None if Redis
+        is unavailable.
+        """
+        if scope not in CLEAR_SCOPES:
+            raise ValueError(f"Unknown cache scope: {scope}")
+        try:
+            if scope == "all":
+                self._set_version(await self.redis_client.incr(NAMESPACE_KEY))
+                self.local_cache.clear()
+                await self._publish_invalidation(all_keys=True)
+                if sweep:
+                    current = f"{CACHE_PREFIX}:v{self._version}:"
+                    for pattern in (f"{CACHE_PREFIX}:v*", *LEGACY_PATTERNS):
+                        self._start_sweep(pattern, keep_prefix=current)
+            else:
+                key_prefix = self._search_key(await self._namespace(), prefix or "")
+                self.local_cache.delete_prefix(key_prefix)
+                await self._publish_invalidation(prefix=key_prefix)
+                self._start_sweep(key_prefix.translate(_GLOB_SPECIAL) + "*")
+                sweep = True
+            return {"scope": scope, "prefix": prefix, "version": self._version, "sweeping": sweep}
+        except redis.RedisError as e:
+            print(f"Cache clear error: {e}")
+            return None
+
+    def _start_sweep(self, pattern: str, keep_prefix: Optional[str] = None) -> None:
+        """Unlink keys matching ``pattern`` in a background task"""
+        task = asyncio.get_running_loop().create_task(self._sweep(pattern, keep_prefix), name="cache-sweep")
+        self._sweeps.add(task)
+        task.add_done_callback(self._sweeps.discard)
+
+    async def _sweep(self, pattern: str, keep_prefix: Optional[str] = None, batch_size: int = 500) -> None:
+        """SCAN for keys matching ``pattern`` and UNLINK them in batches"""
+        batch: List[str] = []
+        try:
+            async for key in self.redis_client.scan_iter(match=pattern, count=batch_size):
+                if (keep_prefix is not None and key.startswith(keep_prefix)) or key == NAMESPACE_KEY:
+                    continue
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    self.swept_keys += await self.redis_client.unlink(*batch)
+                    batch.clear()
+            if batch:
+                self.swept_keys += await self.redis_client.unlink(*batch)
+        except redis.RedisError as e:
+            print(f"Cache sweep error: {e}")
+
+    async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        l2_lookups = self.l2_hits + self.l2_misses
+        tiers = {
+            "l1": self.local_cache.stats(),
+            "l2": {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "hit_rate": round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0,
+            },
+            "refresh": dict(self.refresh_stats),
+            "namespace": {
+                "version": self._version,
+                "sweeps_running": len(self._sweeps),
+                "swept_keys": self.swept_keys,
+            },
+            "redis_pool": self.redis.pool_stats(),
+        }
         try:
-            info = self.redis_client.info()
+            namespace = await self._namespace()
+            tiers["layout"] = self._layout_stats(await self.redis_client.hgetall(f"{namespace}stats"))
+            info = await self.redis_client.info()
             return {
                 "connected_clients": info.get("connected_clients", 0),
                 "used_memory_human": info.get("used_memory_human", "0B"),
                 "keyspace_hits": info.get("keyspace_hits", 0),
-                "keyspace_misses": info.get("keyspace_misses", 0)
+                "keyspace_misses": info.get("keyspace_misses", 0),
+                **tiers,
             }
         except redis.RedisError as e:
             print(f"Cache stats error: {e}")
-            return {}
+            return tiers
+
+    def _layout_stats(self, counters: Dict[Any, Any]) -> Dict[str, Any]:
+        """Memory saved by storing meals once, from the shared write counters"""
+        stats = {
+            field: int(counters.get(field, 0))
+            for field in ("expanded_bytes", "stored_bytes", "meal_writes", "meals_shared")
+        }
+        saved = stats["expanded_bytes"] - stats["stored_bytes"]
+        stats["saved_bytes"] = saved
+        stats["saved_ratio"] = round(saved / stats["expanded_bytes"], 4) if stats["expanded_bytes"] else 0.0
+        return stats
+
+    async def _publish_invalidation(
+        self, keys: Optional[List[str]] = None, all_keys: bool = False, prefix: Optional[str] = None
+    ) -> None:
+        """Tell other processes to drop keys, a key prefix or everything from their L1 cache
+
+        Full invalidations carry the new namespace version.
+        """
+        message = json.dumps({
+            "origin": self._origin,
+            "keys": keys or [],
+            "all": all_keys,
+            "prefix": prefix,
+            "version": self._version if all_keys else None,
+        })
+        try:
+            await self.redis_client.publish(INVALIDATION_CHANNEL, message)
+        except redis.RedisError as e:
+            print(f"Cache invalidation publish error: {e}")
+
+    def _handle_invalidation(self, message: Dict[str, Any]) -> None:
+        """Apply a pub/sub message to the L1 cache"""
+        if message.get("type") == "pmessage":
+            # Keyspace notification: the payload is the expired key name
+            self.local_cache.delete(message["data"])
+            return
+
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, json.JSONDecodeError):
+            return
+        if payload.get("origin") == self._origin:
+            return
+        if payload.get("all"):
+            self.local_cache.clear()
+        if payload.get("version") is not None:
+            self._set_version(payload["version"])
+        if payload.get("prefix"):
+            self.local_cache.delete_prefix(payload["prefix"])
+        for key in payload.get("keys", []):
+            self.local_cache.delete(key)
+
+    def start_invalidation_listener(self) -> None:
+        """Start the background task applying invalidations from other processes"""
+        if self._listener is not None and not self._listener.done():
+            return
+        self._listener = asyncio.get_running_loop().create_task(
+            self._listen_for_invalidations(), name="cache-invalidation"
+        )
+
+    async def stop_invalidation_listener(self) -> None:
+        """Stop the invalidation listener task"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def stop_background_tasks(self) -> None:
+        """Stop the invalidation listener and any running sweeps"""
+        await self.stop_invalidation_listener()
+        for task in list(self._sweeps):
+            task.cancel()
+        await asyncio.gather(*self._sweeps, return_exceptions=True)
+
+    async def _listen_for_invalidations(self) -> None:
+        """Subscribe to invalidations, reconnecting with backoff when Redis is unavailable"""
+        backoff = 0.5
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                await pubsub.psubscribe(EXPIRED_EVENTS_PATTERN)
+                backoff = 0.5
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._handle_invalidation(message)
+            except redis.RedisError as e:
+                # Invalidations may have been missed while disconnected
+                self.local_cache.clear()
+                print(f"Cache invalidation listener error: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
@@ -1,138 +1,215 @@
-import requests
-import re
+import asyncio
+import importlib.util
+import time
+import httpx
 from typing import List, Dict, Any, Optional
+from app.core.metrics import (
+    MEALDB_REQUEST_ERRORS,
+    MEALDB_REQUEST_SECONDS,
+    MEALDB_REQUESTS_IN_FLIGHT,
+    SERVICE_CALL_SECONDS,
+    timed,
+)
+from app.repositories.async_mealdb_mirror_repository import ExecutorMealDBMirrorRepository
 from app.services.cache_service import CacheService
+from app.services.mealdb_transform import MealTransformer
+
+
+class MealDBError(Exception):
+    """Raised when TheMealDB cannot be reached or returns an unusable response"""
 
 
 class MealDBService:
-    """Service for interacting with TheMealDB API with Redis caching"""
+    """Service for interacting with TheMealDB API with Redis caching
+
+    Uses one pooled ``httpx.AsyncClient`` for its lifetime, so instances are
+    meant to be shared app-wide and closed with ``aclose``. Upstream calls are
+    bounded by ``max_concurrency``, and concurrent cache misses for the same
+    normalized query share a single upstream request. Cached results past
+    their soft TTL are served immediately while a background task refreshes
+    them. With a ``mirror``, every upstream result is also written to the
+    local mirror, keeping it in sync incrementally.
+    """
     
-    def __init__(self, base_url: str = "https://www.themealdb.com/api/json/v1/1", redis_url: str = "redis://localhost:6379"):
+    def __init__(
+        self,
+        base_url: str = "https://www.themealdb.com/api/json/v1/1",
+        redis_url: str = "redis://localhost:6379",
+        cache_service: Optional[CacheService] = None,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_concurrency: int = 10,
+        http2: bool = False,
+        transform_cache_size: int = 4096,
+        mirror: Optional[ExecutorMealDBMirrorRepository] = None,
+    ):
         self.base_url = base_url
-        self.cache_service = CacheService(redis_url)
+        self.cache_service = cache_service or CacheService(redis_url)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            print("HTTP/2 requested for MealDB but the 'h2' package is not installed; using HTTP/1.1")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+        self._refreshing: Dict[str, "asyncio.Task[None]"] = {}
+        self.transformer = MealTransformer(max_entries=transform_cache_size)
+        self.mirror = mirror
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use
+
+        Pooled connections belong to the event loop that opened them, so a
+        new client is created if the service is used from a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+            self._client_loop = loop
+        return self._client
     
-    def search_recipes(self, query: str) -> List[Dict[str, Any]]:
-        """Search recipes in MealDB by name with caching"""
-        if not query.strip():
+    async def aclose(self) -> None:
+        """Stop background refreshes and close pooled upstream connections"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+    
+    @timed(SERVICE_CALL_SECONDS, service="mealdb")
+    async def search_recipes(self, query: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Search recipes in MealDB by name with caching
+
+        Upstream failures return an empty list, or raise ``MealDBError`` when
+        ``raise_errors`` is set so callers can tell "no matches" from "down".
+        """
+        normalized_query = query.lower().strip()
+        if not normalized_query:
             return []
         
         # Check cache first
-        cached_results = self.cache_service.get_cached_search_results(query)
-        if cached_results is not None:
-            print(f"Cache HIT for query: '{query}'")
-            return cached_results
+        entry = await self.cache_service.get_search_entry(normalized_query)
+        if entry is not None:
+            now = time.time()
+            stale = entry.is_stale(now)
+            if stale:
+                self.cache_service.refresh_stats["stale_served"] += 1
+            if self.cache_service.should_refresh(entry, now):
+                self._schedule_refresh(normalized_query, entry.fetched_at, early=not stale)
+            return entry.results
         
-        print(f"Cache MISS for query: '{query}' - making API call")
-        
-        # Make API call if not in cache
+        # Coalesce concurrent misses for the same query into one upstream call.
+        # The shield keeps a cancelled caller from cancelling the shared fetch.
+        task = self._inflight.get(normalized_query)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_cache(normalized_query))
+            self._inflight[normalized_query] = task
+            task.add_done_callback(lambda _: self._inflight.pop(normalized_query, None))
         try:
-            response = requests.get(f"{self.base_url}/search.php", params={"s": query})
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("meals"):
-                # Cache empty results too
-                self.cache_service.cache_search_results(query, [])
-                return []
-            
-            results = [self._transform_mealdb_recipe(meal) for meal in data["meals"]]
-            
-            # Cache the results
-            self.cache_service.cache_search_results(query, results)
-            
-            return results
-        
-        except (requests.RequestException, KeyError, ValueError) as e:
+            return await asyncio.shield(task)
+        except MealDBError as e:
+            if raise_errors:
+                raise
             # Log error in production, but return empty list for now
             print(f"Error fetching from MealDB: {e}")
             return []
     
-    def _transform_mealdb_recipe(self, meal: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform MealDB recipe format to our internal format"""
-        # Extract ingredients (MealDB has strIngredient1-20 fields)
-        ingredients = []
-        for i in range(1, 21):
-            ingredient_key = f"strIngredient{i}"
-            measure_key = f"strMeasure{i}"
-            
-            ingredient = meal.get(ingredient_key)
-            measure = meal.get(measure_key)
-            
-            # Handle None values and empty strings
-            if ingredient and ingredient != "null" and ingredient.strip():
-                ingredient = ingredient.strip()
-                measure = measure.strip() if measure else ""
-                
-                if measure:
-                    ingredients.append(f"{measure} {ingredient}")
-                else:
-                    ingredients.append(ingredient)
-        
-        # Extract steps from instructions
-        instructions = meal.get("strInstructions", "")
-        steps = self._parse_instructions_to_steps(instructions)
-        
-        # Determine difficulty based on ingredients count and steps
-        difficulty = self._determine_difficulty(len(ingredients), len(steps))
-        
-        # Estimate prep and cook time (MealDB doesn't provide this)
-        prep_time = "15 minutes"  # Default estimate
-        cook_time = "30 minutes"  # Default estimate
-        
-        return {
-            "id": meal.get("idMeal", ""),
-            "title": meal.get("strMeal", ""),
-            "ingredients": ingredients,
-            "steps": steps,
-            "prepTime": prep_time,
-            "cookTime": cook_time,
-            "difficulty": difficulty,
-            "cuisine": meal.get("strArea", "Unknown"),
-            "source": "mealdb"
-        }
+    def _schedule_refresh(self, query: str, fetched_at: float, early: bool) -> None:
+        """Refresh a cached query in the background, once per process at a time"""
+        if query in self._refreshing or query in self._inflight:
+            return
+        if early:
+            self.cache_service.refresh_stats["early_refreshes"] += 1
+        task = asyncio.ensure_future(self._refresh(query, fetched_at))
+        self._refreshing[query] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(query, None))
     
-    def _parse_instructions_to_steps(self, instructions: str) -> List[str]:
-        """Parse MealDB instructions into step-by-step format"""
-        if not instructions:
-            return []
-        
-        # Clean up the instructions
-        instructions = instructions.replace('\r\n', '\n').replace('\r', '\n')
-        
-        # Split by common step indicators
-        step_patterns = [
-            r'STEP\s+\d+[:\s]*',  # STEP 1:, STEP 2:, etc.
-            r'\d+\.\s*',           # 1., 2., etc.
-            r'^\s*[A-Z][^.]*\.',   # Sentences starting with capital letters
-        ]
-        
-        # Try to find steps using patterns
-        for pattern in step_patterns:
-            steps = re.split(pattern, instructions, flags=re.IGNORECASE | re.MULTILINE)
-            if len(steps) > 1:
-                # Clean up steps
-                cleaned_steps = []
-                for step in steps[1:]:  # Skip the first empty part
-                    step = step.strip()
-                    if step and len(step) > 10:  # Only include substantial steps
-                        cleaned_steps.append(step)
-                
-                if cleaned_steps:
-                    return cleaned_steps
-        
-        # If no clear steps found, split by sentences
-        sentences = re.split(r'[.!?]+', instructions)
-        steps = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
-        
-        return steps[:10]  # Limit to 10 steps
+    async def _refresh(self, query: str, fetched_at: float) -> None:
+        """Re-fetch a cached query under the cross-process refresh lock"""
+        lock = await self.cache_service.acquire_refresh_lock(query)
+        if lock is None:
+            return
+        try:
+            # Another process may have refreshed it since we read it
+            current = await self.cache_service.get_search_entry(query, use_local=False)
+            if current is not None and current.fetched_at > fetched_at:
+                return
+            await self._fetch_and_cache(query)
+            self.cache_service.refresh_stats["refreshes"] += 1
+        except MealDBError as e:
+            # Keep serving the stale entry until its hard TTL
+            self.cache_service.refresh_stats["refresh_errors"] += 1
+            print(f"Background refresh failed: {e}")
+        finally:
+            await self.cache_service.release_refresh_lock(lock)
+    
+    async def _get_meals(self, path: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Call a TheMealDB endpoint and return its ``meals`` list ([] for no matches)"""
+        try:
+            async with self._semaphore:
+                MEALDB_REQUESTS_IN_FLIGHT.inc()
+                try:
+                    with MEALDB_REQUEST_SECONDS.labels(endpoint=path).time():
+                        response = await self._get_client().get(path, params=params)
+                finally:
+                    MEALDB_REQUESTS_IN_FLIGHT.dec()
+            response.raise_for_status()
+            return response.json().get("meals") or []
+        except (httpx.HTTPError, AttributeError, ValueError) as e:
+            MEALDB_REQUEST_ERRORS.labels(endpoint=path, error=type(e).__name__).inc()
+            raise MealDBError(f"MealDB request {path} {params} failed: {e!r}") from e
     
-    def _determine_difficulty(self, ingredient_count: int, step_count: int) -> str:
-        """Determine recipe difficulty based on ingredients and steps"""
-        total_complexity = ingredient_count + step_count
+    async def _fetch_and_cache(self, query: str) -> List[Dict[str, Any]]:
+        """Fetch search results from MealDB and cache them"""
+        started = time.monotonic()
+        meals = await self._get_meals("/search.php", {"s": query})
+        try:
+            results = [self._transform_mealdb_recipe(meal) for meal in meals]
+        except (AttributeError, KeyError, TypeError) as e:
+            MEALDB_REQUEST_ERRORS.labels(endpoint="/search.php", error=type(e).__name__).inc()
+            raise MealDBError(f"MealDB search for '{query}' returned unusable meals: {e!r}") from e
         
-        if total_complexity <= 8:
-            return "Easy"
-        elif total_complexity <= 15:
-            return "Medium"
-        else:
-            return "Hard"
+        # Cache the results (empty results too)
+        await self.cache_service.cache_search_results(query, results, delta=time.monotonic() - started)
+        if self.mirror is not None and results:
+            try:
+                await self.mirror.upsert_recipes(results)
+            except Exception as e:
+                print(f"MealDB mirror sync error: {e}")
+        return results
+    
+    async def meals_by_first_letter(self, letter: str) -> List[Dict[str, Any]]:
+        """Full MealDB payloads of every meal whose name starts with ``letter``"""
+        return await self._get_meals("/search.php", {"f": letter})
+    
+    async def list_categories(self) -> List[str]:
+        """Names of all MealDB categories"""
+        items = await self._get_meals("/list.php", {"c": "list"})
+        return [item["strCategory"] for item in items if item.get("strCategory")]
+    
+    async def meal_ids_in_category(self, category: str) -> List[str]:
+        """IDs of the meals in a category (the filter endpoint returns no details)"""
+        items = await self._get_meals("/filter.php", {"c": category})
+        return [item["idMeal"] for item in items if item.get("idMeal")]
+    
+    async def lookup_meal(self, meal_id: str) -> Optional[Dict[str, Any]]:
+        """Full MealDB payload of one meal, or None if it does not exist"""
+        meals = await self._get_meals("/lookup.php", {"i": meal_id})
+        return meals[0] if meals else None
+    
+    def _transform_mealdb_recipe(self, meal: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform MealDB recipe format to our internal format"""
+        return self.transformer.transform(meal)
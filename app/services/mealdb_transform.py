@@ -0,0 +1,137 @@
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.ingredients import format_ingredient, mealdb_ingredient_pairs
+
+
+# Step markers tried in order when splitting MealDB instructions
+_STEP_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r'STEP\s+\d+[:\s]*',  # STEP 1:, STEP 2:, etc.
+        r'\d+\.\s*',           # 1., 2., etc.
+        r'^\s*[A-Z][^.]*\.',   # Sentences starting with capital letters
+    )
+)
+_SENTENCE_RE = re.compile(r'[.!?]+')
+
+
+def parse_instructions_to_steps(instructions: str) -> List[str]:
+    """Parse MealDB instructions into step-by-step format"""
+    if not instructions:
+        return []
+
+    # Clean up the instructions
+    instructions = instructions.replace('\r\n', '\n').replace('\r', '\n')
+
+    # Try to find steps using patterns
+    for pattern in _STEP_PATTERNS:
+        steps = pattern.split(instructions)
+        if len(steps) > 1:
+            # Clean up steps
+            cleaned_steps = []
+            for step in steps[1:]:  # Skip the first empty part
+                step = step.strip()
+                if step and len(step) > 10:  # Only include substantial steps
+                    cleaned_steps.append(step)
+
+            if cleaned_steps:
+                return cleaned_steps
+
+    # If no clear steps found, split by sentences
+    sentences = _SENTENCE_RE.split(instructions)
+    steps = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
+
+    return steps[:10]  # Limit to 10 steps
+
+
+def determine_difficulty(ingredient_count: int, step_count: int) -> str:
+    """Determine recipe difficulty based on ingredients and steps"""
+    total_complexity = ingredient_count + step_count
+
+    if total_complexity <= 8:
+        return "Easy"
+    elif total_complexity <= 15:
+        return "Medium"
+    else:
+        return "Hard"
+
+
+def transform_mealdb_recipe(meal: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform MealDB recipe format to our internal format"""
+    ingredients = [
+        format_ingredient(measure, ingredient) for measure, ingredient in mealdb_ingredient_pairs(meal)
+    ]
+
+    # Extract steps from instructions
+    steps = parse_instructions_to_steps(meal.get("strInstructions", ""))
+
+    return {
+        "id": meal.get("idMeal", ""),
+        "title": meal.get("strMeal", ""),
+        "ingredients": ingredients,
+        "steps": steps,
+        # Estimated: MealDB doesn't provide prep and cook times
+        "prepTime": "15 minutes",
+        "cookTime": "30 minutes",
+        "difficulty": determine_difficulty(len(ingredients), len(steps)),
+        "cuisine": meal.get("strArea", "Unknown"),
+        "source": "mealdb"
+    }
+
+
+class MealTransformer:
+    """Transforms MealDB meals, memoizing results per meal
+
+    A meal is usually returned by many different searches, so transformed
+    meals are kept in a bounded LRU keyed by ``idMeal`` plus a hash of the
+    payload; an edited upstream meal gets a new key and is transformed again.
+    Callers get their own copy of the dict and of its lists, so changing a
+    returned recipe never reaches the memo.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Any, int], Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, meal: Dict[str, Any]) -> Optional[Tuple[Any, int]]:
+        try:
+            return meal.get("idMeal"), hash(tuple(meal.items()))
+        except TypeError:
+            return None  # unhashable values: not a payload we can memoize
+
+    @staticmethod
+    def _copy(recipe: Dict[str, Any]) -> Dict[str, Any]:
+        return {**recipe, "ingredients": list(recipe["ingredients"]), "steps": list(recipe["steps"])}
+
+    def transform(self, meal: Dict[str, Any]) -> Dict[str, Any]:
+        key = self._key(meal) if self.max_entries > 0 else None
+        if key is not None:
+            recipe = self._entries.get(key)
+            if recipe is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(recipe)
+
+        self.misses += 1
+        recipe = transform_mealdb_recipe(meal)
+        if key is not None:
+            self._entries[key] = recipe
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._copy(recipe)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
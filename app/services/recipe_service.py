@@ -1,47 +1,235 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Awaitable, List, Dict, Any, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from app.core.metrics import SERVICE_CALL_SECONDS, timed
 from app.models.recipe import RecipeCreate, RecipeUpdate
-from app.repositories.recipe_repository import RecipeRepository
+from app.repositories.async_recipe_repository import AsyncRecipeRepository
+from app.repositories.async_mealdb_mirror_repository import ExecutorMealDBMirrorRepository
 from app.services.mealdb_service import MealDBService
 
 
+# Per-source outcomes reported in SearchResults.sources_status
+SOURCE_OK = "ok"
+SOURCE_TIMEOUT = "timeout"
+SOURCE_ERROR = "error"
+
+_timed = timed(SERVICE_CALL_SECONDS, service="recipes")
+
+
+@dataclass
+class SearchResults:
+    """Combined search results with the outcome of each source"""
+    recipes: List[Dict[str, Any]]
+    sources_status: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        """Whether any source failed to contribute its results"""
+        return any(status != SOURCE_OK for status in self.sources_status.values())
+
+
+@dataclass
+class RecipePage:
+    """One page of a recipe listing"""
+    recipes: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class BulkImportResult:
+    """Outcome of a bulk import: created IDs in input order, and per-item errors"""
+    ids: List[int] = field(default_factory=list)
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def created(self) -> int:
+        return len(self.ids)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last ID of a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps({"after": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        after_id = payload["after"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(after_id, int):
+        raise ValueError("Invalid cursor")
+    return after_id
+
+
 class RecipeService:
-    def __init__(self, repository: RecipeRepository, mealdb_service: MealDBService):
+    def __init__(
+        self,
+        repository: AsyncRecipeRepository,
+        mealdb_service: MealDBService,
+        internal_timeout: float = 2.0,
+        mealdb_timeout: float = 3.0,
+        mirror: Optional[ExecutorMealDBMirrorRepository] = None,
+    ):
         self.repository = repository
         self.mealdb_service = mealdb_service
+        self.internal_timeout = internal_timeout
+        self.mealdb_timeout = mealdb_timeout
+        # Mirror mode: MealDB searches are answered from the local mirror
+        self.mirror = mirror
 
-    def get_all_recipes(self) -> List[Dict[str, Any]]:
+    async def get_all_recipes(self) -> List[Dict[str, Any]]:
         """Get all recipes"""
-        return self.repository.get_all_recipes()
+        return await self.repository.get_all_recipes()
+
+    @_timed
+    async def list_recipes(
+        self, limit: int, cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None
+    ) -> RecipePage:
+        """Get a page of recipes in ID order
+
+        ``cursor`` is the ``next_cursor`` of the previous page; ``next_cursor``
+        is None on the last page. Raises ValueError for a malformed cursor or
+        unknown fields.
+        """
+        after_id = decode_cursor(cursor) if cursor else None
+        # Fetch one extra row to learn whether another page follows
+        recipes = await self.repository.list_recipes(limit + 1, after_id=after_id, fields=fields)
+        if len(recipes) > limit:
+            recipes = recipes[:limit]
+            return RecipePage(recipes, encode_cursor(recipes[-1]["id"]))
+        return RecipePage(recipes)
+
+    def export_recipes(self, after_id: Optional[int] = None, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every recipe in ID order, starting after ``after_id``"""
+        return self.repository.iter_recipes(after_id=after_id, batch_size=batch_size)
 
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
+    async def get_version(self, recipe_id: Optional[int] = None) -> str:
+        """Change token for all recipes, or for one recipe"""
+        return await self.repository.get_version(recipe_id)
+
+    @_timed
+    async def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict[str, Any]]:
         """Get a recipe by ID"""
-        return self.repository.get_recipe_by_id(recipe_id)
+        return await self.repository.get_recipe_by_id(recipe_id)
+
+    @_timed
+    async def find_by_ingredients(self, ingredients: Sequence[str], limit: int = 50) -> List[Dict[str, Any]]:
+        """Find internal recipes by the ingredients on hand, best coverage first"""
+        return await self.repository.find_by_ingredients(ingredients, limit=limit)
 
-    def search_recipes(self, query: str) -> List[Dict[str, Any]]:
-        """Search recipes by title (case-insensitive) - combines internal and MealDB results"""
-        # Get internal recipes
-        internal_recipes = self.repository.search_recipes(query)
+    @_timed
+    async def search_recipes(self, query: str, limit: int = 50, highlight: bool = False) -> SearchResults:
+        """Search recipes (case-insensitive) - combines internal and MealDB results
+
+        Both sources are queried concurrently, each under its own deadline. A
+        source that times out or fails contributes no results and is flagged
+        in ``sources_status``; the other source's results are still returned.
+        In mirror mode, MealDB results come from the local mirror, and
+        TheMealDB (through its cache) is only asked when the mirror has no
+        match.
+        """
+        (internal_recipes, internal_status), (mealdb_recipes, mealdb_status) = await asyncio.gather(
+            self._run_source(
+                "internal",
+                self.repository.search_recipes(query, limit=limit, highlight=highlight),
+                self.internal_timeout,
+            ),
+            # MealDB recipes (from the mirror, or with caching)
+            self._run_source("mealdb", self._search_mealdb(query, limit, highlight), self.mealdb_timeout),
+        )
         
         # Add source field to internal recipes
         for recipe in internal_recipes:
             recipe["source"] = "internal"
         
-        # Get MealDB recipes (with caching)
-        mealdb_recipes = self.mealdb_service.search_recipes(query)
-        
         # Combine results (internal first, then MealDB)
-        combined_results = internal_recipes + mealdb_recipes
-        
-        return combined_results
+        return SearchResults(
+            recipes=internal_recipes + mealdb_recipes,
+            sources_status={"internal": internal_status, "mealdb": mealdb_status},
+        )
+
+    async def _search_mealdb(self, query: str, limit: int, highlight: bool) -> List[Dict[str, Any]]:
+        """Search MealDB recipes, locally first when a mirror is configured"""
+        if self.mirror is not None:
+            recipes = await self.mirror.search_recipes(query, limit=limit, highlight=highlight)
+            if recipes:
+                return recipes
+        return await self.mealdb_service.search_recipes(query, raise_errors=True)
 
-    def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
+    async def _run_source(
+        self, name: str, search: Awaitable[List[Dict[str, Any]]], timeout: float
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """Await one search source under a deadline, reporting its outcome"""
+        try:
+            return await asyncio.wait_for(search, timeout), SOURCE_OK
+        except asyncio.TimeoutError:
+            print(f"Search source '{name}' timed out after {timeout}s")
+            return [], SOURCE_TIMEOUT
+        except Exception as e:
+            print(f"Search source '{name}' failed: {e}")
+            return [], SOURCE_ERROR
+
+    @_timed
+    async def create_recipe(self, recipe_data: RecipeCreate) -> Dict[str, Any]:
         """Create a new recipe"""
-        return self.repository.create_recipe(recipe_data)
+        return await self.repository.create_recipe(recipe_data)
+
+    @_timed
+    async def import_recipes(self, items: AsyncIterable[Any], chunk_size: int = 1000) -> BulkImportResult:
+        """Validate and store recipes from a stream of raw items
+
+        Items are validated as ``RecipeCreate`` and written in transactions
+        of ``chunk_size``, so memory stays bounded for long streams. An item
+        may also be an exception (e.g. a line that was not valid JSON). Items
+        that are invalid or fail to store are reported by their position
+        without aborting the rest of the import.
+        """
+        result = BulkImportResult()
+        chunk: List[Tuple[int, RecipeCreate]] = []
+
+        async def flush() -> None:
+            outcomes = await self.repository.bulk_create([recipe for _, recipe in chunk])
+            for (index, _), outcome in zip(chunk, outcomes):
+                if "id" in outcome:
+                    result.ids.append(outcome["id"])
+                else:
+                    result.errors.append({"index": index, "error": outcome["error"]})
+            chunk.clear()
+
+        index = 0
+        async for item in items:
+            if isinstance(item, Exception):
+                result.errors.append({"index": index, "error": str(item)})
+            else:
+                try:
+                    chunk.append((index, RecipeCreate.model_validate(item)))
+                except ValidationError as e:
+                    result.errors.append({"index": index, "error": "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+                        for err in e.errors()
+                    )})
+                if len(chunk) >= chunk_size:
+                    await flush()
+            index += 1
+        if chunk:
+            await flush()
+        return result
 
-    def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
+    @_timed
+    async def update_recipe(self, recipe_id: int, recipe_data: RecipeUpdate) -> Optional[Dict[str, Any]]:
         """Update an existing recipe"""
-        return self.repository.update_recipe(recipe_id, recipe_data)
+        return await self.repository.update_recipe(recipe_id, recipe_data)
 
-    def delete_recipe(self, recipe_id: int) -> bool:
+    @_timed
+    async def delete_recipe(self, recipe_id: int) -> bool:
         """Delete a recipe by ID"""
-        return self.repository.delete_recipe(recipe_id)
+        return await self.repository.delete_recipe(recipe_id)
@@ -0,0 +1,193 @@
+import asyncio
+import string
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from app.repositories.async_mealdb_mirror_repository import ExecutorMealDBMirrorRepository
+from app.services.cache_service import CacheService
+from app.services.mealdb_service import MealDBError, MealDBService
+
+
+# Held while a warm-up runs, so workers starting together crawl only once
+WARMUP_LOCK = "mealdb_warmup_lock"
+# Shortest title word preloaded as a search query
+MIN_QUERY_WORD = 3
+
+Progress = Callable[[str, int, int], None]
+
+
+@dataclass
+class WarmupResult:
+    """Outcome of a warm-up run"""
+    tasks_run: int = 0
+    tasks_skipped: int = 0
+    failed_tasks: List[str] = field(default_factory=list)
+    meals: int = 0
+    queries_cached: int = 0
+    locked: bool = False  # another process was already warming up
+
+
+def preload_queries(recipes: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Search results to preload, derived from the mirrored catalog
+
+    Covers every full title and every title word, resolved like TheMealDB's
+    name search does: a case-insensitive substring match on the title.
+    """
+    titles = [(recipe["title"].lower(), recipe) for recipe in recipes]
+    queries = set()
+    for title, _ in titles:
+        queries.add(title.strip())
+        queries.update(word for word in title.split() if len(word) >= MIN_QUERY_WORD)
+    return {
+        query: [recipe for title, recipe in titles if query in title]
+        for query in sorted(queries) if query
+    }
+
+
+class CacheWarmupService:
+    """Crawls TheMealDB catalog into the local mirror and the search cache
+
+    Meals are listed by first letter (full payloads), then by category,
+    looking up only the meals the letter crawl missed. Each letter or
+    category is a task recorded in the mirror once done; tasks completed
+    within ``state_max_age`` are skipped, so an interrupted run resumes
+    where it stopped. Finally, search results for every title and title
+    word are preloaded into the cache from the mirror.
+    """
+
+    def __init__(
+        self,
+        mealdb_service: MealDBService,
+        cache_service: CacheService,
+        mirror: ExecutorMealDBMirrorRepository,
+        concurrency: int = 4,
+        state_max_age: float = 24 * 60 * 60,
+        lock_timeout: float = 15 * 60,
+    ):
+        self.mealdb_service = mealdb_service
+        self.cache_service = cache_service
+        self.mirror = mirror
+        self.concurrency = concurrency
+        self.state_max_age = state_max_age
+        self.lock_timeout = lock_timeout
+        self._upstream: Optional[asyncio.Semaphore] = None
+
+    async def run(self, full: bool = False, use_lock: bool = False, progress: Optional[Progress] = None) -> WarmupResult:
+        """Warm the mirror and the cache
+
+        ``full`` ignores completed tasks and crawls everything again.
+        ``use_lock`` skips the run if another process holds the warm-up lock.
+        ``progress`` is called with (stage, done, total) as tasks finish.
+        """
+        result = WarmupResult()
+        lock = None
+        if use_lock:
+            lock = await self.cache_service.acquire_lock(WARMUP_LOCK, self.lock_timeout)
+            if lock is None:
+                result.locked = True
+                return result
+        # Bounds this run's upstream calls, leaving MealDB capacity for searches
+        self._upstream = asyncio.Semaphore(self.concurrency)
+        try:
+            if full:
+                await self.mirror.reset_tasks()
+            since = time.time() - self.state_max_age
+            completed = await self.mirror.completed_tasks(since)
+
+            letters = {f"letter:{letter}": letter for letter in string.ascii_lowercase}
+            await self._run_tasks("letters", letters, self._crawl_letter, completed, result, progress)
+
+            try:
+                names = await self._call(self.mealdb_service.list_categories())
+                categories = {f"category:{name}": name for name in names}
+            except MealDBError as e:
+                print(f"Warm-up could not list categories: {e}")
+                result.failed_tasks.append("categories")
+                categories = {}
+            known_ids = await self.mirror.synced_ids(since)
+            await self._run_tasks(
+                "categories", categories,
+                lambda category: self._crawl_category(category, known_ids),
+                completed, result, progress,
+            )
+
+            result.queries_cached = await self._preload_cache(progress)
+            return result
+        finally:
+            if lock is not None:
+                await self.cache_service.release_lock(lock)
+
+    async def _run_tasks(
+        self,
+        stage: str,
+        tasks: Dict[str, Any],
+        crawl: Callable[[Any], Awaitable[int]],
+        completed: Dict[str, int],
+        result: WarmupResult,
+        progress: Optional[Progress],
+    ) -> None:
+        """Run the tasks not yet completed, recording each one that succeeds"""
+        pending = {task: arg for task, arg in tasks.items() if task not in completed}
+        result.tasks_skipped += len(tasks) - len(pending)
+        done = 0
+
+        async def run_task(task: str, arg: Any) -> None:
+            nonlocal done
+            try:
+                meals = await crawl(arg)
+            except MealDBError as e:
+                print(f"Warm-up task {task} failed: {e}")
+                result.failed_tasks.append(task)
+                return
+            await self.mirror.mark_task_completed(task, meals)
+            result.tasks_run += 1
+            result.meals += meals
+            done += 1
+            if progress is not None:
+                progress(stage, done, len(pending))
+
+        await asyncio.gather(*(run_task(task, arg) for task, arg in pending.items()))
+
+    async def _call(self, request: Awaitable[Any]) -> Any:
+        """Await an upstream request within this run's concurrency limit"""
+        async with self._upstream:
+            return await request
+
+    def _transform(self, meals: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {**self.mealdb_service._transform_mealdb_recipe(meal), "category": meal.get("strCategory")}
+            for meal in meals
+        ]
+
+    async def _crawl_letter(self, letter: str) -> int:
+        meals = await self._call(self.mealdb_service.meals_by_first_letter(letter))
+        return await self.mirror.upsert_recipes(self._transform(meals))
+
+    async def _crawl_category(self, category: str, known_ids: set) -> int:
+        meal_ids = await self._call(self.mealdb_service.meal_ids_in_category(category))
+        missing = [meal_id for meal_id in meal_ids if meal_id not in known_ids]
+        meals = await asyncio.gather(*(self._call(self.mealdb_service.lookup_meal(meal_id)) for meal_id in missing))
+        recipes = self._transform(meal for meal in meals if meal is not None)
+        known_ids.update(recipe["id"] for recipe in recipes)
+        return await self.mirror.upsert_recipes(recipes)
+
+    async def _preload_cache(self, progress: Optional[Progress]) -> int:
+        """Write search results for titles and title words into the cache"""
+        recipes = await self.mirror.all_recipes()
+        queries = preload_queries(recipes)
+        semaphore = asyncio.Semaphore(self.concurrency * 4)
+        cached = 0
+
+        async def cache(query: str, results: List[Dict[str, Any]]) -> None:
+            nonlocal cached
+            async with semaphore:
+                # Skip the local tier: preloading would evict this process's hot entries
+                if await self.cache_service.cache_search_results(query, results, local=False):
+                    cached += 1
+                    if progress is not None and cached % 100 == 0:
+                        progress("queries", cached, len(queries))
+
+        await asyncio.gather(*(cache(query, results) for query, results in queries.items()))
+        if progress is not None:
+            progress("queries", cached, len(queries))
+        return cached
@@ -0,0 +1,103 @@
+"""Size and throughput of the ingredient/step column encodings
+
+Builds a synthetic catalog (1M recipes by default) twice in temporary
+SQLite databases, once with the lists stored as JSON text (as written
+before the packed format, by ``json.dumps``) and once packed, then reports
+file and column sizes, insert throughput, and read throughput for a
+list-style query that skips the list columns and for full decoding.
+
+    python -m benchmarks.bench_list_encoding [--recipes 1000000] [--seed 7]
+"""
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+from app.core import serialization
+from app.repositories.list_encoding import decode_list, encode_list
+from benchmarks.catalog import synthetic_recipes
+
+
+SCHEMA = '''
+    CREATE TABLE recipes (
+        id INTEGER PRIMARY KEY, title TEXT NOT NULL, ingredients NOT NULL, steps NOT NULL,
+        prepTime TEXT NOT NULL, cookTime TEXT NOT NULL, difficulty TEXT NOT NULL, cuisine TEXT NOT NULL
+    )
+'''
+
+
+def build(path: Path, count: int, seed: int, encode: Callable[[List[str]], Any]) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(SCHEMA)
+    start = time.perf_counter()
+    batch = []
+    for recipe_id, recipe in enumerate(synthetic_recipes(count, seed), start=1):
+        batch.append((
+            recipe_id, recipe["title"], encode(recipe["ingredients"]), encode(recipe["steps"]),
+            recipe["prepTime"], recipe["cookTime"], recipe["difficulty"], recipe["cuisine"],
+        ))
+        if len(batch) >= 10000:
+            conn.executemany("INSERT INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch.clear()
+    conn.executemany("INSERT INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return elapsed
+
+
+def column_bytes(path: Path) -> int:
+    conn = sqlite3.connect(path)
+    size = conn.execute(
+        "SELECT SUM(length(CAST(ingredients AS BLOB)) + length(CAST(steps AS BLOB))) FROM recipes"
+    ).fetchone()[0]
+    conn.close()
+    return size
+
+
+def scan(path: Path, columns: str, decode: Callable[[Any], Any]) -> float:
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    cursor = conn.execute(f"SELECT {columns} FROM recipes ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        for row in rows:
+            decode(row)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=1_000_000, help="synthetic catalog size")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    n = args.recipes
+
+    encodings = {
+        "json": (json.dumps, serialization.loads),
+        "packed": (encode_list, decode_list),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (encode, decode) in encodings.items():
+            path = Path(tmp) / f"{name}.db"
+            insert = build(path, n, args.seed, encode)
+            list_style = scan(path, "id, title, cuisine", lambda row: {"id": row[0], "title": row[1], "cuisine": row[2]})
+            full = scan(path, "id, title, ingredients, steps", lambda row: (decode(row[2]), decode(row[3])))
+            print(
+                f"{name:<7} file {path.stat().st_size / 2**20:8.1f} MiB  columns {column_bytes(path) / 2**20:8.1f} MiB  "
+                f"insert {n / insert:>9,.0f}/s  list-style read {n / list_style:>10,.0f}/s  "
+                f"full decode {n / full:>9,.0f}/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""Load test of the API endpoints against local stand-ins for Redis and TheMealDB
+
+Serves a synthetic catalog (1k, 100k or 1M recipes; see ``benchmarks.catalog``)
+with Redis replaced by an in-process fakeredis server and TheMealDB by a stub
+HTTP server answering from ``benchmarks/data/mealdb_meals.json``, so runs
+need no network and are repeatable. The app runs in-process (requests go
+through ``httpx.ASGITransport`` on the benchmark's event loop) or under
+uvicorn in a subprocess. Each scenario (listing pages, single recipes,
+search, creates, updates) is driven by ``--concurrency`` clients for
+``--duration`` seconds after an unrecorded warm-up. With ``--bulk-load``
+a background client keeps posting bulk imports of that many recipes
+while each scenario runs, to see how latency holds up during imports. The
+app's warnings and errors (timeouts, failed upstream calls) are printed as
+they happen, ahead of the report.
+
+Results (RPS and p50/p95/p99 latency per scenario, plus the commit and
+settings of the run) are printed and written as JSON with ``--output``.
+``--compare`` diffs a run against an earlier result; with
+``--max-regression`` the run fails when a percentile or the RPS of any
+scenario regresses by more than that percentage.
+
+    python -m benchmarks.bench_load [--recipes 1000] [--concurrency 16] [--duration 10]
+        [--server inprocess|uvicorn] [--output BENCH.json] [--compare BASELINE.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+import httpx
+import uvicorn
+from fakeredis import TcpFakeServer
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.core.config import get_settings
+from benchmarks.catalog import DEFAULT_CATALOG_DIR, WORDS, build_catalog, synthetic_recipe, working_copy
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "mealdb_meals.json"
+
+# (method, path, JSON body) of the next request
+RequestSpec = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Stand-ins for Redis and TheMealDB
+
+def start_fake_redis() -> Tuple[TcpFakeServer, str]:
+    """fakeredis speaking the Redis protocol on a local port, served from a thread"""
+    server = TcpFakeServer(("127.0.0.1", free_port()), server_type="redis")
+    threading.Thread(target=server.serve_forever, name="fake-redis", daemon=True).start()
+    host, port = server.server_address
+    return server, f"redis://{host}:{port}"
+
+
+def mealdb_stub(corpus: List[Dict[str, Any]], latency: float) -> Starlette:
+    """TheMealDB endpoints the app calls, answered from a corpus of stored meals
+
+    Name searches return the corpus meals whose name contains the query
+    plus one meal made up for it, so every query has a MealDB result.
+    ``latency`` seconds are added to each response, as a real upstream would.
+    """
+    def made_up_meal(query: str) -> Dict[str, Any]:
+        checksum = zlib.crc32(query.encode())
+        return {
+            **corpus[checksum % len(corpus)],
+            "idMeal": str(900000 + checksum % 100000),
+            "strMeal": f"{query.title()} Surprise",
+        }
+
+    def meals_response(meals: List[Dict[str, Any]]) -> JSONResponse:
+        return JSONResponse({"meals": meals or None})
+
+    async def search(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        if "f" in request.query_params:
+            letter = request.query_params["f"].lower()
+            return meals_response([m for m in corpus if m["strMeal"].lower().startswith(letter)])
+        query = request.query_params.get("s", "").strip().lower()
+        if not query:
+            return meals_response([])
+        return meals_response([m for m in corpus if query in m["strMeal"].lower()] + [made_up_meal(query)])
+
+    async def lookup(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return meals_response([m for m in corpus if m["idMeal"] == request.query_params.get("i")])
+
+    async def list_categories(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return meals_response([{"strCategory": c} for c in sorted({m["strCategory"] for m in corpus})])
+
+    async def filter_category(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        category = request.query_params.get("c")
+        return meals_response([
+            {"idMeal": m["idMeal"], "strMeal": m["strMeal"]} for m in corpus if m["strCategory"] == category
+        ])
+
+    return Starlette(routes=[
+        Route("/search.php", search),
+        Route("/lookup.php", lookup),
+        Route("/list.php", list_categories),
+        Route("/filter.php", filter_category),
+    ])
+
+
+class ThreadedServer:
+    """uvicorn serving an ASGI app from a background thread with its own event loop"""
+
+    def __init__(self, app: Any):
+        self.port = free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off", loop="asyncio")
+        )
+        self.thread = threading.Thread(target=self.server.run, name="mealdb-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> None:
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("MealDB stub server did not start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+# The app under test
+
+@asynccontextmanager
+async def inprocess_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the app in this process, with its lifespan (startup/shutdown) run around it"""
+    # Imported here: the app reads its settings from the environment set up by main()
+    from app.core.app import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(concurrency: int, workers: int, env: Dict[str, str]) -> AsyncIterator[httpx.AsyncClient]:
+    """Client calling the app served by uvicorn in a subprocess"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=REPO_ROOT, env={**os.environ, **env},
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+                try:
+                    if (await client.get("/ping")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# Scenarios and measurement
+
+class Scenario(ABC):
+    """Requests of one simulated client; each client gets its own instance and RNG"""
+
+    def __init__(self, rng: random.Random, max_id: int):
+        self.rng = rng
+        self.max_id = max_id
+
+    @abstractmethod
+    def next_request(self) -> RequestSpec:
+        """Method, path and JSON body of the next request"""
+        pass
+
+    def on_response(self, response: Optional[httpx.Response]) -> None:
+        pass
+
+
+class ListPages(Scenario):
+    """Pages through the catalog, following X-Next-Cursor"""
+    cursor: Optional[str] = None
+
+    def next_request(self) -> RequestSpec:
+        return "GET", f"/recipes?limit=20&cursor={self.cursor}" if self.cursor else "/recipes?limit=20", None
+
+    def on_response(self, response: Optional[httpx.Response]) -> None:
+        self.cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+
+
+class GetRecipe(Scenario):
+    def next_request(self) -> RequestSpec:
+        return "GET", f"/recipes/{self.rng.randint(1, self.max_id)}", None
+
+
+class Search(Scenario):
+    """One- and two-word queries over the catalog's vocabulary"""
+
+    def next_request(self) -> RequestSpec:
+        words = self.rng.sample(WORDS, self.rng.choice((1, 1, 2)))
+        return "GET", f"/recipes/search?q={'+'.join(words)}", None
+
+
+class CreateRecipe(Scenario):
+    def next_request(self) -> RequestSpec:
+        return "POST", "/recipes", synthetic_recipe(self.rng, self.rng.randrange(10**9))
+
+
+class UpdateRecipe(Scenario):
+    def next_request(self) -> RequestSpec:
+        recipe_id = self.rng.randint(1, self.max_id)
+        return "PUT", f"/recipes/{recipe_id}", synthetic_recipe(self.rng, self.rng.randrange(10**9))
+
+
+SCENARIOS = {"list": ListPages, "get": GetRecipe, "search": Search, "create": CreateRecipe, "update": UpdateRecipe}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Type[Scenario], max_id: int,
+    concurrency: int, duration: float, warmup: float, seed: int,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    recording = False
+
+    async def client_loop(simulated: Scenario, deadline: float) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            method, path, body = simulated.next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                response = None
+            elapsed = time.perf_counter() - start
+            simulated.on_response(response)
+            if recording:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                if response is None or response.status_code >= 400:
+                    errors += 1
+
+    clients = [scenario(random.Random(seed * 1000 + i), max_id) for i in range(concurrency)]
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(client_loop(c, deadline) for c in clients))
+    recording = True
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(c, start + duration) for c in clients))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 3)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+async def bulk_loader(client: httpx.AsyncClient, batch_size: int, seed: int, stop: asyncio.Event) -> int:
+    """Post bulk imports of ``batch_size`` recipes back to back until ``stop``; returns the recipes sent"""
+    rng = random.Random(seed)
+    sent = 0
+    while not stop.is_set():
+        batch = [synthetic_recipe(rng, rng.randrange(10**9)) for _ in range(batch_size)]
+        try:
+            await client.post("/recipes/bulk", json=batch)
+        except httpx.HTTPError:
+            pass
+        sent += batch_size
+    return sent
+
+
+# Reporting
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=REPO_ROOT).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'scenario':<10} {'requests':>9} {'errors':>7} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>10,.1f} "
+            f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f}"
+        )
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: Optional[float]) -> List[str]:
+    """Print the change of each metric against ``baseline``; returns the regressions over ``max_regression`` %"""
+    print(f"Compared with {baseline['meta'].get('commit', '?')} ({baseline['meta'].get('timestamp', '?')}):")
+    settings = ("server", "workers", "recipes", "seed", "concurrency", "duration", "mealdb_latency_ms", "bulk_load")
+    differing = [key for key in settings if baseline["meta"].get(key) != current["meta"].get(key)]
+    if differing:
+        print(f"  note: runs differ in {', '.join(differing)}; the numbers are not directly comparable")
+    regressions = []
+    for name, result in current["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        changes = []
+        metrics = [("rps", previous["rps"], result["rps"], -1)] + [
+            (q, previous["latency_ms"][q], result["latency_ms"][q], 1) for q in ("p50", "p95", "p99")
+        ]
+        for metric, old, new, worse_sign in metrics:
+            change = (new - old) / old * 100 if old else 0.0
+            changes.append(f"{metric} {old:g} -> {new:g} ({change:+.1f}%)")
+            if max_regression is not None and change * worse_sign > max_regression:
+                regressions.append(f"{name} {metric} {change:+.1f}%")
+        print(f"  {name:<8} " + ", ".join(changes))
+    return regressions
+
+
+async def run(args: argparse.Namespace, env: Dict[str, str], max_id: int) -> Dict[str, Dict[str, Any]]:
+    if args.server == "uvicorn":
+        client_context = uvicorn_client(args.concurrency, args.workers, env)
+    else:
+        client_context = inprocess_client()
+    results = {}
+    async with client_context as client:
+        for name in args.scenarios:
+            print(f"Running {name} for {args.duration:g}s at concurrency {args.concurrency}...", file=sys.stderr)
+            stop = asyncio.Event()
+            loader = asyncio.create_task(bulk_loader(client, args.bulk_load, args.seed, stop)) if args.bulk_load else None
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], max_id, args.concurrency, args.duration, args.warmup, args.seed
+            )
+            if loader is not None:
+                stop.set()
+                results[name]["bulk_loaded"] = await loader
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=1000, help="catalog size, e.g. 1000, 100000 or 1000000")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--catalog-dir", type=Path, default=DEFAULT_CATALOG_DIR, help="where built catalogs are kept")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="recorded seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--mealdb-latency", type=float, default=50.0, help="milliseconds added by the MealDB stub")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSON file of MealDB search payloads")
+    parser.add_argument("--bulk-load", type=int, default=0,
+                        help="recipes per bulk import posted in the background during each scenario (0: none)")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="earlier results (JSON) to diff against")
+    parser.add_argument("--max-regression", type=float,
+                        help="with --compare, fail if any metric is worse by more than this many percent")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    catalog = build_catalog(args.recipes, args.seed, args.catalog_dir)
+    corpus = json.loads(args.corpus.read_text())["meals"]
+    redis_server, redis_url = start_fake_redis()
+    mealdb = ThreadedServer(mealdb_stub(corpus, args.mealdb_latency / 1000))
+    mealdb.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = working_copy(catalog, Path(tmp), "recipes.db")
+            with sqlite3.connect(database) as conn:
+                max_id = conn.execute("SELECT MAX(id) FROM recipes").fetchone()[0]
+            env = {
+                "DATABASE_PATH": str(database),
+                "REDIS_URL": redis_url,
+                "MEALDB_BASE_URL": mealdb.url,
+                "MEALDB_MIRROR_MODE": "false",
+                "MEALDB_WARMUP_ON_STARTUP": "false",
+            }
+            os.environ.update(env)
+            get_settings.cache_clear()
+            results = asyncio.run(run(args, env, max_id))
+    finally:
+        mealdb.stop()
+        redis_server.shutdown()
+        redis_server.server_close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "server": args.server,
+            "workers": args.workers if args.server == "uvicorn" else None,
+            "recipes": args.recipes,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mealdb_latency_ms": args.mealdb_latency,
+            "bulk_load": args.bulk_load,
+        },
+        "scenarios": results,
+    }
+    print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.max_regression)
+        if regressions:
+            print(f"Regressions over {args.max_regression:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
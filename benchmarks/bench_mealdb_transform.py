@@ -0,0 +1,103 @@
+"""Micro-benchmark for the MealDB transformation stage
+
+Replays search responses built from a corpus of stored MealDB payloads
+through the transform used before memoization (uncompiled patterns, keys
+rebuilt per meal), the compiled transform alone, and the memoizing
+``MealTransformer``. Each response is decoded from JSON first, so every
+meal arrives as a fresh dict as it would from the network.
+
+    python -m benchmarks.bench_mealdb_transform [--corpus PATH] [--responses 5000]
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from app.services.mealdb_transform import MealTransformer, transform_mealdb_recipe
+
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "mealdb_meals.json"
+
+
+def legacy_transform(meal: Dict[str, Any]) -> Dict[str, Any]:
+    """The transform as it was before this stage: reference for the benchmark"""
+    ingredients = []
+    for i in range(1, 21):
+        ingredient = meal.get(f"strIngredient{i}")
+        measure = meal.get(f"strMeasure{i}")
+        if ingredient and ingredient != "null" and ingredient.strip():
+            ingredient = ingredient.strip()
+            measure = measure.strip() if measure else ""
+            ingredients.append(f"{measure} {ingredient}" if measure else ingredient)
+
+    steps: List[str] = []
+    instructions = meal.get("strInstructions", "")
+    if instructions:
+        instructions = instructions.replace('\r\n', '\n').replace('\r', '\n')
+        for pattern in (r'STEP\s+\d+[:\s]*', r'\d+\.\s*', r'^\s*[A-Z][^.]*\.'):
+            parts = re.split(pattern, instructions, flags=re.IGNORECASE | re.MULTILINE)
+            if len(parts) > 1:
+                steps = [p.strip() for p in parts[1:] if p.strip() and len(p.strip()) > 10]
+                if steps:
+                    break
+        if not steps:
+            sentences = re.split(r'[.!?]+', instructions)
+            steps = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10][:10]
+
+    total = len(ingredients) + len(steps)
+    return {
+        "id": meal.get("idMeal", ""),
+        "title": meal.get("strMeal", ""),
+        "ingredients": ingredients,
+        "steps": steps,
+        "prepTime": "15 minutes",
+        "cookTime": "30 minutes",
+        "difficulty": "Easy" if total <= 8 else "Medium" if total <= 15 else "Hard",
+        "cuisine": meal.get("strArea", "Unknown"),
+        "source": "mealdb",
+    }
+
+
+def build_responses(meals: List[Dict[str, Any]], count: int, seed: int = 7) -> List[str]:
+    """Encoded search responses, each holding a random subset of the corpus"""
+    rng = random.Random(seed)
+    return [
+        json.dumps({"meals": rng.sample(meals, rng.randint(1, len(meals)))})
+        for _ in range(count)
+    ]
+
+
+def run(name: str, transform: Callable[[Dict[str, Any]], Dict[str, Any]], responses: List[str]) -> float:
+    meals = 0
+    start = time.perf_counter()
+    for body in responses:
+        for meal in json.loads(body)["meals"]:
+            transform(meal)
+            meals += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} {meals / elapsed:>12,.0f} meals/s  ({elapsed * 1000:.1f} ms for {meals} meals)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSON file of MealDB search payloads")
+    parser.add_argument("--responses", type=int, default=5000, help="search responses to replay")
+    args = parser.parse_args()
+
+    meals = json.loads(args.corpus.read_text())["meals"]
+    responses = build_responses(meals, args.responses)
+    for meal in meals:
+        assert transform_mealdb_recipe(meal) == legacy_transform(meal), meal["idMeal"]
+
+    baseline = run("legacy", legacy_transform, responses)
+    run("compiled", MealTransformer(max_entries=0).transform, responses)
+    memoized = MealTransformer()
+    elapsed = run("memoized", memoized.transform, responses)
+    print(f"memoized speedup over legacy: {baseline / elapsed:.1f}x  (cache {memoized.stats()})")
+
+
+if __name__ == "__main__":
+    main()
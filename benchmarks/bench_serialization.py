@@ -0,0 +1,97 @@
+"""Benchmark for JSON serialization at its three hot points
+
+Compares the standard library against orjson for decoding stored
+ingredient/step columns, for encoding and decoding cache payloads, and for
+HTTP responses: FastAPI's default handling (validate, convert to
+JSON-compatible objects, encode with ``json``) against ``validated_response``
+with each backend. Recipes are built from the MealDB corpus.
+
+    python -m benchmarks.bench_serialization [--recipes 100] [--rounds 2000]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+from app.core import serialization
+from app.services.mealdb_transform import transform_mealdb_recipe
+
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "mealdb_meals.json"
+
+_RECIPE_LIST = TypeAdapter(List[Dict[str, Any]])
+
+
+def build_recipes(corpus: Path, count: int) -> List[Dict[str, Any]]:
+    meals = json.loads(corpus.read_text())["meals"]
+    recipes = []
+    for i in range(count):
+        recipe = transform_mealdb_recipe(meals[i % len(meals)])
+        recipes.append({**recipe, "id": i + 1})
+    return recipes
+
+
+def fastapi_default(recipes: List[Dict[str, Any]]) -> bytes:
+    """What FastAPI does with a returned List[Dict[str, Any]] before this change"""
+    value = _RECIPE_LIST.validate_python(recipes)
+    content = _RECIPE_LIST.dump_python(value, mode="json")
+    return JSONResponse(content).body
+
+
+def run(name: str, func: Callable[[], Any], rounds: int, items: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<28} {rounds * items / elapsed:>12,.0f} recipes/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="JSON file of MealDB search payloads")
+    parser.add_argument("--recipes", type=int, default=100, help="recipes per response or cache entry")
+    parser.add_argument("--rounds", type=int, default=2000, help="repetitions of each stage")
+    args = parser.parse_args()
+
+    recipes = build_recipes(args.corpus, args.recipes)
+    # Column values as stored by the repository before this change
+    columns = [(json.dumps(r["ingredients"]), json.dumps(r["steps"])) for r in recipes]
+    assert jsonable_encoder(recipes) == recipes  # already JSON-compatible
+
+    results: Dict[str, Dict[str, float]] = {}
+    for backend in ("json", "orjson"):
+        serialization.set_backend(backend)
+        print(f"{backend}:")
+        encoded = [serialization.dumps(recipe) for recipe in recipes]
+        results[backend] = {
+            "row decode": run(
+                "row decode", lambda: [(serialization.loads(i), serialization.loads(s)) for i, s in columns],
+                args.rounds, len(recipes),
+            ),
+            "cache encode": run(
+                "cache encode", lambda: [serialization.dumps(recipe) for recipe in recipes], args.rounds, len(recipes),
+            ),
+            "cache decode": run(
+                "cache decode", lambda: [serialization.loads(data) for data in encoded], args.rounds, len(recipes),
+            ),
+            "response": run(
+                "validated_response", lambda: serialization.validated_response(_RECIPE_LIST, recipes).body,
+                args.rounds, len(recipes),
+            ),
+        }
+        if backend == "json":
+            results["fastapi default"] = {
+                "response": run("fastapi default response", lambda: fastapi_default(recipes), args.rounds, len(recipes))
+            }
+    print("orjson speedup over json:")
+    for stage, elapsed in results["orjson"].items():
+        print(f"  {stage:<28} {results['json'][stage] / elapsed:.1f}x")
+    print(f"  {'response vs fastapi default':<28} {results['fastapi default']['response'] / results['orjson']['response']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Synthetic recipe catalogs for benchmarks
+
+Recipes are generated deterministically from a seed, with ingredient and
+step lists of realistic length, so runs against the same size and seed see
+the same data.
+"""
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from app.models.recipe import RecipeCreate
+from app.repositories.sqlite_recipe_repository import SQLiteRecipeRepository
+
+
+WORDS = (
+    "chicken beef garlic onion tomato basil rice pasta lemon butter flour sugar egg milk cream "
+    "cheese pepper salt thyme oregano cumin paprika ginger soy honey vinegar carrot celery potato "
+    "spinach mushroom olive oil coconut chili lime coriander parsley shallot leek fennel crème brûlée"
+).split()
+UNITS = ("1 cup", "2 tbsp", "1 tsp", "200g", "3", "1/2 cup", "a pinch of", "")
+
+DEFAULT_CATALOG_DIR = Path(tempfile.gettempdir()) / "recipe-benchmarks"
+
+
+def synthetic_recipe(rng: random.Random, number: int) -> Dict[str, Any]:
+    """One recipe in the shape of RecipeCreate"""
+    return {
+        "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{number}",
+        "ingredients": [
+            f"{rng.choice(UNITS)} {' '.join(rng.sample(WORDS, rng.randint(1, 3)))}".strip()
+            for _ in range(rng.randint(4, 15))
+        ],
+        "steps": [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20))).capitalize() + "."
+            for _ in range(rng.randint(3, 10))
+        ],
+        "prepTime": f"{rng.randint(1, 12) * 5} minutes",
+        "cookTime": f"{rng.randint(1, 24) * 5} minutes",
+        "difficulty": rng.choice(("Easy", "Medium", "Hard")),
+        "cuisine": rng.choice(WORDS).title(),
+    }
+
+
+def synthetic_recipes(count: int, seed: int = 7) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(count):
+        yield synthetic_recipe(rng, i)
+
+
+def build_catalog(
+    count: int, seed: int = 7, catalog_dir: Path = DEFAULT_CATALOG_DIR, batch_size: int = 5000
+) -> Path:
+    """Path of a SQLite database holding ``count`` synthetic recipes (plus the seed recipes)
+
+    Catalogs are built through the repository, so search and ingredient
+    indexes are filled as in production, and kept in ``catalog_dir`` to be
+    reused by later runs: building 1M recipes takes minutes.
+    """
+    path = catalog_dir / f"catalog-{count}-{seed}.db"
+    if path.exists():
+        return path
+    catalog_dir.mkdir(parents=True, exist_ok=True)
+    building = path.with_suffix(".building")
+    for stale in catalog_dir.glob(building.name + "*"):
+        stale.unlink()
+    print(f"Building catalog of {count} recipes in {path}")
+    start = time.perf_counter()
+    repository = SQLiteRecipeRepository(db_path=str(building), pool_size=1)
+    try:
+        batch = []
+        for recipe in synthetic_recipes(count, seed):
+            batch.append(RecipeCreate(**recipe))
+            if len(batch) >= batch_size:
+                repository.bulk_create(batch)
+                batch.clear()
+        repository.bulk_create(batch)
+    finally:
+        repository.close()  # the last connection to close checkpoints the WAL
+    building.rename(path)
+    print(f"Built catalog in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def working_copy(catalog: Path, directory: Path, name: Optional[str] = None) -> Path:
+    """Copy of a catalog for a run to write to, leaving the cached one untouched"""
+    target = directory / (name or catalog.name)
+    shutil.copyfile(catalog, target)
+    return target
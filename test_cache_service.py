@@ -0,0 +1,135 @@
+import asyncio
+import json
+from app.core.redis import RedisConnectionManager
+from app.services.cache_service import CachedSearch, CacheService
+from app.services.local_cache import LocalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_local_cache_expires_entries():
+    clock = FakeClock()
+    cache = LocalCache(default_ttl=10, clock=clock)
+    cache.set("a", [1], size=3)
+    cache.set("b", [2], size=3, ttl=2)
+    clock.now += 5
+    assert cache.get("a") == [1]
+    assert cache.get("b") is None
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_local_cache_evicts_least_recently_used_by_count():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", "A", size=1)
+    cache.set("b", "B", size=1)
+    cache.get("a")
+    cache.set("c", "C", size=1)
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_local_cache_evicts_by_bytes():
+    cache = LocalCache(max_bytes=10)
+    cache.set("a", "A", size=4)
+    cache.set("b", "B", size=4)
+    cache.set("c", "C", size=4)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+    assert cache.set("huge", "H", size=11) is False
+    assert cache.get("huge") is None
+
+
+def test_local_cache_delete_prefix_and_hit_rate():
+    cache = LocalCache()
+    cache.set("mealdb_search:pasta", [], size=2)
+    cache.set("mealdb_search:pastry", [], size=2)
+    cache.set("mealdb_search:rice", [], size=2)
+    assert cache.delete_prefix("mealdb_search:past") == 2
+    assert cache.get("mealdb_search:rice") == []
+    assert cache.get("mealdb_search:pasta") is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_cache_service_serves_l1_without_redis():
+    # Nothing listens on port 1: L2 is unavailable, so hits must come from L1
+    service = CacheService(redis_manager=RedisConnectionManager("redis://127.0.0.1:1", retries=0))
+    results = [{"id": "1", "title": "Pasta"}]
+
+    async def run():
+        assert await service.cache_search_results(" Pasta ", results) is False
+        assert await service.get_cached_search_results("pasta") == results
+        assert await service.get_cached_search_results("rice") is None
+        return await service.get_cache_stats()
+
+    stats = asyncio.run(run())
+    assert stats["l1"]["hits"] == 1
+    assert stats["l1"]["misses"] == 1
+    assert stats["l2"] == {"hits": 0, "misses": 0, "hit_rate": 0.0}
+
+
+def test_cache_service_applies_invalidations_from_other_processes():
+    service = CacheService("redis://127.0.0.1:1")
+    service.local_cache.set("mealdb_search:pasta", [], size=2)
+    service.local_cache.set("mealdb_search:rice", [], size=2)
+
+    # Own messages are ignored
+    service._handle_invalidation({"type": "message", "data": json.dumps(
+        {"origin": service._origin, "keys": ["mealdb_search:pasta"], "all": False})})
+    assert service.local_cache.get("mealdb_search:pasta") == []
+
+    service._handle_invalidation({"type": "message", "data": json.dumps(
+        {"origin": "other", "keys": ["mealdb_search:pasta"], "all": False})})
+    assert service.local_cache.get("mealdb_search:pasta") is None
+
+    service._handle_invalidation({"type": "pmessage", "data": "mealdb_search:rice"})
+    assert service.local_cache.get("mealdb_search:rice") is None
+
+    service.local_cache.set("mealdb_search:rice", [], size=2)
+    service._handle_invalidation({"type": "message", "data": json.dumps(
+        {"origin": "other", "keys": [], "all": True})})
+    assert service.local_cache.stats()["entries"] == 0
+
+
+def test_cache_service_reports_layout_savings():
+    service = CacheService("redis://127.0.0.1:1")
+    stats = service._layout_stats({"expanded_bytes": "2000", "stored_bytes": "500", "meal_writes": "9", "meals_shared": "4"})
+    assert stats["saved_bytes"] == 1500
+    assert stats["saved_ratio"] == 0.75
+    assert service._layout_stats({})["saved_ratio"] == 0.0
+
+
+def test_should_refresh_starts_early_for_slow_entries():
+    service = CacheService("redis://127.0.0.1:1", xfetch_beta=1.0)
+    fast = CachedSearch(results=[], fetched_at=0.0, delta=0.0, soft_expiry=100.0)
+    slow = CachedSearch(results=[], fetched_at=0.0, delta=1000.0, soft_expiry=100.0)
+    assert not service.should_refresh(fast, now=99.0)
+    assert service.should_refresh(fast, now=100.0)
+    assert sum(service.should_refresh(slow, now=99.0) for _ in range(100)) > 90
+
+
+def test_invalidation_applies_namespace_version_and_prefix():
+    service = CacheService("redis://127.0.0.1:1")
+    service._set_version(3)
+    service.local_cache.set("mealdb:v3:search:pasta", [], size=2)
+    service.local_cache.set("mealdb:v3:search:rice", [], size=2)
+
+    service._handle_invalidation({"type": "message", "data": json.dumps(
+        {"origin": "other", "keys": [], "all": False, "prefix": "mealdb:v3:search:pa"})})
+    assert service.local_cache.get("mealdb:v3:search:pasta") is None
+    assert service.local_cache.get("mealdb:v3:search:rice") == []
+
+    service._handle_invalidation({"type": "message", "data": json.dumps(
+        {"origin": "other", "keys": [], "all": True, "version": 4})})
+    assert service._version == 4
+    assert asyncio.run(service._namespace()) == "mealdb:v4:"
+    assert service.local_cache.stats()["entries"] == 0
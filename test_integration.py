@@ -1,7 +1,9 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from app.core.app import create_app
+from app.repositories.async_recipe_repository import ExecutorRecipeRepository
 from app.repositories.recipe_repository import InMemoryRecipeRepository
 from app.services.recipe_service import RecipeService
 from app.services.mealdb_service import MealDBService
@@ -11,7 +13,7 @@ from app.dependencies import get_recipe_service
 # Create a shared test repository that persists across requests
 test_repository = InMemoryRecipeRepository()
 test_mealdb_service = MealDBService(redis_url="redis://localhost:6379")
-test_service = RecipeService(test_repository, test_mealdb_service)
+test_service = RecipeService(ExecutorRecipeRepository(test_repository), test_mealdb_service)
 
 
 def get_test_recipe_service():
@@ -173,3 +175,118 @@ def test_happy_path_crud_and_search():
     # Verify deletion
     resp_get_deleted = client.get(f"/recipes/{recipe_id}")
     assert resp_get_deleted.status_code == 404
+
+
+def test_list_recipes_paginated_with_projection():
+    resp = client.get("/recipes?limit=2&fields=title")
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {"id": 1, "title": "Garlic Shrimp Pasta"},
+        {"id": 2, "title": "Chicken Rice Bowl"},
+    ]
+    cursor = resp.headers["X-Next-Cursor"]
+    assert 'rel="next"' in resp.headers["Link"]
+
+    resp_next = client.get(f"/recipes?limit=2&fields=title&cursor={cursor}")
+    assert resp_next.json() == [{"id": 3, "title": "Simple Salad"}]
+    assert "X-Next-Cursor" not in resp_next.headers
+
+    assert client.get("/recipes?cursor=not-a-cursor").status_code == 400
+    assert client.get("/recipes?fields=title,secret").status_code == 400
+
+
+def test_read_endpoints_answer_conditional_requests():
+    resp = client.get("/recipes?limit=2")
+    etag = resp.headers["ETag"]
+    assert resp.headers["Cache-Control"].startswith("public, max-age=")
+    not_modified = client.get("/recipes?limit=2", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert client.get("/recipes?limit=3", headers={"If-None-Match": etag}).status_code == 200
+
+    recipe_etag = client.get("/recipes/1").headers["ETag"]
+    assert client.get("/recipes/1", headers={"If-None-Match": recipe_etag}).status_code == 304
+    assert "ETag" not in client.get("/recipes/999").headers
+
+    # Writes change the ETags of the affected responses only
+    client.put("/recipes/1", json={**client.get("/recipes/1").json(), "title": "Renamed"})
+    assert client.get("/recipes?limit=2", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/recipes/1", headers={"If-None-Match": recipe_etag}).json()["title"] == "Renamed"
+    other_etag = client.get("/recipes/2").headers["ETag"]
+    client.delete("/recipes/3")
+    assert client.get("/recipes/2", headers={"If-None-Match": other_etag}).status_code == 304
+
+    search = client.get("/recipes/search?q=")
+    resp = client.get("/recipes/search?q=", headers={"If-None-Match": search.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_find_recipes_by_ingredients():
+    resp = client.get("/recipes/by-ingredients?have=rice, Chicken,soy sauce")
+    assert resp.status_code == 200
+    recipes = resp.json()
+    assert [r["title"] for r in recipes] == ["Chicken Rice Bowl"]
+    assert recipes[0]["match"] == {"matched": 3, "total": 4, "coverage": 0.75}
+
+    assert client.get("/recipes/by-ingredients?have=,").status_code == 400
+
+
+def test_export_recipes_ndjson():
+    resp = client.get("/recipes/export?batch_size=2")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in lines] == [1, 2, 3]
+    assert lines[0]["ingredients"] == ["shrimp", "pasta", "garlic", "olive oil", "lemon"]
+
+    resumed = client.get("/recipes/export?after_id=1")
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [2, 3]
+
+
+def test_export_recipes_gzip():
+    resp = client.get("/recipes/export?gzip=true", headers={"Accept-Encoding": "identity"})
+    assert resp.headers["content-encoding"] == "gzip"
+    # httpx decodes the gzip stream transparently
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [1, 2, 3]
+
+
+BULK_RECIPE = {
+    "title": "Bulk Dish",
+    "ingredients": ["a", "b"],
+    "steps": ["Mix"],
+    "prepTime": "1 minute",
+    "cookTime": "2 minutes",
+    "difficulty": "Easy",
+    "cuisine": "Test"
+}
+
+
+def test_bulk_create_json_array_reports_item_errors():
+    invalid = {key: value for key, value in BULK_RECIPE.items() if key != "title"}
+    resp = client.post("/recipes/bulk", json=[BULK_RECIPE, invalid, BULK_RECIPE])
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["created"] == 2
+    assert data["ids"] == [4, 5]
+    assert data["failed"] == 1
+    assert data["errors"][0]["index"] == 1
+    assert "title" in data["errors"][0]["error"]
+    assert client.get("/recipes/5").json()["title"] == "Bulk Dish"
+
+
+def test_bulk_create_ndjson_stream():
+    lines = [json.dumps(BULK_RECIPE), "{not json", "", json.dumps(BULK_RECIPE)]
+    resp = client.post(
+        "/recipes/bulk",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert data["errors"][0]["index"] == 1
+
+
+def test_bulk_create_rejects_non_array():
+    assert client.post("/recipes/bulk", json=BULK_RECIPE).status_code == 400
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from app.core.redis import RedisConnectionManager
+from app.models.recipe import RecipeCreate
+from app.repositories.async_mealdb_mirror_repository import ExecutorMealDBMirrorRepository
+from app.repositories.async_recipe_repository import ExecutorRecipeRepository
+from app.repositories.mealdb_mirror_repository import MealDBMirrorRepository
+from app.repositories.recipe_repository import InMemoryRecipeRepository
+from app.services.cache_service import CacheService
+from app.services.mealdb_service import MealDBError, MealDBService
+from app.services.mealdb_transform import MealTransformer, parse_instructions_to_steps
+from app.services.recipe_service import RecipeService
+from app.services.warmup_service import CacheWarmupService, preload_queries
+
+
+SAMPLE_MEAL = {
+    "idMeal": "52771",
+    "strMeal": "Spicy Arrabiata Penne",
+    "strArea": "Italian",
+    "strInstructions": "Bring a large pot of water to a boil. Add kosher salt to the boiling water, then add the pasta.",
+    "strIngredient1": "penne rigate",
+    "strMeasure1": "1 pound",
+    "strIngredient2": "olive oil",
+    "strMeasure2": "1/4 cup",
+    "strIngredient3": "",
+    "strMeasure3": "",
+}
+
+# Only reachable through its category, so the warm-up must look it up by id
+DESSERT_MEAL = {
+    "idMeal": "52768",
+    "strMeal": "Apple Frangipan Tart",
+    "strCategory": "Dessert",
+    "strArea": "British",
+    "strInstructions": "Preheat the oven. Bake the tart until golden.",
+    "strIngredient1": "apples",
+    "strMeasure1": "2",
+}
+CATEGORIES = {"Pasta": [SAMPLE_MEAL], "Dessert": [DESSERT_MEAL]}
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # clients that time out close their sockets mid-response
+
+
+class StubMealDB:
+    """Local stand-in for TheMealDB search endpoint"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                stub.requests.append((url.path, parse_qs(url.query)))
+                time.sleep(stub.delay)
+                endpoint = url.path.rsplit("/", 1)[-1]
+                if endpoint == "list.php":
+                    meals = [{"strCategory": name} for name in CATEGORIES]
+                elif endpoint == "filter.php":
+                    meals = [{"idMeal": meal["idMeal"]} for meal in CATEGORIES.get(params["c"], [])]
+                elif endpoint == "lookup.php":
+                    meals = [meal for meal in (SAMPLE_MEAL, DESSERT_MEAL) if meal["idMeal"] == params["i"]]
+                elif "f" in params:
+                    meals = [SAMPLE_MEAL] if SAMPLE_MEAL["strMeal"].lower().startswith(params["f"]) else []
+                else:
+                    query = params.get("s", "")
+                    meals = [SAMPLE_MEAL] if query and query in SAMPLE_MEAL["strMeal"].lower() else []
+                body = json.dumps({"meals": meals or None}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = QuietHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api/json/v1/1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubMealDB()
+    yield server
+    server.close()
+
+
+def make_service(base_url: str, **kwargs) -> MealDBService:
+    # Nothing listens on port 1, so every cache lookup is a miss
+    cache_service = CacheService(redis_manager=RedisConnectionManager("redis://127.0.0.1:1", retries=0))
+    return MealDBService(base_url=base_url, cache_service=cache_service, **kwargs)
+
+
+def test_search_transforms_upstream_results(stub):
+    async def run():
+        service = make_service(stub.base_url)
+        try:
+            return await service.search_recipes("Arrabiata")
+        finally:
+            await service.aclose()
+
+    results = asyncio.run(run())
+    assert stub.requests == [("/api/json/v1/1/search.php", {"s": ["arrabiata"]})]
+    assert results[0]["id"] == "52771"
+    assert results[0]["ingredients"] == ["1 pound penne rigate", "1/4 cup olive oil"]
+    assert results[0]["source"] == "mealdb"
+
+
+def test_transformer_memoizes_by_meal_content():
+    transformer = MealTransformer(max_entries=2)
+    first = transformer.transform(dict(SAMPLE_MEAL))
+    first["source"] = "changed"
+    first["ingredients"].append("extra")
+    first["steps"].clear()
+    again = transformer.transform(dict(SAMPLE_MEAL))
+    assert again["source"] == "mealdb"
+    assert "extra" not in again["ingredients"] and again["steps"]
+    assert transformer.stats()["hits"] == 1
+
+    edited = transformer.transform({**SAMPLE_MEAL, "strMeal": "Mild Arrabiata Penne"})
+    assert edited["title"] == "Mild Arrabiata Penne"
+    assert transformer.stats()["misses"] == 2
+
+    transformer.transform({**SAMPLE_MEAL, "idMeal": "1"})
+    assert transformer.stats()["entries"] == 2
+
+
+def test_parse_instructions_to_steps():
+    assert parse_instructions_to_steps("STEP 1\r\nMix the sauce well.\r\nSTEP 2\r\nServe it immediately.") == [
+        "Mix the sauce well.", "Serve it immediately.",
+    ]
+    assert parse_instructions_to_steps("1. Chop the onions finely. 2. Fry them until golden.") == [
+        "Chop the onions finely.", "Fry them until golden.",
+    ]
+    assert parse_instructions_to_steps("") == []
+
+
+def test_concurrent_misses_are_coalesced(stub):
+    stub.delay = 0.2
+
+    async def run():
+        service = make_service(stub.base_url)
+        try:
+            return await asyncio.gather(*[
+                service.search_recipes(query) for query in ["penne", "PENNE", " Penne ", "penne"] * 5
+            ])
+        finally:
+            await service.aclose()
+
+    results = asyncio.run(run())
+    assert len(stub.requests) == 1
+    assert all(r == results[0] for r in results)
+    assert results[0][0]["title"] == "Spicy Arrabiata Penne"
+
+
+def test_upstream_timeout_returns_empty(stub):
+    stub.delay = 0.5
+
+    async def run():
+        service = make_service(stub.base_url, read_timeout=0.05)
+        try:
+            return await service.search_recipes("penne")
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run()) == []
+
+
+class LocalLockCacheService(CacheService):
+    """Cache without Redis whose refresh lock is always free (or always busy)"""
+
+    def __init__(self, lock_free: bool = True, **kwargs):
+        super().__init__(redis_manager=RedisConnectionManager("redis://127.0.0.1:1", retries=0), **kwargs)
+        self.lock_free = lock_free
+
+    async def acquire_refresh_lock(self, query):
+        return object() if self.lock_free else None
+
+    async def release_refresh_lock(self, lock):
+        pass
+
+
+@pytest.mark.parametrize("lock_free", [True, False])
+def test_stale_results_are_served_while_refreshing(stub, lock_free):
+    cache_service = LocalLockCacheService(lock_free=lock_free, soft_ttl=0, xfetch_beta=0)
+
+    async def run():
+        service = MealDBService(base_url=stub.base_url, cache_service=cache_service)
+        try:
+            await service.search_recipes("arrabiata")
+            stub.delay = 0.5
+            stale = await asyncio.wait_for(service.search_recipes("arrabiata"), 0.25)
+            await asyncio.gather(*service._refreshing.values())
+            return stale
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run())[0]["id"] == "52771"
+    assert len(stub.requests) == (2 if lock_free else 1)
+    assert cache_service.refresh_stats["stale_served"] == 1
+    assert cache_service.refresh_stats["refreshes"] == (1 if lock_free else 0)
+
+
+def test_unreachable_upstream_returns_empty():
+    async def run():
+        service = make_service("http://127.0.0.1:1", connect_timeout=0.2)
+        try:
+            return await service.search_recipes("penne")
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(run()) == []
+
+
+def test_unreachable_upstream_raises_when_asked():
+    async def run():
+        service = make_service("http://127.0.0.1:1", connect_timeout=0.2)
+        try:
+            await service.search_recipes("penne", raise_errors=True)
+        finally:
+            await service.aclose()
+
+    with pytest.raises(MealDBError):
+        asyncio.run(run())
+
+
+def test_recipe_search_fans_out_and_returns_partial_results(stub):
+    stub.delay = 0.5
+
+    async def run():
+        service = RecipeService(
+            ExecutorRecipeRepository(InMemoryRecipeRepository()), make_service(stub.base_url), mealdb_timeout=0.1
+        )
+        try:
+            started = time.perf_counter()
+            results = await service.search_recipes("pasta")
+            return results, time.perf_counter() - started
+        finally:
+            await service.mealdb_service.aclose()
+
+    results, elapsed = asyncio.run(run())
+    assert elapsed < 0.4
+    assert [r["title"] for r in results.recipes] == ["Garlic Shrimp Pasta"]
+    assert results.recipes[0]["source"] == "internal"
+    assert results.sources_status == {"internal": "ok", "mealdb": "timeout"}
+    assert results.partial
+
+
+def test_recipe_search_keeps_internal_results_first(stub):
+    async def run():
+        repository = InMemoryRecipeRepository()
+        repository.create_recipe(RecipeCreate(
+            title="Weeknight Penne", ingredients=["penne"], steps=["Boil"],
+            prepTime="5 minutes", cookTime="10 minutes", difficulty="Easy", cuisine="Italian",
+        ))
+        service = RecipeService(ExecutorRecipeRepository(repository), make_service(stub.base_url))
+        try:
+            return await service.search_recipes("penne")
+        finally:
+            await service.mealdb_service.aclose()
+
+    results = asyncio.run(run())
+    assert [r["source"] for r in results.recipes] == ["internal", "mealdb"]
+    assert results.sources_status == {"internal": "ok", "mealdb": "ok"}
+    assert not results.partial
+
+
+def test_warmup_crawls_catalog_into_mirror_and_resumes(stub, tmp_path):
+    mirror = MealDBMirrorRepository(db_path=str(tmp_path / "recipes.db"), pool_size=2)
+
+    executor = ThreadPoolExecutor(max_workers=2)
+
+    async def run():
+        service = make_service(stub.base_url)
+        try:
+            warmup = CacheWarmupService(service, service.cache_service, ExecutorMealDBMirrorRepository(mirror, executor))
+            return await warmup.run(), await warmup.run()
+        finally:
+            await service.aclose()
+
+    try:
+        first, second = asyncio.run(run())
+        recipes = {recipe["id"]: recipe for recipe in mirror.iter_recipes()}
+    finally:
+        executor.shutdown()
+        mirror.close()
+
+    assert first.tasks_run == 26 + len(CATEGORIES)
+    assert first.failed_tasks == []
+    assert recipes["52768"]["title"] == "Apple Frangipan Tart"
+    assert recipes["52771"]["ingredients"] == ["1 pound penne rigate", "1/4 cup olive oil"]
+    lookups = [params for path, params in stub.requests if path.endswith("lookup.php")]
+    assert lookups == [{"i": ["52768"]}]
+
+    # The second run resumes from the recorded state: only the category list is fetched
+    assert second.tasks_run == 0
+    assert second.tasks_skipped == first.tasks_run
+    assert len(stub.requests) == first.tasks_run + 2 + 1
+
+
+def test_preload_queries_match_titles_like_mealdb():
+    pasta = {"id": "1", "title": "Spicy Arrabiata Penne"}
+    penne = {"id": "2", "title": "Penne Pasta"}
+    queries = preload_queries([pasta, penne])
+    assert queries["penne"] == [pasta, penne]
+    assert queries["spicy arrabiata penne"] == [pasta]
+    assert "pasta" in queries and "spicy" in queries
+
+
+def test_mirror_mode_searches_locally_and_syncs_upstream_results(stub, tmp_path):
+    mirror = MealDBMirrorRepository(db_path=str(tmp_path / "recipes.db"), pool_size=2)
+    mirror.upsert_recipes([{
+        "id": "52768", "title": "Apple Frangipan Tart", "ingredients": ["2 apples"], "steps": [],
+        "prepTime": "15 minutes", "cookTime": "30 minutes", "difficulty": "Easy", "cuisine": "British",
+    }])
+
+    repository = ExecutorRecipeRepository(InMemoryRecipeRepository(), max_workers=2)
+    async_mirror = ExecutorMealDBMirrorRepository(mirror, repository.executor)
+    threads = set()
+    original = mirror.search_recipes
+
+    def recording_search(*args, **kwargs):
+        threads.add(threading.current_thread().name)
+        return original(*args, **kwargs)
+
+    mirror.search_recipes = recording_search
+
+    async def run():
+        mealdb_service = make_service(stub.base_url, mirror=async_mirror)
+        recipe_service = RecipeService(repository, mealdb_service, mirror=async_mirror)
+        try:
+            local = await recipe_service.search_recipes("frangipan")
+            upstream = await recipe_service.search_recipes("arrabiata")
+            return local, upstream
+        finally:
+            await mealdb_service.aclose()
+
+    try:
+        local, upstream = asyncio.run(run())
+        synced = original("penne")
+    finally:
+        repository.close()
+        mirror.close()
+
+    # Mirror searches run on the recipe repository's threads, not Starlette's threadpool
+    assert threads and all(name.startswith("recipe-repository") for name in threads)
+
+    assert [r["id"] for r in local.recipes] == ["52768"]
+    assert [r["id"] for r in upstream.recipes] == ["52771"]
+    # Only the query the mirror could not answer went upstream, and its results were mirrored
+    assert stub.requests == [("/api/json/v1/1/search.php", {"s": ["arrabiata"]})]
+    assert [r["id"] for r in synced] == ["52771"]
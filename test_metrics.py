@@ -0,0 +1,71 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.core.app import create_app
+from app.core.metrics import Counter, Gauge, Histogram, Registry, timed
+from app.dependencies import get_recipe_service
+from app.repositories.async_recipe_repository import ExecutorRecipeRepository
+from app.repositories.recipe_repository import InMemoryRecipeRepository
+from app.services.mealdb_service import MealDBService
+from app.services.recipe_service import RecipeService
+
+
+def test_registry_renders_text_format():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ("path",), registry=registry)
+    in_use = Gauge("in_use", "In use", registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ("op",), buckets=(0.1, 1.0), registry=registry)
+    registry.add_callback(lambda: in_use.set(3))
+
+    requests.labels(path='/a"b').inc()
+    requests.labels(path='/a"b').inc(2)
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.labels(op="get").observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{path="/a\\"b"} 3' in lines
+    assert "in_use 3" in lines
+    assert 'latency_seconds_bucket{op="get",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{op="get",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{op="get",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{op="get"} 2.65' in lines
+    assert 'latency_seconds_count{op="get"} 4' in lines
+
+
+def test_timed_records_sync_and_async_calls():
+    registry = Registry()
+    histogram = Histogram("calls_seconds", "Calls", ("service", "method"), registry=registry)
+
+    @timed(histogram, service="test")
+    def compute():
+        return 1
+
+    @timed(histogram, service="test")
+    async def fetch():
+        raise ValueError("boom")
+
+    assert compute() == 1
+    try:
+        asyncio.run(fetch())
+    except ValueError:
+        pass
+    body = registry.render()
+    assert 'calls_seconds_count{service="test",method="compute"} 1' in body
+    assert 'calls_seconds_count{service="test",method="fetch"} 1' in body  # failures are timed too
+
+
+def test_metrics_endpoint_reports_requests_by_route():
+    app = create_app()
+    service = RecipeService(ExecutorRecipeRepository(InMemoryRecipeRepository()), MealDBService(redis_url="redis://localhost:6379"))
+    app.dependency_overrides[get_recipe_service] = lambda: service
+    client = TestClient(app)
+
+    client.get("/recipes/2")
+    client.get("/no-such-path")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/recipes/{recipe_id}",status="200"}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'service_call_duration_seconds_count{service="recipes",method="get_recipe_by_id"}' in body
@@ -0,0 +1,29 @@
+import pytest
+from pydantic import TypeAdapter
+from app.core import serialization
+
+
+RECIPE = {"id": 1, "title": "Crème brûlée", "ingredients": ["2 eggs", "cream"], "steps": [], "rating": 4.5}
+
+
+@pytest.mark.parametrize("writer,reader", [("json", "orjson"), ("orjson", "json")])
+def test_backends_read_each_others_output(writer, reader):
+    encoded = serialization.create_backend(writer).dumps(RECIPE)
+    # Same compact, unescaped UTF-8 either way
+    assert encoded == serialization.create_backend(reader).dumps(RECIPE)
+    assert serialization.create_backend(reader).loads(encoded) == RECIPE
+    assert serialization.create_backend(reader).loads(encoded.decode()) == RECIPE
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.create_backend("yaml")
+
+
+def test_validated_response_encodes_once_with_active_backend():
+    response = serialization.validated_response(TypeAdapter(dict), RECIPE, headers={"X-Test": "1"})
+    assert serialization.loads(response.body) == RECIPE
+    assert response.headers["X-Test"] == "1"
+    assert response.media_type == "application/json"
+    with pytest.raises(ValueError):
+        serialization.validated_response(TypeAdapter(dict), ["not", "a", "dict"])
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+import time
+import pytest
+from app import dependencies
+from app.core.config import Settings
+from app.core.server import available_cpus, worker_count
+
+
+def test_worker_count_defaults_to_available_cpus(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert worker_count(Settings()) == available_cpus() >= 1
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert worker_count(Settings()) == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_workers_do_not_inherit_resources(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "recipes.db"))
+    dependencies.get_settings.cache_clear()
+    parent_repository = dependencies.get_recipe_repository()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child: report whether it opened a fresh repository, then exit at once
+        inherited = dependencies._recipe_repository is not None
+        fresh = dependencies.get_recipe_repository() is not parent_repository
+        os.write(write_end, b"ok" if fresh and not inherited else b"shared")
+        os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    result = os.read(read_end, 16)
+    os.close(read_end)
+    try:
+        assert result == b"ok"
+        assert dependencies.get_recipe_repository() is parent_repository
+    finally:
+        dependencies._recipe_repository = None
+        parent_repository.close()
+        dependencies.get_settings.cache_clear()
+
+
+def test_close_resources_drains_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "recipes.db"))
+    monkeypatch.setenv("GRACEFUL_TIMEOUT", "5")
+    dependencies.get_settings.cache_clear()
+    repository = dependencies.get_recipe_repository()
+    held = threading.Event()
+
+    def slow_query():
+        with repository.pool.connection():
+            held.set()
+            time.sleep(0.3)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        await dependencies.close_resources()
+        ticker.cancel()
+        return ticks
+
+    worker = threading.Thread(target=slow_query)
+    worker.start()
+    held.wait()
+    try:
+        ticks = asyncio.run(run())
+    finally:
+        worker.join()
+        dependencies.get_settings.cache_clear()
+    # The loop kept running while the pool waited for the query to finish
+    assert ticks >= 10
+    assert repository.pool.stats()["size"] == 0
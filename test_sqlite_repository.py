@@ -0,0 +1,487 @@
+import asyncio
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+import pytest
+from app.core.metrics import REGISTRY, SQLITE_WRITE_BATCH_SIZE
+from app.models.recipe import RecipeCreate, RecipeUpdate
+from app.repositories.async_recipe_repository import ExecutorRecipeRepository
+from app.repositories.mealdb_mirror_repository import MealDBMirrorRepository
+from app.repositories.sqlite_pool import SQLiteConnectionPool
+from app.repositories.sqlite_recipe_repository import SQLiteRecipeRepository
+from app.repositories.sqlite_writer import SQLiteWriter
+
+
+def make_recipe(title: str = "Test Dish", **overrides) -> RecipeCreate:
+    data = {
+        "title": title,
+        "ingredients": ["ingredient1", "ingredient2"],
+        "steps": ["Step 1", "Step 2"],
+        "prepTime": "5 minutes",
+        "cookTime": "10 minutes",
+        "difficulty": "Medium",
+        "cuisine": "TestCuisine",
+    }
+    data.update(overrides)
+    return RecipeCreate(**data)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repo = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"), pool_size=2)
+    yield repo
+    repo.close()
+
+
+def test_seeds_once(tmp_path):
+    db_path = str(tmp_path / "recipes.db")
+    first = SQLiteRecipeRepository(db_path=db_path)
+    first.close()
+    second = SQLiteRecipeRepository(db_path=db_path)
+    assert len(second.get_all_recipes()) == 3
+    second.close()
+
+
+def test_pool_configures_wal_and_reuses_connections(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=2)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        first = conn
+    with pool.connection() as conn:
+        assert conn is first
+    assert pool.stats() == {"max_size": 2, "size": 1, "idle": 1, "in_use": 0}
+    pool.close()
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_is_bounded(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    pool.close()
+
+
+def test_pool_rolls_back_on_error(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close()
+
+
+def test_crud_from_many_threads(repository):
+    errors = []
+
+    def worker(n: int):
+        try:
+            created = repository.create_recipe(make_recipe(f"Threaded {n}"))
+            assert repository.get_recipe_by_id(created["id"])["title"] == f"Threaded {n}"
+        except Exception as e:  # pragma: no cover - surfaced by the assert below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(repository.get_all_recipes()) == 23
+    assert repository.pool.stats()["size"] <= 2
+
+
+def test_update_and_delete(repository):
+    created = repository.create_recipe(make_recipe())
+    updated = repository.update_recipe(created["id"], RecipeUpdate(**make_recipe("Renamed").model_dump()))
+    assert updated["title"] == "Renamed"
+    assert repository.update_recipe(99999, RecipeUpdate(**make_recipe().model_dump())) is None
+    assert repository.delete_recipe(created["id"]) is True
+    assert repository.delete_recipe(created["id"]) is False
+
+
+def test_versions_follow_writes(repository):
+    table, other = repository.get_version(), repository.get_version(2)
+    created = repository.create_recipe(make_recipe())
+    after_create = repository.get_version(created["id"])
+    assert repository.get_version() != table
+    repository.update_recipe(created["id"], RecipeUpdate(**make_recipe("Renamed").model_dump()))
+    after_update = repository.get_version(created["id"])
+    assert after_update != after_create
+    repository.delete_recipe(created["id"])
+    assert repository.get_version(created["id"]) not in (after_create, after_update)
+    repository.bulk_create([make_recipe("A"), make_recipe("B")])
+    assert repository.get_version(2) == other
+    # Another instance on the same database shares the counters
+    reopened = SQLiteRecipeRepository(db_path=repository.db_path, pool_size=1)
+    assert reopened.get_version() == repository.get_version()
+    reopened.close()
+
+
+def test_search_matches_title_ingredients_and_cuisine(repository):
+    assert [r["title"] for r in repository.search_recipes("PASTA")] == ["Garlic Shrimp Pasta"]
+    assert [r["title"] for r in repository.search_recipes("soy")] == ["Chicken Rice Bowl"]
+    assert [r["title"] for r in repository.search_recipes("mediterr")] == ["Simple Salad"]
+    assert repository.search_recipes("olive oil lemon")[0]["title"] == "Garlic Shrimp Pasta"
+    assert repository.search_recipes("  ") == []
+    assert repository.search_recipes('"unbalanced') == []
+
+
+def test_search_ranks_title_matches_first(repository):
+    repository.create_recipe(make_recipe("Lemon Tart"))
+    results = repository.search_recipes("lemon")
+    assert [r["title"] for r in results] == ["Lemon Tart", "Garlic Shrimp Pasta"]
+    assert len(repository.search_recipes("lemon", limit=1)) == 1
+
+
+def test_search_highlights(repository):
+    result = repository.search_recipes("shri", highlight=True)[0]
+    assert result["highlight"]["title"] == "Garlic <mark>Shrimp</mark> Pasta"
+    assert "<mark>shrimp</mark>" in result["highlight"]["ingredients"]
+
+
+def test_search_index_follows_writes(repository):
+    created = repository.create_recipe(make_recipe("Quinoa Bowl"))
+    assert [r["id"] for r in repository.search_recipes("quinoa")] == [created["id"]]
+    repository.update_recipe(created["id"], RecipeUpdate(**make_recipe("Barley Bowl").model_dump()))
+    assert repository.search_recipes("quinoa") == []
+    assert [r["id"] for r in repository.search_recipes("barley")] == [created["id"]]
+    repository.delete_recipe(created["id"])
+    assert repository.search_recipes("barley") == []
+
+
+def test_rebuild_search_index(repository):
+    repository.writer.execute(lambda conn: conn.execute("DELETE FROM recipes_fts"))
+    assert repository.search_recipes("pasta") == []
+    progress = []
+    assert repository.rebuild_search_index(batch_size=2, progress=progress.append) == 3
+    assert progress == [2, 3]
+    assert [r["title"] for r in repository.search_recipes("pasta")] == ["Garlic Shrimp Pasta"]
+
+
+def test_list_recipes_keyset_pages(repository):
+    for n in range(4):
+        repository.create_recipe(make_recipe(f"Extra {n}"))
+    first = repository.list_recipes(3)
+    assert [r["id"] for r in first] == [1, 2, 3]
+    second = repository.list_recipes(3, after_id=first[-1]["id"])
+    assert [r["id"] for r in second] == [4, 5, 6]
+    assert [r["id"] for r in repository.list_recipes(3, after_id=6)] == [7]
+    assert repository.list_recipes(3, after_id=7) == []
+    assert first[0] == repository.get_recipe_by_id(1)
+
+
+def test_list_recipes_projects_fields(repository):
+    recipes = repository.list_recipes(2, fields=["title", "steps"])
+    assert recipes == [
+        {"id": 1, "title": "Garlic Shrimp Pasta", "steps": ["Boil pasta", "Saute garlic and shrimp", "Toss together"]},
+        {"id": 2, "title": "Chicken Rice Bowl", "steps": ["Cook rice", "Pan sear chicken", "Slice and serve"]},
+    ]
+    with pytest.raises(ValueError):
+        repository.list_recipes(2, fields=["title", "secret"])
+
+
+def test_iter_recipes_streams_in_batches(repository):
+    for n in range(5):
+        repository.create_recipe(make_recipe(f"Extra {n}"))
+    assert [r["id"] for r in repository.iter_recipes(batch_size=3)] == list(range(1, 9))
+    assert [r["id"] for r in repository.iter_recipes(after_id=6, batch_size=3)] == [7, 8]
+
+    # No connection is held between batches
+    recipes = repository.iter_recipes(batch_size=2)
+    next(recipes)
+    assert repository.pool.stats()["in_use"] == 0
+
+
+def test_bulk_create_assigns_ids_in_order(repository):
+    results = repository.bulk_create([make_recipe(f"Bulk {n}") for n in range(5)])
+    assert results == [{"id": 4}, {"id": 5}, {"id": 6}, {"id": 7}, {"id": 8}]
+    assert repository.get_recipe_by_id(8)["title"] == "Bulk 4"
+    assert [r["title"] for r in repository.search_recipes("bulk", limit=10)] != []
+    assert repository.bulk_create([]) == []
+
+
+def test_bulk_create_isolates_failing_rows(repository):
+    repository.writer.execute(lambda conn: conn.execute(
+        "CREATE TRIGGER reject_bad BEFORE INSERT ON recipes WHEN new.title = 'Bad' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    ))
+    results = repository.bulk_create([make_recipe("Good 1"), make_recipe("Bad"), make_recipe("Good 2")])
+    assert "id" in results[0] and "id" in results[2]
+    assert results[1] == {"error": "rejected"}
+    assert repository.get_recipe_by_id(results[2]["id"])["title"] == "Good 2"
+    assert len(repository.get_all_recipes()) == 5
+
+
+def test_find_by_ingredients_ranks_by_coverage(repository):
+    results = repository.find_by_ingredients(["Olive oil", "tomatoes", "lettuce", "cucumber"])
+    assert [r["title"] for r in results] == ["Simple Salad", "Garlic Shrimp Pasta"]
+    assert results[0]["match"] == {"matched": 4, "total": 4, "coverage": 1.0}
+    assert results[1]["match"] == {"matched": 1, "total": 5, "coverage": 0.2}
+    assert repository.find_by_ingredients(["olive oil"], limit=1)[0]["title"] == "Simple Salad"
+    assert repository.find_by_ingredients([" ", "saffron"]) == []
+
+
+def test_ingredient_index_follows_writes(repository):
+    created = repository.create_recipe(make_recipe(ingredients=["2 cloves Garlic, minced", "1 tin Chopped Tomatoes"]))
+    match = repository.find_by_ingredients(["garlic", "tomato"])[0]
+    assert match["id"] == created["id"]
+    assert match["match"]["coverage"] == 1.0
+
+    repository.update_recipe(created["id"], RecipeUpdate(**make_recipe(ingredients=["400g Lentils"]).model_dump()))
+    assert [r["id"] for r in repository.find_by_ingredients(["lentils"])] == [created["id"]]
+    assert created["id"] not in [r["id"] for r in repository.find_by_ingredients(["tomato"])]
+
+    bulk_id = repository.bulk_create([make_recipe(ingredients=["1 cup red lentils"])])[0]["id"]
+    assert [r["id"] for r in repository.find_by_ingredients(["lentil"])] == [created["id"], bulk_id]
+
+    repository.delete_recipe(created["id"])
+    assert [r["id"] for r in repository.find_by_ingredients(["lentil"])] == [bulk_id]
+
+
+def test_rebuild_ingredient_index(repository):
+    repository.writer.execute(lambda conn: conn.execute("DELETE FROM recipe_ingredients"))
+    assert repository.find_by_ingredients(["rice"]) == []
+    assert repository.rebuild_ingredient_index(batch_size=2) == 3
+    assert [r["title"] for r in repository.find_by_ingredients(["rice"])] == ["Chicken Rice Bowl"]
+
+
+def test_lists_are_stored_packed(repository):
+    created = repository.create_recipe(make_recipe(ingredients=["a\x1fb", "salt"], steps=[""]))
+    with repository.pool.connection() as conn:
+        ingredients, steps = conn.execute("SELECT ingredients, steps FROM recipes WHERE id = 1").fetchone()
+        fallback = conn.execute("SELECT ingredients, steps FROM recipes WHERE id = ?", (created["id"],)).fetchone()
+    assert isinstance(ingredients, bytes) and isinstance(steps, bytes)
+    # Lists the packed format cannot hold are stored as JSON text
+    assert [type(value) for value in fallback] == [str, str]
+    assert repository.get_recipe_by_id(created["id"])["ingredients"] == ["a\x1fb", "salt"]
+    assert repository.get_recipe_by_id(created["id"])["steps"] == [""]
+
+
+def test_migrate_list_encoding(tmp_path):
+    db_path = str(tmp_path / "recipes.db")
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    expected = repository.get_all_recipes()
+
+    def store_as_json(conn):
+        for recipe in expected:
+            conn.execute(
+                "UPDATE recipes SET ingredients = ?, steps = ? WHERE id = ?",
+                (json.dumps(recipe["ingredients"]), json.dumps(recipe["steps"]), recipe["id"])
+            )
+        # A trigger from before the packed format is replaced at startup
+        conn.execute("DROP TRIGGER recipes_fts_update")
+        conn.execute("CREATE TRIGGER recipes_fts_update AFTER UPDATE ON recipes BEGIN SELECT 1; END")
+
+    repository.writer.execute(store_as_json)
+    repository.close()
+
+    repository = SQLiteRecipeRepository(db_path=db_path)
+    with repository.pool.connection() as conn:
+        trigger = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'recipes_fts_update'").fetchone()[0]
+    assert "recipes_fts" in trigger.split("BEGIN", 1)[1]
+    assert repository.get_all_recipes() == expected
+    assert repository.storage_stats()["json"]["rows"] == 3
+    version = repository.get_version()
+
+    progress = []
+    assert repository.migrate_list_encoding(batch_size=2, progress=progress.append) == 3
+    assert progress == [2, 3]
+    stats = repository.storage_stats()
+    assert stats["packed"]["rows"] == 3 and stats["json"] == {"rows": 0, "bytes": 0}
+    assert repository.get_all_recipes() == expected
+    assert repository.get_version() != version
+    assert [r["title"] for r in repository.search_recipes("shrimp")] == ["Garlic Shrimp Pasta"]
+    assert repository.migrate_list_encoding() == 0
+    repository.close()
+
+
+def test_executor_repository_runs_queries_off_the_event_loop(repository):
+    async_repository = ExecutorRecipeRepository(repository, max_workers=2)
+    for n in range(4):
+        repository.create_recipe(make_recipe(f"Extra {n}"))
+
+    async def run():
+        loop_thread = threading.current_thread().name
+        threads = set()
+        original = repository.get_recipe_by_id
+
+        def recording_get(recipe_id):
+            threads.add(threading.current_thread().name)
+            return original(recipe_id)
+
+        repository.get_recipe_by_id = recording_get
+        recipes = await asyncio.gather(*(async_repository.get_recipe_by_id(i) for i in range(1, 8)))
+        exported = [recipe["id"] async for recipe in async_repository.iter_recipes(after_id=1, batch_size=2)]
+        with pytest.raises(ValueError):
+            await async_repository.list_recipes(2, fields=["secret"])
+        return loop_thread, threads, recipes, exported
+
+    loop_thread, threads, recipes, exported = asyncio.run(run())
+    async_repository.close()
+    assert [r["id"] for r in recipes] == list(range(1, 8))
+    assert loop_thread not in threads and all(name.startswith("recipe-repository") for name in threads)
+    assert exported == [2, 3, 4, 5, 6, 7]
+
+
+def test_reads_use_read_only_connections(repository):
+    with repository.pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM recipes")
+    assert len(repository.get_all_recipes()) == 3
+
+
+def test_writer_group_commits_queued_writes(repository):
+    started, release = threading.Event(), threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait()
+
+    def fail(conn):
+        conn.execute("DELETE FROM recipes")
+        raise ValueError("rejected")
+
+    def visible_count(conn):
+        with repository.pool.connection() as reader:
+            return reader.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    repository.writer.submit(block)
+    started.wait()
+    created = [repository.submit_create_recipe(make_recipe(f"Queued {n}")) for n in range(2)]
+    failed = repository.writer.submit(fail)
+    deleted = repository.submit_delete_recipe(1)
+    probe = repository.writer.submit(visible_count)
+    release.set()
+
+    assert [future.result()["id"] for future in created] == [4, 5]
+    with pytest.raises(ValueError):
+        failed.result()
+    assert deleted.result() is True
+    # Applied in one transaction: nothing was visible to readers until its commit
+    assert probe.result() == 3
+    assert [r["id"] for r in repository.get_all_recipes()] == [2, 3, 4, 5]
+
+
+def test_mirror_writes_through_the_shared_writer(repository):
+    mirror = MealDBMirrorRepository(db_path=repository.db_path, pool_size=1, writer=repository.writer)
+    with mirror.pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM mealdb_recipes")
+    assert mirror.upsert_recipes([{
+        "id": "52768", "title": "Apple Frangipan Tart", "ingredients": ["2 apples"], "steps": [],
+        "prepTime": "15 minutes", "cookTime": "30 minutes", "difficulty": "Easy", "cuisine": "British",
+    }]) == 1
+    mirror.mark_task_completed("letter:a", 1)
+    assert mirror.completed_tasks() == {"letter:a": 1}
+    assert [r["id"] for r in mirror.search_recipes("frangipan")] == ["52768"]
+    mirror.close()
+
+    # Closing the mirror leaves the shared writer to the recipe repository
+    assert repository.create_recipe(make_recipe("After Mirror"))["id"] == 4
+
+
+def test_writer_linger_batches_writes_up_to_max_batch(tmp_path):
+    repository = SQLiteRecipeRepository(db_path=str(tmp_path / "recipes.db"), write_batch=2, write_linger=0.5)
+    batch_sizes = SQLITE_WRITE_BATCH_SIZE.labels(database="recipes")
+    before = batch_sizes.samples("size", "")
+
+    def visible_count(conn):
+        with repository.pool.connection() as reader:
+            return reader.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    start = time.perf_counter()
+    created = [repository.submit_create_recipe(make_recipe(f"Lingering {n}")) for n in range(3)]
+    probe = repository.writer.submit(visible_count)
+    deleted = repository.submit_delete_recipe(99)
+    assert [future.result()["id"] for future in created] == [4, 5, 6]
+    assert deleted.result() is False
+    # Batches of two: the probe shares a transaction with the third create, after the first batch committed
+    assert probe.result() == 5
+    assert time.perf_counter() - start < 2.0  # full batches do not wait out the budget
+    repository.close()
+
+    after = batch_sizes.samples("size", "")
+    assert after[1] != before[1]  # le="2" bucket
+    assert after[-1] != before[-1]  # count
+    assert "sqlite_write_queue_seconds_count" in REGISTRY.render()
+
+
+def test_in_memory_databases_are_rejected():
+    # Reads and writes use separate connections, which would each get their own empty database
+    for db_path in (":memory:", "file:recipes?mode=memory&cache=shared"):
+        with pytest.raises(ValueError, match="In-memory"):
+            SQLiteRecipeRepository(db_path=db_path)
+        with pytest.raises(ValueError, match="In-memory"):
+            SQLiteWriter(db_path)
+
+
+def _open_and_count(db_path: str) -> int:
+    repository = SQLiteRecipeRepository(db_path=db_path, pool_size=1)
+    try:
+        return len(repository.get_all_recipes())
+    finally:
+        repository.close()
+
+
+def test_concurrent_startup_seeds_once(tmp_path):
+    # Like workers starting together: schema setup and seeding run one process at a time
+    db_path = str(tmp_path / "recipes.db")
+    with multiprocessing.get_context("spawn").Pool(4) as processes:
+        counts = processes.map(_open_and_count, [db_path] * 4)
+    assert counts == [3, 3, 3, 3]
+
+
+def test_pool_close_drains_connections_in_use(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=2)
+    held = threading.Event()
+
+    def hold_connection(seconds):
+        with pool.connection() as conn:
+            conn.execute("SELECT 1")
+            held.set()
+            time.sleep(seconds)
+
+    worker = threading.Thread(target=hold_connection, args=(0.1,))
+    worker.start()
+    held.wait()
+    assert pool.close(timeout=2.0) is True
+    assert pool.stats()["size"] == 0
+    worker.join()
+
+    pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=2)
+    held.clear()
+    worker = threading.Thread(target=hold_connection, args=(0.3,))
+    worker.start()
+    held.wait()
+    assert pool.close() is False  # no timeout: in-use connections close on release
+    worker.join()
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_close_racing_releases_closes_every_connection(tmp_path):
+    for _ in range(20):
+        pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), max_size=4)
+        barrier = threading.Barrier(5)
+
+        def borrow():
+            with pool.connection() as conn:
+                conn.execute("SELECT 1")
+                barrier.wait()
+
+        workers = [threading.Thread(target=borrow) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        assert pool.close(timeout=2.0) is True
+        for worker in workers:
+            worker.join()
+        assert pool.stats()["size"] == 0